@@ -9,15 +9,17 @@ import sys
 import json
 import time
 from pathlib import Path
-from datetime import datetime
 
 # Adiciona diretório de scripts ao path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from content_generator import ContentGenerator
-from voice_generator import VoiceGenerator
-from video_compiler import VideoCompiler
-from youtube_uploader import YouTubeUploader
+from metrics import RunMetrics
+from pipeline_logging import get_logger, set_log_context
+from profiling import ProfileSession, profile_dir_for
+
+# Os módulos das etapas são importados sob demanda em run_full_pipeline:
+# eles trazem dependências pesadas (openai, requests, google-api-python-client)
+# que execuções curtas e --help não precisam carregar
 
 BASE_DIR = Path(__file__).parent.parent
 OUTPUT_DIR = BASE_DIR / "output"
@@ -26,29 +28,54 @@ LOGS_DIR = BASE_DIR / "logs"
 class AutomationPipeline:
     """Pipeline completo de automação de conteúdo"""
     
-    def __init__(self, auto_upload=False):
+    def __init__(self, auto_upload=False, profile=False, streaming=False, channel=None):
         """
         Inicializa pipeline
         
         Args:
             auto_upload: Se True, faz upload automático (requer configuração)
+            profile: Se True, grava perfil de cada etapa ao lado do pacote
+            streaming: Se True, narra o roteiro enquanto ele é gerado
+            channel: Nome do canal (padrão: "default")
         """
         self.auto_upload = auto_upload
-        self.log_file = LOGS_DIR / f"pipeline_{datetime.now().strftime('%Y%m%d')}.log"
+        self.channel = channel
+        self.streaming = streaming
+        self.profile = ProfileSession(enabled=profile)
+        self.metrics = RunMetrics()
+        self.logger = get_logger("pipeline")
+        set_log_context(run_id=self.metrics.run_id)
         
         # Cria diretórios necessários
         OUTPUT_DIR.mkdir(exist_ok=True)
         LOGS_DIR.mkdir(exist_ok=True)
     
     def log(self, message):
-        """Registra mensagem no log"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {message}"
-        
-        print(log_message)
-        
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(log_message + '\n')
+        """Registra mensagem no log (terminal + logs/pipeline.jsonl)"""
+        self.logger.info(message)
+    
+    def start_stage(self, stage):
+        """Marca início de etapa nas métricas e no contexto do log"""
+        self.metrics.start_stage(stage)
+        self.profile.start_stage(stage)
+        set_log_context(stage=stage)
+    
+    def finish_profile(self, package_file):
+        """Grava os perfis das etapas (se --profile)"""
+        self.profile.end_stage()
+        if package_file:
+            self.profile.finish(profile_dir_for(package_file))
+    
+    def visual_stage(self):
+        """Etapa de imagens das cenas (None sem IMAGE_BACKEND ou se indisponível: fundo padrão)"""
+        try:
+            from visual_assets import VisualAssetStage, images_enabled
+            if not images_enabled():
+                return None
+            return VisualAssetStage()
+        except Exception as e:
+            self.log(f"⚠️ Imagens das cenas desativadas: {e}")
+            return None
     
     def run_full_pipeline(self):
         """
@@ -62,40 +89,71 @@ class AutomationPipeline:
         self.log("🚀 INICIANDO PIPELINE DE AUTOMAÇÃO")
         self.log("=" * 70)
         
+        self.metrics.activate()
+        
+        package_file = None
+        
         try:
             # ETAPA 1: Geração de Conteúdo
+            self.start_stage('conteudo')
             self.log("\n📝 ETAPA 1/5: Geração de Conteúdo")
             self.log("-" * 70)
             
-            generator = ContentGenerator()
-            package_file = generator.generate_complete_content()
+            from channels import get_channel
+            from content_generator import ContentGenerator
+            generator = ContentGenerator(channel=get_channel(self.channel))
+            visual_stage = self.visual_stage()
+            if self.streaming and os.getenv("ELEVENLABS_API_KEY"):
+                from voice_generator import VoiceGenerator
+                package_file = generator.generate_complete_content(
+                    voice_generator=VoiceGenerator(), visual_stage=visual_stage)
+            else:
+                package_file = generator.generate_complete_content()
             
             self.log(f"✅ Pacote de conteúdo criado: {package_file}")
+            self.metrics.set_context(package_file=str(package_file))
+            set_log_context(package_id=Path(package_file).stem)
             
             # Carrega pacote
             with open(package_file, 'r', encoding='utf-8') as f:
                 package = json.load(f)
             
             # ETAPA 2: Geração de Narração
+            self.start_stage('narracao')
             self.log("\n🎙️ ETAPA 2/5: Geração de Narração")
             self.log("-" * 70)
             
+            # Imagens das cenas em paralelo com a narração
+            visuals = None
+            if visual_stage and 'visual_assets' not in package:
+                visuals = visual_stage.start(package.get('visual_prompts', []))
+            
             # Verifica se API key está configurada
-            if not os.getenv("ELEVENLABS_API_KEY"):
+            if package.get('audio_file'):
+                audio_file = package['audio_file']
+                self.log(f"✅ Narração gerada em streaming: {audio_file}")
+            elif not os.getenv("ELEVENLABS_API_KEY"):
                 self.log("⚠️ ELEVENLABS_API_KEY não configurada!")
                 self.log("   Configure com: export ELEVENLABS_API_KEY='sua_chave'")
                 self.log("   Pulando geração de narração...")
                 audio_file = None
             else:
+                from voice_generator import VoiceGenerator
                 voice_gen = VoiceGenerator()
                 audio_file = voice_gen.generate_from_content_package(package_file)
                 self.log(f"✅ Narração gerada: {audio_file}")
             
+            if visuals:
+                from visual_assets import attach_to_package
+                attach_to_package(package_file, visuals.result())
+            
             # ETAPA 3: Compilação de Vídeo
+            self.start_stage('video')
             self.log("\n🎬 ETAPA 3/5: Compilação de Vídeo")
             self.log("-" * 70)
             
             if audio_file:
+                from video_compiler import VideoCompiler
                 compiler = VideoCompiler()
                 video_file = compiler.compile_video_from_package(package_file)
                 self.log(f"✅ Vídeo compilado: {video_file}")
@@ -104,25 +162,31 @@ class AutomationPipeline:
                 video_file = None
             
             # ETAPA 4: Upload para YouTube (opcional)
+            self.start_stage('upload')
             self.log("\n📤 ETAPA 4/5: Upload para YouTube")
             self.log("-" * 70)
             
             youtube_url = None
             if self.auto_upload and video_file:
-                try:
-                    uploader = YouTubeUploader()
-                    video_id, youtube_url = uploader.upload_from_package(
-                        package_file, 
-                        privacy_status="private"  # Privado para revisão
-                    )
+                from upload_manager import UploadManager
+                manager = UploadManager(privacy_status="private")  # Privado para revisão
+                upload = manager.upload_package(package_file)
+                if upload['status'] == 'enviado':
+                    youtube_url = upload['youtube_url']
                     self.log(f"✅ Upload concluído: {youtube_url}")
-                except Exception as e:
-                    self.log(f"⚠️ Erro no upload: {e}")
+                elif upload['status'] == 'adiado':
+                    self.log(f"⏸️ Quota do YouTube esgotada, upload adiado até {upload['deferred_until']}")
+                    self.log("   Execute scripts/upload_manager.py após a renovação da quota")
+                else:
+                    self.log(f"⚠️ Erro no upload: {upload['error']}")
                     self.log("   Vídeo salvo localmente para upload manual")
             else:
                 self.log("⏭️ Upload automático desabilitado")
                 self.log(f"   Vídeo disponível em: {video_file}")
             
+            self.metrics.finish()
+            self.finish_profile(package_file)
+            
             # ETAPA 5: Preparação para TikTok
             self.log("\n📱 ETAPA 5/5: Preparação para TikTok")
             self.log("-" * 70)
@@ -161,10 +225,13 @@ class AutomationPipeline:
                 'audio_file': str(audio_file) if audio_file else None,
                 'video_file': str(video_file) if video_file else None,
                 'youtube_url': youtube_url,
-                'metadata': final_package['metadata']
+                'metadata': final_package['metadata'],
+                'run_id': self.metrics.run_id
             }
             
         except Exception as e:
+            self.metrics.finish(success=False, error=e)
+            self.finish_profile(package_file)
             self.log(f"\n❌ ERRO NO PIPELINE: {e}")
             import traceback
             self.log(traceback.format_exc())
@@ -188,11 +255,26 @@ def main():
         action='store_true',
         help='Ativa upload automático para YouTube (requer configuração)'
     )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Grava perfil (cProfile) de cada etapa ao lado do pacote'
+    )
+    parser.add_argument(
+        '--streaming',
+        action='store_true',
+        help='Narra o roteiro enquanto ele é gerado (menor latência)'
+    )
+    parser.add_argument(
+        '--channel',
+        help='Canal do vídeo (veja data/channels.json; padrão: default)'
+    )
     
     args = parser.parse_args()
     
     # Executa pipeline
-    pipeline = AutomationPipeline(auto_upload=args.auto_upload)
+    pipeline = AutomationPipeline(auto_upload=args.auto_upload, profile=args.profile,
+                                  streaming=args.streaming, channel=args.channel)
     result = pipeline.run_full_pipeline()
     
     # Retorna código de saída
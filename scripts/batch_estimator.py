@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Estimativa de Lotes (Tempo e Custo)
+Ajusta um modelo simples por etapa a partir do histórico de
+logs/metrics.jsonl (tempo de parede e de CPU, tokens do LLM, caracteres da
+ElevenLabs, bytes de upload) e prevê, para N vídeos e uma configuração de
+workers, o tempo total do lote, a etapa gargalo e o custo: OpenRouter,
+ElevenLabs, CPU de render e quota do YouTube.
+
+Cada etapa tem tempo = a + b × tamanho (caracteres na narração, segundos
+de mídia no render, bytes no upload; constante na geração de conteúdo),
+corrigido pela taxa de falhas (tentativas repetidas). Com fila de jobs, as
+etapas rodam em pipeline e o lote anda no ritmo da etapa mais lenta; no
+modo sequencial (automation_pipeline.py/scheduler.py), cada vídeo passa
+por todas as etapas antes do próximo.
+
+Workers da fila que atendem todas as etapas (o padrão do job_queue.py
+worker) são compartilhados: cada um faz uma etapa por vez, então o lote
+leva no mínimo N × (soma das etapas) / workers, mesmo que cada etapa, sozinha,
+pudesse usar todos eles (--shared-workers).
+
+O comando check refaz a previsão de cada lote já executado (ajustando o
+modelo sem ele) e compara com o tempo e o uso reais.
+
+Preços em data/cost_rates.json (sobrescrevem DEFAULT_RATES):
+    {"openrouter_input_per_million": 0.15, "render_per_cpu_hour": 0.05}
+
+Uso:
+    python3 scripts/batch_estimator.py plan --videos 100 --workers video=4,upload=2
+    python3 scripts/batch_estimator.py plan --videos 100 --shared-workers 4
+    python3 scripts/batch_estimator.py plan --videos 20 --sequential
+    python3 scripts/batch_estimator.py check
+"""
+
+import os
+import sys
+import json
+import math
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from metrics import METRICS_FILE
+from pipeline_config import load_with_overrides
+from rate_limiter import load_limits
+from upload_manager import DEFAULT_DAILY_QUOTA, DEFAULT_INSERT_COST
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+RATES_CONFIG = DATA_DIR / "cost_rates.json"
+
+STAGES = ['conteudo', 'narracao', 'video', 'upload']
+
+# Nomes das etapas na fila de jobs -> nomes do pipeline
+STAGE_ALIASES = {'gerar_conteudo': 'conteudo', 'render': 'video'}
+
+# Variável de tamanho de cada etapa (None = tempo constante por vídeo)
+STAGE_SIZE = {
+    'conteudo': None,
+    'narracao': 'characters',
+    'video': 'media_seconds',
+    'upload': 'upload_bytes',
+}
+
+# Provedor externo de cada etapa (limita a concorrência efetiva)
+STAGE_PROVIDER = {'conteudo': 'openrouter', 'narracao': 'elevenlabs', 'upload': 'youtube'}
+
+# Preços em USD; ajuste ao modelo e ao plano contratados
+DEFAULT_RATES = {
+    # openai/gpt-4o-mini no OpenRouter
+    'openrouter_input_per_million': 0.15,
+    'openrouter_cached_input_per_million': 0.075,
+    'openrouter_output_per_million': 0.60,
+    # Excedente do plano Creator
+    'elevenlabs_per_1000_characters': 0.30,
+    # vCPU-hora de uma VM de uso geral
+    'render_per_cpu_hour': 0.04,
+}
+
+# Intervalo sem registros que separa dois lotes no histórico
+BATCH_GAP_SECONDS = 1800
+
+# Mínimo de amostras para ajustar a reta (abaixo disso, usa a média)
+MIN_FIT_SAMPLES = 3
+
+
+def load_rates(config_file=None):
+    """Preços padrão + sobrescritas do arquivo de configuração"""
+    return load_with_overrides(DEFAULT_RATES, RATES_CONFIG, "COST_RATES_CONFIG", config_file)
+
+
+def load_history(metrics_file=None, days=None):
+    """
+    Registros de etapa do histórico, com nomes de etapa normalizados
+
+    Args:
+        days: Considera só os últimos N dias
+
+    Returns:
+        Lista de registros (com 'start' e 'end' em epoch), em ordem de início
+    """
+    metrics_file = Path(metrics_file or os.getenv("METRICS_FILE") or METRICS_FILE)
+    if not metrics_file.exists():
+        return []
+
+    since = (datetime.now() - timedelta(days=days)).timestamp() if days else None
+    entries = []
+    with open(metrics_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+                start = datetime.fromisoformat(entry['timestamp']).timestamp()
+            except (json.JSONDecodeError, KeyError, ValueError):
+                continue
+            stage = STAGE_ALIASES.get(entry.get('stage'), entry.get('stage'))
+            if stage not in STAGES or (since and start < since):
+                continue
+            entries.append({**entry, 'stage': stage, 'start': start,
+                            'end': start + entry.get('wall_seconds', 0)})
+
+    entries.sort(key=lambda e: e['start'])
+    return entries
+
+
+def mean(values):
+    values = list(values)
+    return sum(values) / len(values) if values else 0.0
+
+
+def fit_linear(xs, ys):
+    """
+    Mínimos quadrados de y = a + b·x
+
+    Com poucas amostras ou x constante, devolve a média (b = 0).
+
+    Returns:
+        (a, b)
+    """
+    if len(xs) < MIN_FIT_SAMPLES:
+        return mean(ys), 0.0
+    x_mean, y_mean = mean(xs), mean(ys)
+    variance = sum((x - x_mean) ** 2 for x in xs)
+    if variance == 0:
+        return y_mean, 0.0
+    slope = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / variance
+    # Tempo não diminui com o tamanho: inclinação negativa é ruído
+    if slope < 0:
+        return y_mean, 0.0
+    return y_mean - slope * x_mean, slope
+
+
+class StageModel:
+    """Tempo, CPU e uso por vídeo de uma etapa, ajustados ao histórico"""
+
+    def __init__(self, stage, entries):
+        self.stage = stage
+        self.size_key = STAGE_SIZE[stage]
+        succeeded = [e for e in entries if e.get('success')]
+        self.samples = len(succeeded)
+        self.failure_rate = 1 - self.samples / len(entries) if entries else 0.0
+
+        def size(entry):
+            return entry.get(self.size_key, 0) if self.size_key else 0
+
+        sizes = [size(e) for e in succeeded]
+        self.mean_size = mean(sizes)
+        self.wall = fit_linear(sizes, [e['wall_seconds'] for e in succeeded])
+        # Registros antigos não têm cpu_seconds
+        with_cpu = [e for e in succeeded if 'cpu_seconds' in e]
+        self.cpu = fit_linear([size(e) for e in with_cpu], [e['cpu_seconds'] for e in with_cpu])
+        self.cpu_samples = len(with_cpu)
+
+        usage_keys = ('prompt_tokens', 'completion_tokens', 'cached_prompt_tokens',
+                      'characters', 'media_seconds', 'upload_bytes')
+        self.usage = {key: mean(e.get(key, 0) for e in succeeded) for key in usage_keys}
+
+    def _attempts(self):
+        # Tentativas que falham também ocupam o worker
+        return 1 / (1 - self.failure_rate) if self.failure_rate < 1 else 1.0
+
+    def seconds(self, size=None):
+        """Tempo de parede por vídeo (incluindo tentativas com falha)"""
+        size = self.mean_size if size is None else size
+        a, b = self.wall
+        return max(0.0, a + b * size) * self._attempts()
+
+    def cpu_seconds(self, size=None):
+        size = self.mean_size if size is None else size
+        a, b = self.cpu
+        return max(0.0, a + b * size) * self._attempts()
+
+
+def fit_models(entries):
+    """Modelo de cada etapa que tem histórico"""
+    by_stage = {}
+    for entry in entries:
+        by_stage.setdefault(entry['stage'], []).append(entry)
+    return {stage: StageModel(stage, by_stage[stage]) for stage in STAGES
+            if any(e.get('success') for e in by_stage.get(stage, []))}
+
+
+def parse_workers(text):
+    """'video=4,upload=2' -> {'video': 4, 'upload': 2} (aceita nomes da fila de jobs)"""
+    workers = {}
+    for item in filter(None, (part.strip() for part in (text or '').split(','))):
+        name, _, count = item.partition('=')
+        stage = STAGE_ALIASES.get(name.strip(), name.strip())
+        if stage not in STAGES or not count.strip().isdigit() or int(count) < 1:
+            raise ValueError(f"Worker inválido: {item} (use etapa=N com etapa em {', '.join(STAGES)})")
+        workers[stage] = int(count)
+    return workers
+
+
+class BatchEstimator:
+    """Prevê tempo total, gargalo e custo de um lote"""
+
+    def __init__(self, models, rates=None, limits=None,
+                 daily_quota=DEFAULT_DAILY_QUOTA, insert_cost=DEFAULT_INSERT_COST):
+        """
+        Args:
+            models: {etapa: StageModel} (fit_models)
+            rates: Preços (padrão: load_rates())
+            limits: Limites dos provedores (padrão: rate_limiter.load_limits())
+        """
+        self.models = models
+        self.rates = rates or load_rates()
+        self.limits = limits or load_limits()
+        self.daily_quota = daily_quota
+        self.insert_cost = insert_cost
+
+    def video_sizes(self, video_seconds=None):
+        """
+        Tamanho de cada etapa para um vídeo de video_seconds de mídia
+
+        Caracteres e bytes crescem na proporção da duração observada.
+        """
+        sizes = {stage: model.mean_size for stage, model in self.models.items()}
+        video = self.models.get('video')
+        if video_seconds is None or not video or not video.mean_size:
+            return sizes
+        scale = video_seconds / video.mean_size
+        for stage in ('narracao', 'upload'):
+            if stage in sizes:
+                sizes[stage] *= scale
+        sizes['video'] = video_seconds
+        return sizes
+
+    def plan(self, videos, workers=None, sequential=False, video_seconds=None,
+             stages=None, quota=True, shared_workers=None):
+        """
+        Previsão para um lote
+
+        Args:
+            videos: Número de vídeos
+            workers: {etapa: workers} (padrão: 1 por etapa, ou shared_workers)
+            sequential: Vídeos um a um, sem pipeline entre etapas
+            video_seconds: Duração de cada vídeo (padrão: média do histórico)
+            stages: Etapas do lote (padrão: todas com histórico)
+            quota: Considera a quota diária do YouTube no upload
+            shared_workers: Workers que atendem todas as etapas; cada etapa
+                pode usar todos, mas a soma das etapas divide o mesmo total
+
+        Returns:
+            Relatório (dicionário)
+        """
+        workers = workers or {}
+        stages = [s for s in (stages or STAGES) if s in self.models]
+        missing = [s for s in STAGES if s not in self.models]
+        sizes = self.video_sizes(video_seconds)
+
+        rows = []
+        for stage in stages:
+            model = self.models[stage]
+            seconds = model.seconds(sizes[stage])
+            parallel = 1 if sequential else workers.get(stage, shared_workers or 1)
+            limit = self.limits.get(STAGE_PROVIDER.get(stage), {})
+            if limit.get('concurrency'):
+                parallel = min(parallel, limit['concurrency'])
+            per_hour = parallel * 3600 / seconds if seconds else math.inf
+            if stage == 'narracao' and limit.get('units_rate') and sizes[stage]:
+                per_hour = min(per_hour, limit['units_rate'] * 3600 / sizes[stage])
+            rows.append({
+                'stage': stage,
+                'samples': model.samples,
+                'failure_rate': round(model.failure_rate, 3),
+                'seconds_per_video': round(seconds, 2),
+                'parallel': parallel,
+                'videos_per_hour': round(per_hour, 1) if per_hour != math.inf else None,
+            })
+
+        if not rows:
+            raise ValueError("Sem histórico de nenhuma etapa em logs/metrics.jsonl")
+
+        if sequential:
+            total = videos * sum(r['seconds_per_video'] for r in rows)
+            bottleneck = max(rows, key=lambda r: r['seconds_per_video'])['stage']
+        else:
+            # Primeiro vídeo atravessa todas as etapas; os demais saem no
+            # ritmo da etapa mais lenta
+            slowest = min(rows, key=lambda r: r['videos_per_hour'] or math.inf)
+            total = sum(r['seconds_per_video'] for r in rows)
+            if slowest['videos_per_hour']:
+                total += (videos - 1) * 3600 / slowest['videos_per_hour']
+            bottleneck = slowest['stage']
+            if shared_workers:
+                # Cada worker faz uma etapa por vez: o trabalho de todas as
+                # etapas divide o mesmo grupo
+                shared_total = videos * sum(r['seconds_per_video'] for r in rows) / shared_workers
+                if shared_total > total:
+                    total = shared_total
+                    bottleneck = 'workers_compartilhados'
+
+        quota_days = None
+        if quota and 'upload' in stages:
+            uploads_per_day = max(1, self.daily_quota // self.insert_cost)
+            quota_days = math.ceil(videos / uploads_per_day)
+            if (quota_days - 1) * 86400 > total:
+                total = (quota_days - 1) * 86400 + self.models['upload'].seconds(sizes['upload'])
+                bottleneck = 'quota_youtube'
+
+        cost = self.cost(videos, stages, sizes)
+        return {
+            'videos': videos,
+            'mode': 'sequencial' if sequential else 'fila',
+            'shared_workers': None if sequential else shared_workers,
+            'video_seconds': round(sizes.get('video', 0), 1),
+            'stages': rows,
+            'missing_stages': missing,
+            'bottleneck': bottleneck,
+            'total_seconds': round(total, 1),
+            'youtube_quota_days': quota_days,
+            'youtube_quota_units': videos * self.insert_cost if 'upload' in stages else 0,
+            'cost': cost,
+        }
+
+    def cost(self, videos, stages, sizes):
+        """Uso e custo do lote por provedor"""
+        rates = self.rates
+        cost = {}
+
+        content = self.models.get('conteudo')
+        if content and 'conteudo' in stages:
+            prompt = content.usage['prompt_tokens'] * videos
+            cached = min(content.usage['cached_prompt_tokens'] * videos, prompt)
+            completion = content.usage['completion_tokens'] * videos
+            cost['openrouter'] = {
+                'prompt_tokens': round(prompt),
+                'cached_prompt_tokens': round(cached),
+                'completion_tokens': round(completion),
+                'usd': round(((prompt - cached) * rates['openrouter_input_per_million']
+                              + cached * rates['openrouter_cached_input_per_million']
+                              + completion * rates['openrouter_output_per_million']) / 1e6, 4)
+            }
+
+        # No modo streaming a narração acontece dentro da etapa de conteúdo
+        characters = sum(self.models[s].usage['characters'] for s in ('conteudo', 'narracao')
+                         if s in self.models and s in stages)
+        if 'narracao' in stages and 'narracao' in sizes and self.models['narracao'].mean_size:
+            characters *= sizes['narracao'] / self.models['narracao'].mean_size
+        if characters:
+            characters *= videos
+            cost['elevenlabs'] = {
+                'characters': round(characters),
+                'usd': round(characters / 1000 * rates['elevenlabs_per_1000_characters'], 4)
+            }
+
+        if 'video' in stages:
+            cpu_seconds = self.models['video'].cpu_seconds(sizes['video']) * videos
+            cost['render'] = {
+                'cpu_minutes': round(cpu_seconds / 60, 1),
+                'usd': round(cpu_seconds / 3600 * rates['render_per_cpu_hour'], 4)
+            }
+
+        cost['total_usd'] = round(sum(c['usd'] for c in cost.values()), 4)
+        return cost
+
+
+def split_batches(entries, gap=BATCH_GAP_SECONDS):
+    """Agrupa os registros em lotes separados por intervalos sem atividade"""
+    batches = []
+    end = None
+    for entry in entries:
+        if end is None or entry['start'] - end > gap:
+            batches.append([])
+            end = entry['end']
+        batches[-1].append(entry)
+        end = max(end, entry['end'])
+    return batches
+
+
+def check(entries, rates=None, limits=None, min_videos=2):
+    """
+    Compara a previsão com cada lote já executado
+
+    O modelo de cada lote é ajustado com o histórico sem ele; workers por
+    etapa vêm dos worker_id distintos (sem worker_id = modo sequencial).
+    Se algum worker_id atendeu mais de uma etapa, os workers do lote são
+    tratados como compartilhados.
+
+    Returns:
+        Lista com previsto e real por lote
+    """
+    results = []
+    batches = split_batches(entries)
+    for index, batch in enumerate(batches):
+        done = {}
+        for entry in batch:
+            if entry.get('success'):
+                done[entry['stage']] = done.get(entry['stage'], 0) + 1
+        videos = max(done.values(), default=0)
+        if videos < min_videos:
+            continue
+
+        others = [e for i, b in enumerate(batches) if i != index for e in b]
+        models = fit_models(others)
+        stages = [s for s in done if s in models]
+        if not stages:
+            continue
+
+        workers = {}
+        for stage in stages:
+            ids = {e.get('worker_id') for e in batch if e['stage'] == stage and e.get('worker_id')}
+            if ids:
+                workers[stage] = len(ids)
+        sequential = not workers
+        stages_by_worker = {}
+        for entry in batch:
+            if entry.get('worker_id') and entry['stage'] in stages:
+                stages_by_worker.setdefault(entry['worker_id'], set()).add(entry['stage'])
+        shared = any(len(served) > 1 for served in stages_by_worker.values())
+        shared_workers = len(stages_by_worker) if shared else None
+        media = [e['media_seconds'] for e in batch if e.get('media_seconds')]
+
+        estimator = BatchEstimator(models, rates=rates, limits=limits)
+        plan = estimator.plan(videos, workers=workers, sequential=sequential,
+                              video_seconds=mean(media) if media else None,
+                              stages=stages, quota=False, shared_workers=shared_workers)
+
+        actual_seconds = max(e['end'] for e in batch) - min(e['start'] for e in batch)
+        actual_cpu = sum(e.get('cpu_seconds', 0) for e in batch if e['stage'] == 'video')
+        results.append({
+            'started_at': datetime.fromtimestamp(batch[0]['start']).isoformat(timespec='seconds'),
+            'videos': videos,
+            'mode': plan['mode'],
+            'workers': workers,
+            'shared_workers': shared_workers,
+            'predicted_seconds': plan['total_seconds'],
+            'actual_seconds': round(actual_seconds, 1),
+            'error': round(plan['total_seconds'] / actual_seconds - 1, 3) if actual_seconds else None,
+            'predicted_tokens': plan['cost'].get('openrouter', {}).get('prompt_tokens'),
+            'actual_tokens': sum(e.get('prompt_tokens', 0) for e in batch),
+            'predicted_cpu_minutes': plan['cost'].get('render', {}).get('cpu_minutes'),
+            'actual_cpu_minutes': round(actual_cpu / 60, 1),
+        })
+    return results
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if days:
+        return f"{days}d{hours:02d}h{minutes:02d}m"
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def print_plan(report):
+    shared = (f" ({report['shared_workers']} workers compartilhados)"
+              if report.get('shared_workers') else "")
+    print(f"\n📦 {report['videos']} vídeo(s), modo {report['mode']}{shared}, "
+          f"~{report['video_seconds']:.0f}s de mídia por vídeo")
+    print()
+    print(f"{'etapa':<10} {'amostras':>8} {'falhas':>7} {'s/vídeo':>9} {'paralelo':>9} {'vídeos/h':>9}")
+    print("-" * 57)
+    for r in report['stages']:
+        mark = ' ◀' if r['stage'] == report['bottleneck'] else ''
+        per_hour = f"{r['videos_per_hour']:.1f}" if r['videos_per_hour'] is not None else '-'
+        print(f"{r['stage']:<10} {r['samples']:>8} {r['failure_rate']:>7.1%} "
+              f"{r['seconds_per_video']:>9.1f} {r['parallel']:>9} {per_hour:>9}{mark}")
+    if report['missing_stages']:
+        print(f"⚠️ Sem histórico (fora da estimativa): {', '.join(report['missing_stages'])}")
+
+    print()
+    print(f"⏱️ Tempo total: {format_duration(report['total_seconds'])}")
+    print(f"🐢 Gargalo: {report['bottleneck']}")
+    if report['youtube_quota_days']:
+        print(f"📺 Quota do YouTube: {report['youtube_quota_units']} unidades "
+              f"({report['youtube_quota_days']} dia(s) de quota)")
+
+    cost = report['cost']
+    print()
+    if 'openrouter' in cost:
+        c = cost['openrouter']
+        print(f"💬 OpenRouter: {c['prompt_tokens']} tokens de prompt "
+              f"({c['cached_prompt_tokens']} do cache), {c['completion_tokens']} de resposta "
+              f"→ US$ {c['usd']:.2f}")
+    if 'elevenlabs' in cost:
+        c = cost['elevenlabs']
+        print(f"🎙️ ElevenLabs: {c['characters']} caracteres → US$ {c['usd']:.2f}")
+    if 'render' in cost:
+        c = cost['render']
+        print(f"🎬 Render: {c['cpu_minutes']} CPU-minutos → US$ {c['usd']:.2f}")
+    print(f"💰 Total: US$ {cost['total_usd']:.2f}")
+
+
+def print_check(results):
+    if not results:
+        print("⚠️ Nenhum lote com vídeos suficientes no histórico para comparar")
+        return
+    print()
+    print(f"{'início':<20} {'vídeos':>6} {'modo':<11} {'previsto':>11} {'real':>11} {'erro':>7}")
+    print("-" * 71)
+    for r in results:
+        error = f"{r['error']:+.0%}" if r['error'] is not None else '-'
+        print(f"{r['started_at']:<20} {r['videos']:>6} {r['mode']:<11} "
+              f"{format_duration(r['predicted_seconds']):>11} "
+              f"{format_duration(r['actual_seconds']):>11} {error:>7}")
+    errors = [abs(r['error']) for r in results if r['error'] is not None]
+    if errors:
+        print(f"\nErro médio absoluto do tempo: {mean(errors):.0%} em {len(errors)} lote(s)")
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Estimativa de tempo e custo de lotes')
+    parser.add_argument('--metrics-file', help='Histórico (padrão: logs/metrics.jsonl)')
+    parser.add_argument('--days', type=int, help='Usa só os últimos N dias do histórico')
+    parser.add_argument('--json', action='store_true', help='Saída em JSON')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    plan_parser = subparsers.add_parser('plan', help='Prevê tempo e custo de um lote')
+    plan_parser.add_argument('--videos', type=int, required=True, help='Número de vídeos')
+    plan_parser.add_argument('--workers', default='',
+                             help='Workers por etapa, ex: conteudo=2,video=4 (padrão: 1)')
+    plan_parser.add_argument('--shared-workers', type=int,
+                             help='Workers que atendem todas as etapas (padrão do job_queue.py worker)')
+    plan_parser.add_argument('--sequential', action='store_true',
+                             help='Sem fila de jobs (automation_pipeline.py / scheduler.py)')
+    plan_parser.add_argument('--video-seconds', type=float,
+                             help='Duração de cada vídeo (padrão: média do histórico)')
+    plan_parser.add_argument('--no-upload', action='store_true', help='Lote sem upload')
+
+    subparsers.add_parser('check', help='Compara a previsão com os lotes já executados')
+
+    args = parser.parse_args()
+
+    entries = load_history(args.metrics_file, days=args.days)
+    if not entries:
+        print("❌ Sem histórico em logs/metrics.jsonl (execute alguns vídeos primeiro)")
+        sys.exit(1)
+
+    if args.command == 'plan':
+        try:
+            workers = parse_workers(args.workers)
+        except ValueError as e:
+            parser.error(str(e))
+        stages = [s for s in STAGES if not (args.no_upload and s == 'upload')]
+        report = BatchEstimator(fit_models(entries)).plan(
+            args.videos, workers=workers, sequential=args.sequential,
+            video_seconds=args.video_seconds, stages=stages,
+            shared_workers=args.shared_workers)
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print_plan(report)
+    else:
+        results = check(entries)
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+        else:
+            print_check(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Banco de Casos Policiais
+Guarda os casos em SQLite (data/casos.db) para que catálogos grandes possam
+ser importados aos poucos, sem reescrever o arquivo inteiro nem carregar
+tudo na memória. Na primeira abertura, importa data/casos_policiais.json
+(mantendo os ids) e data/casos_usados.json.
+
+Importação em massa:
+    python3 scripts/case_store.py import casos.csv
+    python3 scripts/case_store.py import casos.jsonl --batch-size 5000
+    python3 scripts/case_store.py --channel crimes_br import casos.csv
+"""
+
+import os
+import csv
+import sys
+import json
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+from dedup_index import normalize
+from pipeline_db import ThreadConnections
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+DEFAULT_CASES_DB = DATA_DIR / "casos.db"
+
+REQUIRED_FIELDS = ('titulo', 'resumo', 'data', 'local', 'categoria')
+
+# Linhas por transação na importação
+DEFAULT_BATCH_SIZE = 1000
+
+# Quantos erros de validação mostrar por importação
+MAX_REPORTED_ERRORS = 10
+
+
+class InvalidCaseError(ValueError):
+    """Registro de caso com campos obrigatórios ausentes"""
+
+
+def validate_case(record):
+    """
+    Normaliza e valida um registro de caso
+
+    Returns:
+        Dicionário só com os campos obrigatórios, sem espaços extras
+
+    Raises:
+        InvalidCaseError: Se faltar algum campo obrigatório
+    """
+    if not isinstance(record, dict):
+        raise InvalidCaseError("registro não é um objeto")
+
+    case = {}
+    missing = []
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        value = str(value).strip() if value is not None else ''
+        if not value:
+            missing.append(field)
+        case[field] = value
+
+    if missing:
+        raise InvalidCaseError(f"campos ausentes: {', '.join(missing)}")
+    if not normalize(case['titulo']):
+        raise InvalidCaseError("título sem letras ou números")
+    return case
+
+
+def read_records(source):
+    """
+    Lê registros de um arquivo CSV, JSONL ou JSON, um por vez
+
+    CSV e JSONL são lidos em streaming (memória constante). Arquivos .json
+    (lista) são carregados inteiros, pois o formato não permite streaming.
+
+    Yields:
+        (número da linha/posição, registro ou exceção de parse)
+    """
+    source = Path(source)
+    suffix = source.suffix.lower()
+
+    if suffix == '.csv':
+        with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+            # Linha 1 é o cabeçalho
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+    elif suffix in ('.jsonl', '.ndjson'):
+        with open(source, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, InvalidCaseError(f"JSON inválido: {e}")
+    elif suffix == '.json':
+        with open(source, 'r', encoding='utf-8') as f:
+            for position, record in enumerate(json.load(f), start=1):
+                yield position, record
+    else:
+        raise ValueError(f"Formato não suportado: {source.suffix} (use .csv, .jsonl ou .json)")
+
+
+class CaseStore:
+    """Casos policiais em SQLite, com deduplicação por título normalizado"""
+
+    def __init__(self, db_file=None, seed_file=None, used_file=None):
+        """
+        Args:
+            db_file: Banco SQLite (padrão: CASES_DB ou data/casos.db)
+            seed_file: JSON legado importado na criação do banco
+            used_file: Lista legada de ids já usados
+        """
+        self.db_file = Path(db_file or os.getenv("CASES_DB") or DEFAULT_CASES_DB)
+        self.seed_file = Path(seed_file or self.db_file.parent / "casos_policiais.json")
+        self.used_file = Path(used_file or self.db_file.parent / "casos_usados.json")
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._connect = ThreadConnections(self.db_file, row_factory=sqlite3.Row)
+
+        is_new = not self.db_file.exists()
+        self._create_schema()
+        if is_new:
+            self._migrate_legacy()
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cases (
+                id INTEGER PRIMARY KEY,
+                titulo_norm TEXT NOT NULL UNIQUE,
+                titulo TEXT NOT NULL,
+                resumo TEXT NOT NULL,
+                data TEXT NOT NULL,
+                local TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                used INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cases_used ON cases (used);
+        """)
+        conn.commit()
+
+    def _migrate_legacy(self):
+        """
+        Importa casos_policiais.json e casos_usados.json mantendo os ids
+
+        Registros inválidos são pulados e avisados, como na importação.
+        """
+        if not self.seed_file.exists():
+            return
+
+        with open(self.seed_file, 'r', encoding='utf-8') as f:
+            cases = json.load(f)
+
+        used = set()
+        if self.used_file.exists():
+            with open(self.used_file, 'r', encoding='utf-8') as f:
+                used = set(json.load(f))
+
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        invalid = 0
+        with conn:
+            for position, record in enumerate(cases, start=1):
+                try:
+                    case = validate_case(record)
+                    if not isinstance(record.get('id'), int):
+                        raise InvalidCaseError("id ausente ou não inteiro")
+                except InvalidCaseError as e:
+                    invalid += 1
+                    if invalid <= MAX_REPORTED_ERRORS:
+                        print(f"⚠️ Caso {position} de {self.seed_file.name} ignorado: {e}")
+                    continue
+                conn.execute(
+                    "INSERT OR IGNORE INTO cases (id, titulo_norm, titulo, resumo, data, local, "
+                    "categoria, used, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (record['id'], normalize(case['titulo']), case['titulo'], case['resumo'],
+                     case['data'], case['local'], case['categoria'],
+                     1 if record['id'] in used else 0, now)
+                )
+
+        if invalid:
+            print(f"⚠️ {invalid} caso(s) inválido(s) em {self.seed_file.name} não importado(s)")
+
+    def upsert_many(self, cases):
+        """
+        Insere ou atualiza casos já validados (uma transação)
+
+        Casos com o mesmo título normalizado mantêm o id e o estado de uso;
+        só os campos de texto são atualizados.
+
+        Returns:
+            (inseridos, atualizados, inalterados)
+        """
+        inserted = updated = unchanged = 0
+        now = datetime.now().isoformat()
+        conn = self._connect()
+
+        with conn:
+            for case in cases:
+                titulo_norm = normalize(case['titulo'])
+                values = tuple(case[field] for field in REQUIRED_FIELDS)
+                row = conn.execute(
+                    "SELECT id, titulo, resumo, data, local, categoria FROM cases "
+                    "WHERE titulo_norm = ?", (titulo_norm,)
+                ).fetchone()
+
+                if row is None:
+                    conn.execute(
+                        "INSERT INTO cases (titulo_norm, titulo, resumo, data, local, "
+                        "categoria, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (titulo_norm,) + values + (now,)
+                    )
+                    inserted += 1
+                elif tuple(row)[1:] != values:
+                    conn.execute(
+                        "UPDATE cases SET titulo = ?, resumo = ?, data = ?, local = ?, "
+                        "categoria = ?, updated_at = ? WHERE id = ?",
+                        values + (now, row['id'])
+                    )
+                    updated += 1
+                else:
+                    unchanged += 1
+
+        return inserted, updated, unchanged
+
+    def import_file(self, source, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Importa um arquivo CSV/JSONL/JSON em lotes
+
+        Registros inválidos são pulados e contados; a memória usada
+        depende só do tamanho do lote.
+
+        Returns:
+            Dicionário com contagens de inseridos, atualizados, inalterados e inválidos
+        """
+        totals = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'invalid': 0}
+        batch = []
+
+        def flush():
+            inserted, updated, unchanged = self.upsert_many(batch)
+            totals['inserted'] += inserted
+            totals['updated'] += updated
+            totals['unchanged'] += unchanged
+            batch.clear()
+
+        for line_number, record in read_records(source):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                batch.append(validate_case(record))
+            except InvalidCaseError as e:
+                totals['invalid'] += 1
+                if totals['invalid'] <= MAX_REPORTED_ERRORS:
+                    print(f"⚠️ Linha {line_number} ignorada: {e}")
+                continue
+
+            if len(batch) >= batch_size:
+                flush()
+                processed = sum(totals.values())
+                print(f"   {processed} registros processados...")
+
+        if batch:
+            flush()
+
+        return totals
+
+    def select_unused(self):
+        """
+        Sorteia um caso ainda não usado e o marca como usado
+
+        Quando todos já foram usados, reinicia o ciclo.
+
+        Returns:
+            Dicionário do caso ou None se o banco estiver vazio
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = self._random_unused(conn)
+            if row is None:
+                conn.execute("UPDATE cases SET used = 0")
+                row = self._random_unused(conn)
+            if row is None:
+                return None
+            conn.execute("UPDATE cases SET used = 1 WHERE id = ?", (row['id'],))
+
+        return {
+            'id': row['id'],
+            **{field: row[field] for field in REQUIRED_FIELDS}
+        }
+
+    def _random_unused(self, conn):
+        """Sorteio por posição: evita ORDER BY RANDOM() em tabelas grandes"""
+        count = conn.execute("SELECT COUNT(*) FROM cases WHERE used = 0").fetchone()[0]
+        if not count:
+            return None
+        offset = int.from_bytes(os.urandom(4), 'big') % count
+        return conn.execute(
+            "SELECT * FROM cases WHERE used = 0 LIMIT 1 OFFSET ?", (offset,)
+        ).fetchone()
+
+    def stats(self):
+        conn = self._connect()
+        total, used = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(used), 0) FROM cases"
+        ).fetchone()
+        categories = dict(conn.execute(
+            "SELECT categoria, COUNT(*) FROM cases GROUP BY categoria ORDER BY 2 DESC"
+        ).fetchall())
+        return {'total': total, 'used': used, 'categories': categories}
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Banco de casos policiais')
+    parser.add_argument('--channel', help='Canal dono dos casos (padrão: default)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Importa casos de CSV, JSONL ou JSON')
+    import_parser.add_argument('files', nargs='+', help='Arquivos de casos')
+    import_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                               help='Registros por transação')
+
+    subparsers.add_parser('stats', help='Mostra totais do banco')
+
+    args = parser.parse_args()
+
+    from channels import get_channel
+    data_dir = get_channel(args.channel).data_dir
+    store = CaseStore(db_file=data_dir / "casos.db" if data_dir else None)
+
+    if args.command == 'stats':
+        print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+        return
+
+    failed = False
+    for source in args.files:
+        print(f"📥 Importando {source}...")
+        try:
+            totals = store.import_file(source, batch_size=args.batch_size)
+        except (OSError, ValueError) as e:
+            print(f"❌ Erro ao importar {source}: {e}")
+            failed = True
+            continue
+        print(f"✅ {totals['inserted']} novo(s), {totals['updated']} atualizado(s), "
+              f"{totals['unchanged']} inalterado(s), {totals['invalid']} inválido(s)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
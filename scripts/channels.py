@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Perfis de Canal
+Cada canal tem seus próprios casos, voz, prompts, credenciais do YouTube e
+diretório de saída, e todos compartilham os mesmos workers. O canal
+"default" usa os diretórios globais (data/, credentials/, output/), então
+instalações com um só canal continuam funcionando sem configuração.
+
+Configuração em data/channels.json:
+    {
+      "crimes_br": {
+        "weight": 2,              # parcela dos workers na fila (justa, ponderada)
+        "max_concurrent": 2,      # jobs simultâneos do canal
+        "voice_id": "EXAVITQu4vr4xnSDxMaL",
+        "prompts": {
+          "system": "Você é um roteirista de ...",
+          "style": "Tom jornalístico, sem sensacionalismo"
+        }
+      }
+    }
+
+Diretórios de um canal "x": data/channels/x/ (casos.db, pool, índices),
+credentials/x/ e output/x/.
+"""
+
+import json
+from pathlib import Path
+
+from pipeline_config import read_config
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+OUTPUT_DIR = BASE_DIR / "output"
+CREDENTIALS_DIR = BASE_DIR / "credentials"
+CHANNELS_CONFIG = DATA_DIR / "channels.json"
+
+DEFAULT_CHANNEL = "default"
+
+# Voz usada quando o canal não define uma (Bella, "feminina_suave")
+DEFAULT_VOICE_ID = "EXAVITQu4vr4xnSDxMaL"
+
+
+class Channel:
+    """Perfil de um canal"""
+
+    def __init__(self, name, weight=1.0, max_concurrent=None, voice_id=None, prompts=None):
+        """
+        Args:
+            name: Nome do canal (também o nome dos diretórios)
+            weight: Peso no escalonamento justo da fila de jobs
+            max_concurrent: Máximo de jobs simultâneos (None = sem limite)
+            voice_id: Voz da ElevenLabs
+            prompts: {'system': ..., 'style': ...} para o roteiro
+        """
+        self.name = name
+        self.weight = float(weight)
+        self.max_concurrent = max_concurrent
+        self.voice_id = voice_id or DEFAULT_VOICE_ID
+        self.prompts = dict(prompts or {})
+
+    @property
+    def is_default(self):
+        return self.name == DEFAULT_CHANNEL
+
+    @property
+    def data_dir(self):
+        """Estado do canal; None no canal padrão (cada módulo usa seu padrão em data/)"""
+        return None if self.is_default else DATA_DIR / "channels" / self.name
+
+    @property
+    def credentials_dir(self):
+        return CREDENTIALS_DIR if self.is_default else CREDENTIALS_DIR / self.name
+
+    def output_dir(self, base_dir):
+        """Namespace do canal dentro do diretório de saída"""
+        return Path(base_dir) if self.is_default else Path(base_dir) / self.name
+
+    def to_dict(self):
+        return {
+            'weight': self.weight,
+            'max_concurrent': self.max_concurrent,
+            'voice_id': self.voice_id,
+            'prompts': self.prompts
+        }
+
+
+def load_channels(config_file=None):
+    """
+    Canais configurados, sempre incluindo o padrão
+
+    Returns:
+        Dicionário nome -> Channel
+    """
+    config = read_config(CHANNELS_CONFIG, "CHANNELS_CONFIG", config_file)
+
+    channels = {DEFAULT_CHANNEL: Channel(DEFAULT_CHANNEL)}
+    for name, values in config.items():
+        channels[name] = Channel(name, **values)
+    return channels
+
+
+def get_channel(name=None):
+    """
+    Perfil do canal pelo nome (None = canal padrão)
+
+    Raises:
+        ValueError: Se o canal não estiver configurado
+    """
+    channels = load_channels()
+    name = name or DEFAULT_CHANNEL
+    if name not in channels:
+        raise ValueError(f"Canal não configurado: {name} (veja data/channels.json)")
+    return channels[name]
+
+
+def channel_of(package_file):
+    """Canal de um pacote de conteúdo (pacotes antigos são do canal padrão)"""
+    with open(package_file, 'r', encoding='utf-8') as f:
+        return get_channel(json.load(f).get('channel'))
+
+
+if __name__ == "__main__":
+    print(json.dumps({name: channel.to_dict() for name, channel in load_channels().items()},
+                     ensure_ascii=False, indent=2))
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Compilações Longas
+Junta shorts já renderizados (final_*.mp4) num vídeo longo com capítulos,
+sem renderizar de novo: os clipes são concatenados com o demuxer concat do
+FFmpeg em cópia de stream. Só os clipes cujos parâmetros de codec diferem
+da maioria são recodificados antes da junção.
+
+Uso:
+    python3 scripts/compilation_builder.py                 # ~10 min dos últimos 7 dias
+    python3 scripts/compilation_builder.py --minutes 15 --days 14 --channel crimes_br
+    python3 scripts/compilation_builder.py --dry-run       # só mostra a seleção
+
+O resultado (compilation_<timestamp>.mp4 e .json) fica no diretório de saída
+do canal. O JSON tem título e descrição com os capítulos no formato do
+YouTube, e pode ser enviado com youtube_uploader.py.
+"""
+
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime, timedelta
+from collections import Counter
+
+import metrics
+from channels import get_channel
+
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "output"
+
+DEFAULT_MINUTES = 10
+DEFAULT_DAYS = 7
+
+# Encoders usados para normalizar clipes divergentes
+ENCODERS = {'h264': 'libx264', 'hevc': 'libx265', 'aac': 'aac', 'mp3': 'libmp3lame'}
+
+# Campos que precisam coincidir para a cópia de stream funcionar
+VIDEO_FIELDS = ('codec_name', 'profile', 'width', 'height', 'pix_fmt', 'r_frame_rate', 'time_base')
+AUDIO_FIELDS = ('codec_name', 'sample_rate', 'channels')
+
+
+def probe(video_file):
+    """
+    Parâmetros de codec e duração de um vídeo (ffprobe)
+
+    Returns:
+        {'duration': segundos, 'video': {...}, 'audio': {...} ou None}
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries',
+        'format=duration:stream=codec_type,' + ','.join(sorted(set(VIDEO_FIELDS + AUDIO_FIELDS))),
+        '-of', 'json',
+        str(video_file)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    data = json.loads(result.stdout)
+
+    streams = {}
+    for stream in data.get('streams', []):
+        streams.setdefault(stream.get('codec_type'), stream)
+    video = streams.get('video')
+    if not video:
+        raise Exception(f"Sem stream de vídeo: {video_file}")
+
+    audio = streams.get('audio')
+    return {
+        'duration': float(data['format']['duration']),
+        'video': {field: video.get(field) for field in VIDEO_FIELDS},
+        'audio': {field: audio.get(field) for field in AUDIO_FIELDS} if audio else None
+    }
+
+
+def signature(info):
+    """Chave que identifica clipes concatenáveis entre si sem recodificar"""
+    video = tuple(info['video'][field] for field in VIDEO_FIELDS)
+    audio = tuple(info['audio'][field] for field in AUDIO_FIELDS) if info['audio'] else None
+    return video, audio
+
+
+def format_timestamp(seconds):
+    """00:00 / 1:02:03, como o YouTube reconhece capítulos na descrição"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def _escape_metadata(value):
+    """Escapa texto para o formato FFMETADATA"""
+    for char in ('\\', '=', ';', '#', '\n'):
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+class CompilationBuilder:
+    """Monta compilações longas a partir do histórico de pacotes"""
+
+    def __init__(self, channel=None, output_dir=None):
+        """
+        Args:
+            channel: Perfil do canal (padrão: canal "default")
+            output_dir: Diretório de saída base (padrão: output/)
+        """
+        if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
+            raise Exception("FFmpeg não está instalado! Instale com: sudo apt install ffmpeg")
+
+        self.channel = channel or get_channel()
+        self.output_dir = self.channel.output_dir(output_dir or OUTPUT_DIR)
+
+    def used_packages(self):
+        """Pacotes que já entraram em alguma compilação"""
+        used = set()
+        for manifest_file in self.output_dir.glob("compilation_*.json"):
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    used.update(clip['package_id'] for clip in json.load(f).get('clips', []))
+            except (OSError, json.JSONDecodeError, KeyError):
+                continue
+        return used
+
+    def select_clips(self, minutes=DEFAULT_MINUTES, days=DEFAULT_DAYS, allow_repeats=False):
+        """
+        Escolhe os clipes da compilação
+
+        Pacotes com vídeo final dentro da janela, publicados primeiro e do
+        mais recente ao mais antigo, até completar a duração pedida. A
+        compilação mantém a ordem cronológica dos clipes.
+
+        Returns:
+            Lista de clipes {'package_id', 'caso_titulo', 'video_file', 'info'}
+        """
+        cutoff = datetime.now() - timedelta(days=days)
+        used = set() if allow_repeats else self.used_packages()
+
+        candidates = []
+        archived = []
+        for package_file in self.output_dir.glob("video_*.json"):
+            try:
+                with open(package_file, 'r', encoding='utf-8') as f:
+                    package = json.load(f)
+                created_at = datetime.strptime(package['timestamp'][:15], "%Y%m%d_%H%M%S")
+            except (OSError, json.JSONDecodeError, KeyError, ValueError):
+                continue
+
+            if created_at < cutoff or package_file.stem in used:
+                continue
+            # Stub de pacote arquivado: o vídeo está no zip do arquivo
+            if package.get('archive_file'):
+                archived.append(package_file.stem)
+                continue
+            video_file = package.get('video_file')
+            if not video_file or not Path(video_file).exists():
+                continue
+            candidates.append((bool(package.get('youtube_url')), created_at, package_file, package))
+
+        if archived:
+            print(f"ℹ️ {len(archived)} pacote(s) da janela estão arquivados; para incluí-los, "
+                  f"restaure com scripts/output_retention.py restore <pacote>")
+
+        candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+
+        clips = []
+        total = 0.0
+        for _, created_at, package_file, package in candidates:
+            if total >= minutes * 60:
+                break
+            try:
+                info = probe(package['video_file'])
+            except Exception as e:
+                print(f"⚠️ Vídeo ignorado ({package_file.name}): {e}")
+                continue
+            clips.append({
+                'package_id': package_file.stem,
+                'caso_titulo': package['caso_titulo'],
+                'created_at': created_at,
+                'video_file': package['video_file'],
+                'info': info
+            })
+            total += info['duration']
+
+        return sorted(clips, key=lambda c: c['created_at'])
+
+    def normalize(self, clip, reference, work_dir):
+        """
+        Recodifica um clipe com os parâmetros de referência
+
+        Returns:
+            Path do clipe normalizado
+        """
+        video, audio = reference['video'], reference['audio']
+        width, height = video['width'], video['height']
+        timescale = str(video['time_base']).split('/')[-1]
+
+        encoder = ENCODERS.get(video['codec_name'])
+        if not encoder:
+            raise Exception(f"Codec de vídeo sem encoder conhecido: {video['codec_name']}")
+
+        output_file = Path(work_dir) / f"norm_{clip['package_id']}.mp4"
+        cmd = [
+            'ffmpeg', '-i', str(clip['video_file']),
+            '-vf', (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                    f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={video['r_frame_rate']}"),
+            '-c:v', encoder,
+            '-pix_fmt', video['pix_fmt'],
+            '-video_track_timescale', timescale,
+        ]
+        if video.get('profile') and encoder == 'libx264':
+            cmd += ['-profile:v', video['profile'].lower().replace('constrained ', '')]
+        if audio:
+            cmd += ['-c:a', ENCODERS.get(audio['codec_name'], 'aac'),
+                    '-ar', str(audio['sample_rate']), '-ac', str(audio['channels'])]
+            if not clip['info']['audio']:
+                # Clipe mudo: trilha silenciosa para manter o layout de streams
+                cmd[3:3] = ['-f', 'lavfi', '-i', f"anullsrc=r={audio['sample_rate']}",
+                            '-shortest']
+                cmd += ['-map', '0:v', '-map', '1:a']
+        cmd += ['-y', str(output_file)]
+
+        subprocess.run(cmd, check=True, capture_output=True)
+        return output_file
+
+    def build(self, clips):
+        """
+        Concatena os clipes em cópia de stream, com capítulos
+
+        Returns:
+            Path do JSON da compilação
+        """
+        if not clips:
+            raise Exception("Nenhum clipe disponível para a compilação")
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = self.output_dir / f"compilation_{timestamp}.mp4"
+        manifest_file = self.output_dir / f"compilation_{timestamp}.json"
+
+        # Referência: parâmetros da maioria dos clipes (menos recodificação)
+        signatures = Counter(signature(clip['info']) for clip in clips)
+        reference_signature = signatures.most_common(1)[0][0]
+        reference = next(clip['info'] for clip in clips
+                         if signature(clip['info']) == reference_signature)
+
+        start = time.perf_counter()
+        normalized = 0
+        work_dir = tempfile.mkdtemp(prefix='compilation_', dir=self.output_dir)
+        try:
+            parts = []
+            for clip in clips:
+                if signature(clip['info']) == reference_signature:
+                    parts.append(Path(clip['video_file']).resolve())
+                else:
+                    print(f"   Normalizando {clip['package_id']} (parâmetros diferentes)")
+                    parts.append(self.normalize(clip, reference, work_dir))
+                    normalized += 1
+
+            list_file = Path(work_dir) / "concat.txt"
+            with open(list_file, 'w', encoding='utf-8') as f:
+                for part in parts:
+                    escaped = str(part).replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+
+            chapters = []
+            position = 0.0
+            for clip in clips:
+                end = position + clip['info']['duration']
+                chapters.append({'title': clip['caso_titulo'], 'start': position, 'end': end})
+                position = end
+
+            metadata_file = Path(work_dir) / "chapters.txt"
+            with open(metadata_file, 'w', encoding='utf-8') as f:
+                f.write(";FFMETADATA1\n")
+                for chapter in chapters:
+                    f.write("[CHAPTER]\nTIMEBASE=1/1000\n"
+                            f"START={int(chapter['start'] * 1000)}\n"
+                            f"END={int(chapter['end'] * 1000)}\n"
+                            f"title={_escape_metadata(chapter['title'])}\n")
+
+            cmd = [
+                'ffmpeg',
+                '-f', 'concat', '-safe', '0', '-i', str(list_file),
+                '-i', str(metadata_file),
+                '-map', '0', '-map_metadata', '1', '-map_chapters', '1',
+                '-c', 'copy',
+                '-movflags', '+faststart',
+                '-y',
+                str(output_file)
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        elapsed = time.perf_counter() - start
+        metrics.record(media_seconds=position, encode_seconds=elapsed,
+                       bytes_written=output_file.stat().st_size)
+
+        chapter_lines = "\n".join(f"{format_timestamp(c['start'])} {c['title']}" for c in chapters)
+        manifest = {
+            "timestamp": timestamp,
+            "type": "compilacao",
+            "caso_titulo": f"Compilação: {len(clips)} casos",
+            "channel": self.channel.name,
+            "clips": [
+                {'package_id': clip['package_id'], 'caso_titulo': clip['caso_titulo'],
+                 'start': chapter['start'], 'end': chapter['end']}
+                for clip, chapter in zip(clips, chapters)
+            ],
+            "metadata": {
+                "titulo": f"{len(clips)} casos que chocaram o Brasil",
+                "descricao": f"Capítulos:\n{chapter_lines}",
+                "hashtags": "#TrueCrime #CasosPoliciais #Compilação"
+            },
+            "video_file": str(output_file),
+            "duration": position,
+            "normalized_clips": normalized,
+            "status": "video_compilado"
+        }
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        print(f"✅ Compilação criada em {elapsed:.1f}s: {output_file}")
+        print(f"   {len(clips)} clipes, {format_timestamp(position)} de duração, "
+              f"{normalized} normalizado(s)")
+        return manifest_file
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compilação longa a partir de shorts prontos')
+    parser.add_argument('--minutes', type=float, default=DEFAULT_MINUTES,
+                        help='Duração aproximada da compilação')
+    parser.add_argument('--days', type=float, default=DEFAULT_DAYS,
+                        help='Considera pacotes dos últimos N dias')
+    parser.add_argument('--channel', help='Canal (padrão: default)')
+    parser.add_argument('--allow-repeats', action='store_true',
+                        help='Inclui clipes que já entraram em outras compilações')
+    parser.add_argument('--dry-run', action='store_true', help='Só mostra os clipes escolhidos')
+
+    args = parser.parse_args()
+
+    builder = CompilationBuilder(channel=get_channel(args.channel))
+    clips = builder.select_clips(minutes=args.minutes, days=args.days,
+                                 allow_repeats=args.allow_repeats)
+
+    if not clips:
+        print("⚠️ Nenhum vídeo final disponível na janela escolhida")
+        sys.exit(1)
+
+    position = 0.0
+    print(f"🎞️ {len(clips)} clipe(s) selecionado(s):")
+    for clip in clips:
+        print(f"   {format_timestamp(position)} {clip['caso_titulo']}")
+        position += clip['info']['duration']
+
+    if args.dry_run:
+        return
+
+    try:
+        builder.build(clips)
+    except Exception as e:
+        print(f"❌ Erro ao montar a compilação: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
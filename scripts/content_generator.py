@@ -7,10 +7,20 @@ Data: 03/12/2025
 
 import os
 import json
-import random
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
+
+import metrics
+from pipeline_logging import get_logger, submit_with_context
+from rate_limiter import get_governor
+from model_router import ModelRouter
+from prompt_builder import PromptBuilder
+from case_store import CaseStore
+from channels import get_channel
+from dedup_index import DedupIndex, DuplicateContentError, KIND_SCRIPT, KIND_TITLE
 
 # Configurações
 BASE_DIR = Path(__file__).parent.parent
@@ -18,66 +28,141 @@ DATA_DIR = BASE_DIR / "data"
 OUTPUT_DIR = BASE_DIR / "output"
 LOGS_DIR = BASE_DIR / "logs"
 
+# Novas tentativas quando o roteiro/título sai parecido com um já produzido
+DEDUP_MAX_ATTEMPTS = int(os.getenv("DEDUP_MAX_ATTEMPTS", 2))
+
 class ContentGenerator:
     """Gerador automatizado de roteiros para casos policiais"""
     
-    def __init__(self):
+    def __init__(self, channel=None):
+        """
+        Args:
+            channel: Perfil do canal (padrão: canal "default", diretórios globais)
+        """
+        # Importado aqui para não pesar no carregamento do módulo
+        from openai import OpenAI
+        
         # Configura OpenRouter API
         api_key = os.getenv("OPENROUTER_API_KEY") or os.getenv("OPENAI_API_KEY")
         self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
+            base_url=os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+            api_key=api_key,
+            # Falhas persistentes são tratadas pelo roteador (failover de modelo)
+            max_retries=1
         )
-        self.cases_db = self.load_cases_database()
-        
-    def load_cases_database(self):
-        """Carrega banco de dados de casos policiais"""
-        cases_file = DATA_DIR / "casos_policiais.json"
-        if cases_file.exists():
-            with open(cases_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
-    
+        self.router = ModelRouter(acquire=lambda: get_governor().acquire('openrouter'))
+        self.prompts = PromptBuilder()
+        self._usage_lock = threading.Lock()
+        self.reset_usage()
+        
+        # Casos, índice de duplicatas, pool e pacotes ficam no namespace do canal
+        self.channel = channel or get_channel()
+        data_dir = self.channel.data_dir
+        self.dedup = DedupIndex(db_file=data_dir / "dedup_index.db" if data_dir else None,
+                                output_dir=self.channel.output_dir(OUTPUT_DIR))
+        self.cases = CaseStore(db_file=data_dir / "casos.db" if data_dir
+                               else os.getenv("CASES_DB") or DATA_DIR / "casos.db")
+        self.output_dir = self.channel.output_dir(OUTPUT_DIR)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
     def select_random_case(self):
         """Seleciona um caso aleatório que ainda não foi usado"""
-        used_cases_file = DATA_DIR / "casos_usados.json"
+        case = self.cases.select_unused()
+        if case is None:
+            raise Exception("Nenhum caso cadastrado (importe com scripts/case_store.py import)")
+        return case
+    
+    def chat_completion(self, call_type, prompt, **kwargs):
+        """
+        Chamada ao chat do OpenRouter
         
-        # Carrega casos já usados
-        if used_cases_file.exists():
-            with open(used_cases_file, 'r', encoding='utf-8') as f:
-                used_cases = json.load(f)
-        else:
-            used_cases = []
+        O modelo é escolhido pelo roteador conforme o tipo de chamada
+        ('script', 'visual_prompts', 'metadata'), com failover e hedge.
+        Cada tentativa passa pelo governador de rate limit compartilhado
+        entre workers (a espera não conta na latência do modelo); os tokens
+        da resposta usada são registrados.
         
-        # Filtra casos disponíveis
-        available_cases = [c for c in self.cases_db if c['id'] not in used_cases]
+        Args:
+            prompt: Prompt montado pelo PromptBuilder
+        """
+        def send(model, timeout):
+            return self.client.chat.completions.create(
+                model=model, timeout=timeout, messages=prompt.messages, **kwargs)
         
-        if not available_cases:
-            # Se todos foram usados, reinicia
-            used_cases = []
-            available_cases = self.cases_db
+        response, model = self.router.complete(call_type, send)
+        self.models_used[call_type] = model
+        self.record_usage(response, prompt)
+        return response
+    
+    def record_usage(self, response, prompt):
+        """
+        Registra tokens consumidos na chamada (response.usage)
         
-        # Seleciona aleatoriamente
-        selected = random.choice(available_cases)
+        Vão para as métricas da etapa e, por tipo de chamada, para o pacote
+        (token_usage): estimativa antes do envio, tokens cobrados (e os que
+        o provedor informar em cached_tokens) e campos cortados pelo orçamento.
+        """
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
         
-        # Marca como usado
-        used_cases.append(selected['id'])
-        with open(used_cases_file, 'w', encoding='utf-8') as f:
-            json.dump(used_cases, f, ensure_ascii=False, indent=2)
+        metrics.record(
+            llm_calls=1,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_prompt_tokens=cached_tokens,
+            prompts_trimmed=1 if prompt.trimmed else 0
+        )
         
-        return selected
+        # Retentativas (duplicatas) somam na mesma entrada
+        with self._usage_lock:
+            entry = self.token_usage.setdefault(prompt.call_type, {
+                'calls': 0, 'estimated_prompt_tokens': 0, 'prompt_tokens': 0,
+                'cached_prompt_tokens': 0, 'completion_tokens': 0,
+                'prefix_tokens': prompt.prefix_tokens, 'budget': prompt.budget, 'trimmed': []
+            })
+            entry['calls'] += 1
+            entry['estimated_prompt_tokens'] += prompt.tokens
+            entry['prompt_tokens'] += prompt_tokens
+            entry['cached_prompt_tokens'] += cached_tokens
+            entry['completion_tokens'] += completion_tokens
+            entry['trimmed'] = sorted(set(entry['trimmed']) | set(prompt.trimmed))
     
-    def generate_script(self, case_data):
-        """Gera roteiro cinematográfico usando GPT-4"""
+    def reset_usage(self):
+        """Zera modelos e tokens registrados (início de um novo conteúdo)"""
+        self.models_used = {}
+        self.token_usage = {}
+    
+    def build_prompt(self, call_type, prefix, fields, suffix=""):
+        """Monta o pedido dentro do orçamento de tokens do tipo de chamada"""
+        prompt = self.prompts.build(call_type, prefix, fields, suffix)
+        if prompt.trimmed:
+            print(f"✂️ Prompt de {call_type} cortado para {prompt.tokens} tokens "
+                  f"(orçamento {prompt.budget}): {', '.join(prompt.trimmed)}")
+        if prompt.over_budget:
+            print(f"⚠️ Prompt de {call_type} com {prompt.tokens} tokens, acima do orçamento "
+                  f"({prompt.budget}) mesmo após os cortes")
+        return prompt
+    
+    def script_prompt(self, case_data):
+        """
+        Pedido de roteiro (com o estilo do canal, se houver)
         
-        prompt = f"""Você é um roteirista especializado em documentários criminais para TikTok/YouTube Shorts.
-
-CASO: {case_data['titulo']}
-RESUMO: {case_data['resumo']}
-DATA: {case_data['data']}
-LOCAL: {case_data['local']}
+        As instruções (iguais para todos os casos do canal) nunca são
+        cortadas; os dados do caso vão no fim.
+        """
+        
+        prompts = self.channel.prompts
+        system = prompts.get('system', "Você é um roteirista especializado em documentários criminais dark e cinematográficos.")
+        style = f"- {prompts['style']}\n" if prompts.get('style') else ""
+        
+        prefix = f"""{system}
 
-Crie um roteiro CINEMATOGRÁFICO e IMPACTANTE para um vídeo de 60-90 segundos seguindo esta estrutura:
+Você escreve roteiros de documentários criminais para TikTok/YouTube Shorts. A partir do caso informado, crie um roteiro CINEMATOGRÁFICO e IMPACTANTE para um vídeo de 60-90 segundos seguindo esta estrutura:
 
 1. HOOK (3-5 segundos): Frase de abertura extremamente impactante que prenda a atenção imediatamente
 2. CONTEXTO (15-20 segundos): Apresente o caso, data, local e personagens principais
@@ -93,15 +178,21 @@ REQUISITOS:
 - Terminar com pergunta ou afirmação que provoque comentários
 - Texto APENAS para narração (sem indicações de cena)
 - Máximo 200 palavras
+{style}"""
 
-ROTEIRO:"""
-
-        response = self.client.chat.completions.create(
-            model="openai/gpt-4o-mini",  # Modelo via OpenRouter
-            messages=[
-                {"role": "system", "content": "Você é um roteirista especializado em documentários criminais dark e cinematográficos."},
-                {"role": "user", "content": prompt}
-            ],
+        return self.build_prompt('script', prefix, [
+            ('CASO', case_data['titulo'], None),
+            ('RESUMO', case_data['resumo'], 40),
+            ('DATA', case_data['data'], None),
+            ('LOCAL', case_data['local'], None),
+        ], suffix="ROTEIRO:")
+    
+    def generate_script(self, case_data):
+        """Gera roteiro cinematográfico (modelo definido pela rota 'script')"""
+        
+        response = self.chat_completion(
+            'script',
+            self.script_prompt(case_data),
             temperature=0.8,
             max_tokens=500
         )
@@ -109,15 +200,42 @@ ROTEIRO:"""
         script = response.choices[0].message.content.strip()
         return script
     
+    def stream_script(self, case_data):
+        """
+        Gera o roteiro em streaming
+        
+        O slot do governador fica ocupado até o fim do stream. Há failover
+        se o modelo falhar antes de começar a responder, mas não hedge.
+        
+        Yields:
+            Trechos de texto conforme chegam
+        """
+        prompt = self.script_prompt(case_data)
+        
+        def send(model, timeout):
+            return self.client.chat.completions.create(
+                model=model,
+                timeout=timeout,
+                messages=prompt.messages,
+                temperature=0.8,
+                max_tokens=500,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+        
+        with get_governor().acquire('openrouter'):
+            stream, model = self.router.complete('script', send, streaming=True)
+            self.models_used['script'] = model
+            for chunk in stream:
+                # O último chunk traz só o uso de tokens
+                self.record_usage(chunk, prompt)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
     def generate_visual_prompts(self, case_data, script):
         """Gera prompts para geração de visuais cinematográficos"""
         
-        prompt = f"""Com base neste roteiro de caso policial, crie 4 PROMPTS para geração de imagens/vídeos cinematográficos com IA.
-
-ROTEIRO:
-{script}
-
-CASO: {case_data['titulo']}
+        prefix = """Com base no roteiro de caso policial informado, crie 4 PROMPTS para geração de imagens/vídeos cinematográficos com IA.
 
 Crie 4 prompts em INGLÊS para Runway Gen-3 ou Midjourney que capturem:
 1. Cena de abertura (atmosfera dark e misteriosa)
@@ -135,11 +253,12 @@ REQUISITOS para cada prompt:
 
 Retorne APENAS os 4 prompts, um por linha, numerados."""
 
-        response = self.client.chat.completions.create(
-            model="openai/gpt-4o-mini",  # Modelo via OpenRouter
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
+        response = self.chat_completion(
+            'visual_prompts',
+            self.build_prompt('visual_prompts', prefix, [
+                ('CASO', case_data['titulo'], None),
+                ('ROTEIRO', script, 150),
+            ]),
             temperature=0.7,
             max_tokens=600
         )
@@ -155,10 +274,7 @@ Retorne APENAS os 4 prompts, um por linha, numerados."""
     def generate_metadata(self, case_data, script):
         """Gera título, descrição e hashtags para o vídeo"""
         
-        prompt = f"""Crie metadados para este vídeo de caso policial:
-
-CASO: {case_data['titulo']}
-ROTEIRO: {script[:200]}...
+        prefix = """Crie metadados para o vídeo de caso policial informado (caso e início do roteiro).
 
 Gere:
 1. TÍTULO: Chamativo e misterioso (máx 60 caracteres)
@@ -170,11 +286,13 @@ TÍTULO: [seu título]
 DESCRIÇÃO: [sua descrição]
 HASHTAGS: #tag1 #tag2 #tag3..."""
 
-        response = self.client.chat.completions.create(
-            model="openai/gpt-4o-mini",  # Modelo via OpenRouter
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
+        response = self.chat_completion(
+            'metadata',
+            self.build_prompt('metadata', prefix, [
+                ('CASO', case_data['titulo'], None),
+                # Só o início do roteiro: o quanto couber no orçamento
+                ('ROTEIRO', ' '.join(script.split()), 30),
+            ]),
             temperature=0.7,
             max_tokens=300
         )
@@ -193,11 +311,21 @@ HASHTAGS: #tag1 #tag2 #tag3..."""
         
         return metadata
     
-    def save_content_package(self, case_data, script, visual_prompts, metadata):
-        """Salva pacote completo de conteúdo"""
+    def save_content_package(self, case_data, script, visual_prompts, metadata, narration=None,
+                             visuals=None):
+        """
+        Salva pacote completo de conteúdo
+        
+        Args:
+            narration: StreamingNarration em andamento; o áudio é concluído
+                       e o pacote já sai com a narração
+            visuals: Future da busca de imagens das cenas (VisualAssetStage.start)
+        """
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = OUTPUT_DIR / f"video_{timestamp}.json"
+        # Sufixo aleatório: vários workers podem gerar pacotes no mesmo
+        # segundo, e o nome (e o dos arquivos de áudio e vídeo) vem daqui
+        timestamp = f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:6]}"
+        output_file = self.output_dir / f"video_{timestamp}.json"
         
         package = {
             "timestamp": timestamp,
@@ -206,32 +334,76 @@ HASHTAGS: #tag1 #tag2 #tag3..."""
             "script": script,
             "visual_prompts": visual_prompts,
             "metadata": metadata,
+            "models": dict(self.models_used),
+            "token_usage": dict(self.token_usage),
+            "channel": self.channel.name,
             "status": "gerado"
         }
         
+        if narration:
+            audio_file = narration.finish(self.output_dir / f"narration_{timestamp}.mp3")
+            package["audio_file"] = str(audio_file)
+            package["status"] = "audio_gerado"
+        
+        if visuals:
+            try:
+                package["visual_assets"] = visuals.result()
+            except Exception as e:
+                print(f"⚠️ Imagens das cenas indisponíveis: {e}")
+        
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(package, f, ensure_ascii=False, indent=2)
+        metrics.record(bytes_written=output_file.stat().st_size)
+        self.dedup.add_package(output_file)
         
         # Log
-        log_file = LOGS_DIR / f"log_{datetime.now().strftime('%Y%m%d')}.txt"
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(f"[{datetime.now()}] Conteúdo gerado: {output_file.name}\n")
+        get_logger("conteudo").info(f"Conteúdo gerado: {output_file.name}",
+                                    extra={'package_id': output_file.stem})
         
         return output_file
     
-    def generate_complete_content(self):
-        """Pipeline completo de geração de conteúdo"""
+    def check_duplicate(self, kind, text):
+        """Retorna (pacote, similaridade) se o texto repete um já produzido"""
+        match = self.dedup.find_similar(kind, text)
+        if match:
+            metrics.record(duplicates_detected=1)
+            print(f"⚠️ Conteúdo {match[1]:.0%} similar a {match[0]}")
+        return match
+    
+    def generate_unique(self, kind, generate):
+        """
+        Gera até obter um texto que não repete o histórico
         
-        print("🎬 Iniciando geração de conteúdo...")
+        Raises:
+            DuplicateContentError: Se todas as tentativas saírem duplicadas
+        """
+        for attempt in range(DEDUP_MAX_ATTEMPTS + 1):
+            text = generate()
+            value = text.get('titulo', '') if isinstance(text, dict) else text
+            if not value or not self.check_duplicate(kind, value):
+                return text
+            if attempt < DEDUP_MAX_ATTEMPTS:
+                print("🔁 Regenerando...")
+        raise DuplicateContentError(f"Conteúdo duplicado após {DEDUP_MAX_ATTEMPTS + 1} tentativas")
+    
+    def generate_for_case(self, case):
+        """
+        Gera roteiro, prompts visuais e metadados para um caso
+        
+        Roteiro e título são comparados com o histórico logo após a
+        geração, antes de narração e render.
         
-        # 1. Seleciona caso
-        print("📁 Selecionando caso policial...")
-        case = self.select_random_case()
-        print(f"✅ Caso selecionado: {case['titulo']}")
+        Returns:
+            Dicionário com script, visual_prompts, metadata e models
+        
+        Raises:
+            DuplicateContentError: Se o caso só produz conteúdo repetido
+        """
+        self.reset_usage()
         
         # 2. Gera roteiro
         print("📝 Gerando roteiro cinematográfico...")
-        script = self.generate_script(case)
+        script = self.generate_unique(KIND_SCRIPT, lambda: self.generate_script(case))
         print(f"✅ Roteiro gerado ({len(script.split())} palavras)")
         
         # 3. Gera prompts visuais
@@ -241,12 +413,142 @@ HASHTAGS: #tag1 #tag2 #tag3..."""
         
         # 4. Gera metadados
         print("📊 Gerando metadados...")
-        metadata = self.generate_metadata(case, script)
+        metadata = self.generate_unique(KIND_TITLE, lambda: self.generate_metadata(case, script))
         print(f"✅ Metadados gerados")
         
+        return {
+            'script': script,
+            'visual_prompts': visual_prompts,
+            'metadata': metadata,
+            'models': dict(self.models_used),
+            'token_usage': dict(self.token_usage)
+        }
+    
+    def generate_streaming(self, case, voice_generator):
+        """
+        Gera o conteúdo narrando o roteiro enquanto ele é escrito
+        
+        Frases completas vão para a ElevenLabs durante o streaming do
+        roteiro; prompts visuais e metadados são gerados em paralelo com
+        a narração. A checagem de duplicatas acontece quando o roteiro
+        termina, descartando a narração parcial se ele for repetido.
+        
+        Returns:
+            (dicionário de conteúdo, StreamingNarration ainda em andamento)
+        
+        Raises:
+            DuplicateContentError: Se o caso só produz conteúdo repetido
+        """
+        self.reset_usage()
+        
+        print("📝 Gerando roteiro em streaming (narração em paralelo)...")
+        for attempt in range(DEDUP_MAX_ATTEMPTS + 1):
+            narration = voice_generator.start_streaming(voice_id=self.channel.voice_id)
+            parts = []
+            try:
+                for text in self.stream_script(case):
+                    parts.append(text)
+                    narration.feed(text)
+            except Exception:
+                narration.cancel()
+                raise
+            
+            script = ''.join(parts).strip()
+            if not self.check_duplicate(KIND_SCRIPT, script):
+                break
+            narration.cancel()
+            if attempt < DEDUP_MAX_ATTEMPTS:
+                print("🔁 Regenerando...")
+        else:
+            raise DuplicateContentError(f"Conteúdo duplicado após {DEDUP_MAX_ATTEMPTS + 1} tentativas")
+        
+        narration.close()
+        print(f"✅ Roteiro gerado ({len(script.split())} palavras)")
+        
+        print("🎨 Gerando prompts visuais e metadados durante a narração...")
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                visual_prompts = submit_with_context(executor, self.generate_visual_prompts, case, script)
+                metadata = submit_with_context(
+                    executor, self.generate_unique, KIND_TITLE, lambda: self.generate_metadata(case, script))
+                content = {
+                    'script': script,
+                    'visual_prompts': visual_prompts.result(),
+                    'metadata': metadata.result(),
+                }
+        except Exception:
+            narration.cancel()
+            raise
+        print(f"✅ {len(content['visual_prompts'])} prompts visuais e metadados gerados")
+        
+        content['models'] = dict(self.models_used)
+        content['token_usage'] = dict(self.token_usage)
+        return content, narration
+    
+    def generate_complete_content(self, use_pool=True, voice_generator=None, visual_stage=None):
+        """
+        Pipeline completo de geração de conteúdo
+        
+        Args:
+            use_pool: Usa primeiro um roteiro pré-gerado do pool
+                      (data/script_pool/), se houver
+            voice_generator: Se informado, narra o roteiro em streaming e o
+                             pacote já sai com o áudio (exceto entradas do pool)
+            visual_stage: VisualAssetStage; no modo streaming, as imagens das
+                          cenas são buscadas enquanto a narração termina
+        """
+        
+        print("🎬 Iniciando geração de conteúdo...")
+        
+        entry = None
+        if use_pool:
+            from script_pool import ScriptPool
+            entry = ScriptPool(generator=self, channel=self.channel).take()
+            # Outro worker pode ter produzido algo parecido depois da pré-geração
+            if entry and self.check_duplicate(KIND_SCRIPT, entry['content']['script']):
+                print("🗑️ Entrada do pool descartada")
+                entry = None
+        
+        narration = None
+        if entry:
+            # Roteiro pronto: o caminho crítico começa na narração
+            case = entry['case']
+            content = entry['content']
+            self.models_used = dict(content.get('models', {}))
+            self.token_usage = dict(content.get('token_usage', {}))
+            print(f"♻️ Usando roteiro pré-gerado do pool: {case['titulo']}")
+        else:
+            content = None
+            for attempt in range(DEDUP_MAX_ATTEMPTS + 1):
+                # 1. Seleciona caso
+                print("📁 Selecionando caso policial...")
+                case = self.select_random_case()
+                print(f"✅ Caso selecionado: {case['titulo']}")
+                
+                try:
+                    if voice_generator:
+                        content, narration = self.generate_streaming(case, voice_generator)
+                    else:
+                        content = self.generate_for_case(case)
+                    break
+                except DuplicateContentError as e:
+                    print(f"⏭️ Caso pulado: {e}")
+            
+            if content is None:
+                raise DuplicateContentError("Nenhum caso gerou conteúdo inédito")
+        
+        script = content['script']
+        visual_prompts = content['visual_prompts']
+        metadata = content['metadata']
+        
+        visuals = None
+        if narration and visual_stage:
+            visuals = visual_stage.start(visual_prompts)
+        
         # 5. Salva pacote
         print("💾 Salvando pacote de conteúdo...")
-        output_file = self.save_content_package(case, script, visual_prompts, metadata)
+        output_file = self.save_content_package(case, script, visual_prompts, metadata,
+                                                narration=narration, visuals=visuals)
         print(f"✅ Pacote salvo: {output_file}")
         
         print("\n🎉 Conteúdo gerado com sucesso!")
@@ -259,5 +561,11 @@ HASHTAGS: #tag1 #tag2 #tag3..."""
 
 
 if __name__ == "__main__":
+    import sys
+    
     generator = ContentGenerator()
-    generator.generate_complete_content()
+    if '--profile' in sys.argv:
+        from profiling import run_profiled
+        run_profiled('conteudo', generator.generate_complete_content)
+    else:
+        generator.generate_complete_content()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Índice de Quase-Duplicatas para Roteiros e Títulos
+MinHash + LSH (bandas) sobre shingles do texto, guardado em SQLite.
+Permite rejeitar um roteiro ou título parecido com algo já produzido
+logo após a geração, antes de pagar narração e render.
+
+Na primeira abertura (ou quando o formato da assinatura muda), o índice é
+construído a partir dos pacotes existentes em output/.
+"""
+
+import os
+import re
+import sys
+import json
+import zlib
+import hashlib
+import unicodedata
+from array import array
+from pathlib import Path
+
+from pipeline_db import ThreadConnections
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+OUTPUT_DIR = BASE_DIR / "output"
+DEFAULT_INDEX_DB = DATA_DIR / "dedup_index.db"
+
+# 64 permutações em 16 bandas de 4 linhas: pares com Jaccard acima de
+# ~0.5 caem no mesmo balde com alta probabilidade
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Similaridade (Jaccard estimado) a partir da qual é duplicata
+DEFAULT_THRESHOLD = 0.6
+
+# Tipos de texto indexados e como gerar os shingles de cada um
+KIND_SCRIPT = "script"
+KIND_TITLE = "title"
+
+_MAX_HASH = (1 << 32) - 1
+
+# Formato das assinaturas; índices de outra versão são reconstruídos
+SIGNATURE_VERSION = 2
+
+
+def normalize(text):
+    """Minúsculas, sem acentos e sem pontuação"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def shingles(text, kind):
+    """
+    Conjunto de shingles do texto
+
+    Roteiros: trigramas de palavras. Títulos (curtos): 4-gramas de caracteres.
+    """
+    text = normalize(text)
+    if kind == KIND_TITLE:
+        k = 4
+        grams = {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+    else:
+        words = text.split()
+        k = 3
+        grams = {' '.join(words[i:i + k]) for i in range(max(len(words) - k + 1, 1))}
+    return {g.encode('utf-8') for g in grams if g}
+
+
+def minhash(grams):
+    """
+    Assinatura MinHash (NUM_PERM inteiros de 32 bits)
+
+    Cada shingle gera de uma vez seus NUM_PERM hashes (SHAKE-128, saída de
+    NUM_PERM × 4 bytes), todos num único array; o mínimo de cada posição
+    é min() sobre uma fatia com passo NUM_PERM, tudo em C, em vez de
+    NUM_PERM × shingles multiplicações em Python.
+    """
+    if not grams:
+        return array('I', [_MAX_HASH] * NUM_PERM)
+    hashes = array('I', b''.join([hashlib.shake_128(g).digest(NUM_PERM * 4) for g in grams]))
+    return array('I', [min(hashes[i::NUM_PERM]) for i in range(NUM_PERM)])
+
+
+def band_keys(signature):
+    """Uma chave por banda: número da banda + hash das ROWS linhas dela"""
+    return [
+        (band << 32) | zlib.crc32(signature[band * ROWS:(band + 1) * ROWS].tobytes())
+        for band in range(BANDS)
+    ]
+
+
+def similarity(sig_a, sig_b):
+    """Jaccard estimado: fração de posições iguais"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+class DedupIndex:
+    """Índice MinHash/LSH persistido em SQLite"""
+
+    def __init__(self, db_file=None, threshold=None, output_dir=None):
+        """
+        Args:
+            db_file: Banco do índice (padrão: DEDUP_INDEX_DB ou data/dedup_index.db)
+            threshold: Similaridade mínima para duplicata
+            output_dir: Pacotes indexados na primeira abertura (padrão: output/)
+        """
+        self.db_file = Path(db_file or os.getenv("DEDUP_INDEX_DB") or DEFAULT_INDEX_DB)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold or float(os.getenv("DEDUP_THRESHOLD", DEFAULT_THRESHOLD))
+        self.output_dir = Path(output_dir or OUTPUT_DIR)
+        self._connect = ThreadConnections(self.db_file)
+        self._create_schema()
+        self._migrate()
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS signatures (
+                kind TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                PRIMARY KEY (kind, item_id)
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                kind TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                item_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bands_lookup ON bands (kind, bucket);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        conn.commit()
+
+    def _migrate(self):
+        """Indexa o histórico na primeira abertura ou se o formato mudou"""
+        row = self._connect().execute(
+            "SELECT value FROM meta WHERE key = 'signature_version'").fetchone()
+        if row and int(row[0]) == SIGNATURE_VERSION:
+            return
+        count = self.rebuild()
+        if count:
+            print(f"🗂️ Índice de duplicatas construído com {count} pacote(s) existente(s)")
+
+    def add(self, kind, item_id, text):
+        """Indexa um texto (substitui se o item já existir)"""
+        with self._connect() as conn:
+            self._add(conn, kind, item_id, text)
+
+    def _add(self, conn, kind, item_id, text):
+        signature = minhash(shingles(text, kind))
+        conn.execute("DELETE FROM bands WHERE kind = ? AND item_id = ?", (kind, item_id))
+        conn.execute(
+            "INSERT OR REPLACE INTO signatures (kind, item_id, signature) VALUES (?, ?, ?)",
+            (kind, item_id, signature.tobytes())
+        )
+        conn.executemany(
+            "INSERT INTO bands (kind, bucket, item_id) VALUES (?, ?, ?)",
+            [(kind, bucket, item_id) for bucket in band_keys(signature)]
+        )
+
+    def find_similar(self, kind, text, exclude=None):
+        """
+        Item mais parecido acima do limiar
+
+        Só compara assinaturas dos candidatos que compartilham alguma banda,
+        então o custo não cresce com o tamanho do histórico.
+
+        Returns:
+            (item_id, similaridade) ou None
+        """
+        signature = minhash(shingles(text, kind))
+        conn = self._connect()
+
+        placeholders = ', '.join('?' for _ in range(BANDS))
+        candidates = conn.execute(
+            f"SELECT s.item_id, s.signature FROM signatures s "
+            f"WHERE s.kind = ? AND s.item_id IN ("
+            f"SELECT item_id FROM bands WHERE kind = ? AND bucket IN ({placeholders}))",
+            [kind, kind] + band_keys(signature)
+        ).fetchall()
+
+        best = None
+        for item_id, blob in candidates:
+            if item_id == exclude:
+                continue
+            score = similarity(signature, array('I', blob))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (item_id, score)
+        return best
+
+    def add_package(self, package_file):
+        """Indexa roteiro e título de um pacote"""
+        with self._connect() as conn:
+            self._add_package(conn, package_file)
+
+    def _add_package(self, conn, package_file):
+        package_file = Path(package_file)
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+
+        item_id = package_file.stem
+        if package.get('script'):
+            self._add(conn, KIND_SCRIPT, item_id, package['script'])
+        title = package.get('metadata', {}).get('titulo')
+        if title:
+            self._add(conn, KIND_TITLE, item_id, title)
+
+    def rebuild(self, output_dir=None):
+        """Reindexa todos os pacotes do histórico (numa única transação)"""
+        count = 0
+        with self._connect() as conn:
+            conn.execute("DELETE FROM bands")
+            conn.execute("DELETE FROM signatures")
+            for package_file in sorted(Path(output_dir or self.output_dir).glob("video_*.json")):
+                try:
+                    self._add_package(conn, package_file)
+                    count += 1
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Pacote ignorado no índice ({package_file.name}): {e}")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature_version', ?)",
+                         (str(SIGNATURE_VERSION),))
+        return count
+
+
+class DuplicateContentError(Exception):
+    """Conteúdo gerado é quase idêntico a um já produzido"""
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Índice de quase-duplicatas')
+    parser.add_argument('--channel', help='Canal (padrão: default)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('rebuild', help='Reindexa todos os pacotes em output/')
+
+    check_parser = subparsers.add_parser('check', help='Verifica um texto')
+    check_parser.add_argument('text', help='Roteiro ou título')
+    check_parser.add_argument('--kind', choices=[KIND_SCRIPT, KIND_TITLE], default=KIND_SCRIPT)
+
+    args = parser.parse_args()
+
+    from channels import get_channel
+    channel = get_channel(args.channel)
+    index = DedupIndex(db_file=channel.data_dir / "dedup_index.db" if channel.data_dir else None,
+                       output_dir=channel.output_dir(OUTPUT_DIR))
+
+    if args.command == 'rebuild':
+        print(f"✅ {index.rebuild(channel.output_dir(OUTPUT_DIR))} pacote(s) indexado(s)")
+    else:
+        match = index.find_similar(args.kind, args.text)
+        if match:
+            print(f"⚠️ Similar a {match[0]} ({match[1]:.0%})")
+            sys.exit(1)
+        print("✅ Nenhum conteúdo similar encontrado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos Perfis de Encode
+Codifica um trecho do nosso conteúdo real (fundo escuro com ruído e título)
+com cada perfil de encoder_profiles.py e mede velocidade (fps), tamanho
+do arquivo e qualidade (SSIM, e VMAF se o FFmpeg tiver libvmaf) em relação
+a uma referência sem perdas. Os perfis na fronteira de Pareto (nenhum
+outro é mais rápido, menor e melhor ao mesmo tempo) são marcados.
+
+Uso:
+    python3 scripts/encode_benchmark.py
+    python3 scripts/encode_benchmark.py --seconds 20 --profiles shorts,quality --vmaf
+"""
+
+import re
+import sys
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from encoder_profiles import encode_args, load_config
+from title_cards import overlay_filter
+from video_compiler import FPS, RESOLUTION, TITLE_SECONDS, VideoCompiler
+
+DEFAULT_SECONDS = 10
+
+
+def available_encoders():
+    """Encoders de vídeo compilados no FFmpeg instalado"""
+    result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                            capture_output=True, text=True, check=True)
+    encoders = set()
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        # Formato: " V....D libx264   descrição"
+        if len(parts) >= 2 and parts[0].startswith('V'):
+            encoders.add(parts[1])
+    return encoders
+
+
+def render_reference(seconds, title, output_file):
+    """Trecho do conteúdo real codificado sem perdas (referência da qualidade)"""
+    card = VideoCompiler().title_card(title, 50)
+    overlay = overlay_filter('center', start=0, end=min(TITLE_SECONDS, seconds))
+    cmd = [
+        'ffmpeg',
+        '-f', 'lavfi', '-i', f'color=c=0x0a0a0a:s={RESOLUTION}:r={FPS}',
+        '-i', str(card),
+        '-filter_complex', f'[0:v]noise=alls=20:allf=t+u[bg];[bg][1:v]{overlay}[v]',
+        '-map', '[v]',
+        '-frames:v', str(int(seconds * FPS)),
+        '-c:v', 'libx264', '-qp', '0', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-y', str(output_file)
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+    return output_file
+
+
+def measure_quality(encoded_file, reference_file, vmaf=False):
+    """
+    SSIM (e VMAF) do vídeo codificado contra a referência
+
+    Returns:
+        {'ssim': float, 'vmaf': float ou None}
+    """
+    cmd = ['ffmpeg', '-hide_banner', '-i', str(encoded_file), '-i', str(reference_file),
+           '-lavfi', '[0:v][1:v]ssim', '-f', 'null', '-']
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    match = re.search(r'All:([\d.]+)', result.stderr)
+    quality = {'ssim': float(match.group(1)) if match else None, 'vmaf': None}
+
+    if vmaf:
+        cmd = ['ffmpeg', '-hide_banner', '-i', str(encoded_file), '-i', str(reference_file),
+               '-lavfi', '[0:v][1:v]libvmaf', '-f', 'null', '-']
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        match = re.search(r'VMAF score[:=]\s*([\d.]+)', result.stderr)
+        if match:
+            quality['vmaf'] = float(match.group(1))
+    return quality
+
+
+def pareto_front(results):
+    """Nomes dos perfis que nenhum outro supera em fps, tamanho e SSIM ao mesmo tempo"""
+    def dominates(a, b):
+        no_worse = (a['fps'] >= b['fps'] and a['bytes'] <= b['bytes']
+                    and (a['ssim'] or 0) >= (b['ssim'] or 0))
+        better = (a['fps'] > b['fps'] or a['bytes'] < b['bytes']
+                  or (a['ssim'] or 0) > (b['ssim'] or 0))
+        return no_worse and better
+
+    return {r['profile'] for r in results
+            if not any(dominates(other, r) for other in results if other is not r)}
+
+
+class EncodeBenchmark:
+    """Mede os perfis de encode no conteúdo dos vídeos"""
+
+    def __init__(self, seconds=DEFAULT_SECONDS, profiles=None, vmaf=False,
+                 title="O caso que ninguém conseguiu explicar"):
+        """
+        Args:
+            seconds: Duração do trecho codificado
+            profiles: Nomes dos perfis (padrão: todos)
+            vmaf: Mede também VMAF (requer FFmpeg com libvmaf)
+            title: Título desenhado nos primeiros segundos
+        """
+        self.seconds = seconds
+        self.vmaf = vmaf
+        self.title = title
+        all_profiles, _ = load_config()
+        names = profiles or list(all_profiles)
+        unknown = [name for name in names if name not in all_profiles]
+        if unknown:
+            raise ValueError(f"Perfis desconhecidos: {', '.join(unknown)}")
+        self.profiles = {name: all_profiles[name] for name in names}
+
+    def run(self):
+        """
+        Executa o benchmark
+
+        Returns:
+            Relatório com uma linha por perfil
+        """
+        encoders = available_encoders()
+        frames = int(self.seconds * FPS)
+        results = []
+        skipped = []
+
+        work_dir = Path(tempfile.mkdtemp(prefix='encode_benchmark_'))
+        try:
+            print(f"🎞️ Renderizando referência sem perdas ({self.seconds:.0f}s)...")
+            reference = render_reference(self.seconds, self.title, work_dir / "reference.mkv")
+
+            for name, profile in self.profiles.items():
+                codec = profile.get('codec', 'libx264')
+                if codec not in encoders:
+                    print(f"⏭️ {name}: encoder {codec} indisponível neste FFmpeg")
+                    skipped.append(name)
+                    continue
+
+                print(f"⏱️ {name}...")
+                output_file = work_dir / f"{name}.mp4"
+                cmd = ['ffmpeg', '-i', str(reference), *encode_args(profile),
+                       '-an', '-y', str(output_file)]
+                start = time.perf_counter()
+                subprocess.run(cmd, check=True, capture_output=True)
+                elapsed = time.perf_counter() - start
+
+                size = output_file.stat().st_size
+                quality = measure_quality(output_file, reference, vmaf=self.vmaf)
+                results.append({
+                    'profile': name,
+                    'codec': codec,
+                    'encode_seconds': round(elapsed, 3),
+                    'fps': round(frames / elapsed, 1),
+                    'bytes': size,
+                    'kbps': round(size * 8 / self.seconds / 1000),
+                    'ssim': quality['ssim'],
+                    'vmaf': quality['vmaf']
+                })
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        front = pareto_front(results)
+        for result in results:
+            result['pareto'] = result['profile'] in front
+
+        return {
+            'seconds': self.seconds,
+            'resolution': RESOLUTION,
+            'fps': FPS,
+            'results': results,
+            'skipped': skipped
+        }
+
+
+def print_report(report):
+    print()
+    print(f"{'perfil':<14} {'codec':<10} {'fps':>7} {'kbps':>7} {'MB/min':>7} {'SSIM':>7} {'VMAF':>6}")
+    print("-" * 64)
+    for r in report['results']:
+        mb_per_minute = r['bytes'] / report['seconds'] * 60 / 1024 / 1024
+        ssim = f"{r['ssim']:.4f}" if r['ssim'] is not None else '-'
+        vmaf = f"{r['vmaf']:.1f}" if r['vmaf'] is not None else '-'
+        mark = ' ★' if r['pareto'] else ''
+        print(f"{r['profile']:<14} {r['codec']:<10} {r['fps']:>7.1f} {r['kbps']:>7} "
+              f"{mb_per_minute:>7.1f} {ssim:>7} {vmaf:>6}{mark}")
+    print()
+    print("★ = fronteira de Pareto (nenhum outro perfil é mais rápido, menor e melhor)")
+    print("Defina o perfil em data/encoder_profiles.json (\"renditions\") ou VIDEO_PROFILE.")
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark dos perfis de encode')
+    parser.add_argument('--seconds', type=float, default=DEFAULT_SECONDS,
+                        help='Duração do trecho codificado')
+    parser.add_argument('--profiles', help='Perfis separados por vírgula (padrão: todos)')
+    parser.add_argument('--vmaf', action='store_true', help='Mede VMAF (FFmpeg com libvmaf)')
+    parser.add_argument('--json', help='Salva o relatório neste arquivo')
+
+    args = parser.parse_args()
+
+    if not shutil.which('ffmpeg'):
+        print("❌ FFmpeg não está instalado! Instale com: sudo apt install ffmpeg")
+        sys.exit(1)
+
+    profiles = [name.strip() for name in args.profiles.split(',')] if args.profiles else None
+    try:
+        benchmark = EncodeBenchmark(seconds=args.seconds, profiles=profiles, vmaf=args.vmaf)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = benchmark.run()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Perfis de Encode
+Parâmetros do encoder de vídeo (codec, preset, CRF, tune, GOP, teto de
+bitrate, formato de pixel) com nome, escolhidos por tipo de vídeo
+(rendition). O fundo com ruído é caro de codificar e gera arquivos grandes;
+use scripts/encode_benchmark.py para medir os perfis no nosso conteúdo.
+
+Sobrescreva ou adicione perfis em data/encoder_profiles.json:
+    {
+      "profiles": {"shorts": {"crf": 30}, "meu_perfil": {"codec": "libx264", ...}},
+      "renditions": {"short": "meu_perfil"}
+    }
+"""
+
+import os
+import json
+from pathlib import Path
+
+from pipeline_config import load_with_overrides
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+PROFILES_CONFIG = DATA_DIR / "encoder_profiles.json"
+
+# gop em quadros; maxrate/bufsize no formato do FFmpeg ("6M")
+DEFAULT_PROFILES = {
+    # Padrões do libx264 (comportamento anterior aos perfis)
+    'x264_default': {'codec': 'libx264', 'preset': 'medium', 'pix_fmt': 'yuv420p'},
+    # Shorts: o YouTube recodifica de qualquer forma; prioriza render e upload rápidos
+    'shorts': {
+        'codec': 'libx264', 'preset': 'veryfast', 'crf': 28, 'gop': 50,
+        'maxrate': '6M', 'bufsize': '12M', 'pix_fmt': 'yuv420p'
+    },
+    # Preserva o ruído (grão) com mais bits
+    'quality': {
+        'codec': 'libx264', 'preset': 'slow', 'crf': 20, 'tune': 'grain', 'gop': 50,
+        'maxrate': '12M', 'bufsize': '24M', 'pix_fmt': 'yuv420p'
+    },
+    'x265': {
+        'codec': 'libx265', 'preset': 'fast', 'crf': 28, 'gop': 50,
+        'maxrate': '5M', 'bufsize': '10M', 'pix_fmt': 'yuv420p'
+    },
+    'av1': {'codec': 'libsvtav1', 'preset': 8, 'crf': 35, 'gop': 50, 'pix_fmt': 'yuv420p'},
+}
+
+# Perfil usado por tipo de vídeo. O padrão mantém o encode anterior; troque
+# depois de medir com encode_benchmark.py
+DEFAULT_RENDITIONS = {
+    'short': 'x264_default',
+    'long': 'x264_default',
+}
+
+
+def load_config(config_file=None):
+    """
+    Perfis e renditions padrão + sobrescritas do arquivo de configuração
+
+    Returns:
+        (perfis, renditions)
+    """
+    config = load_with_overrides({'profiles': DEFAULT_PROFILES, 'renditions': DEFAULT_RENDITIONS},
+                                 PROFILES_CONFIG, "ENCODER_PROFILES_CONFIG", config_file)
+    return config['profiles'], config['renditions']
+
+
+def get_profile(name=None, rendition='short'):
+    """
+    Perfil pelo nome, ou o perfil da rendition (VIDEO_PROFILE sobrescreve)
+
+    Raises:
+        ValueError: Se o perfil não existir
+    """
+    profiles, renditions = load_config()
+    name = name or os.getenv("VIDEO_PROFILE") or renditions.get(rendition, 'x264_default')
+    if name not in profiles:
+        raise ValueError(f"Perfil de encode desconhecido: {name} (opções: {', '.join(profiles)})")
+    return {'name': name, **profiles[name]}
+
+
+def encode_args(profile):
+    """Argumentos de vídeo do FFmpeg para o perfil"""
+    codec = profile.get('codec', 'libx264')
+    args = ['-c:v', codec]
+    if profile.get('preset') is not None:
+        args += ['-preset', str(profile['preset'])]
+    if profile.get('crf') is not None:
+        args += ['-crf', str(profile['crf'])]
+    if profile.get('tune'):
+        args += ['-tune', profile['tune']]
+    if profile.get('gop'):
+        args += ['-g', str(profile['gop'])]
+    if profile.get('maxrate'):
+        args += ['-maxrate', profile['maxrate'],
+                 '-bufsize', profile.get('bufsize') or profile['maxrate']]
+    args += ['-pix_fmt', profile.get('pix_fmt', 'yuv420p')]
+    if codec == 'libx265':
+        # Tag reconhecida por players da Apple e pelo YouTube em MP4
+        args += ['-tag:v', 'hvc1']
+    return args
+
+
+if __name__ == "__main__":
+    profiles, renditions = load_config()
+    print(json.dumps({'profiles': profiles, 'renditions': renditions},
+                     ensure_ascii=False, indent=2))
@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Fila de Jobs Distribuída
+Permite executar as etapas do pipeline (geração → narração → vídeo → upload)
+em workers separados, possivelmente em máquinas diferentes.
+
+Backends:
+- SQLiteJobQueue: arquivo SQLite em volume compartilhado (NFS, EFS, etc.)
+- HTTPJobQueue: cliente de rede para um servidor de fila (JobQueueServer
+  é o substituto local, que expõe uma SQLiteJobQueue via HTTP)
+
+Com vários canais (data/channels.json), os workers são divididos entre eles
+por fila justa ponderada (peso do canal), respeitando o máximo de jobs
+simultâneos de cada canal.
+"""
+
+import os
+import sys
+import json
+import time
+import hmac
+import uuid
+import socket
+import ipaddress
+import sqlite3
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from metrics import RunMetrics
+from pipeline_db import ThreadConnections
+from channels import DEFAULT_CHANNEL, load_channels
+from pipeline_logging import get_logger, set_log_context, clear_log_context
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+DEFAULT_QUEUE_DB = DATA_DIR / "jobs.db"
+
+# Tipos de job, na ordem do pipeline
+JOB_GENERATE = "gerar_conteudo"
+JOB_VOICE = "narracao"
+JOB_RENDER = "render"
+JOB_UPLOAD = "upload"
+JOB_TYPES = [JOB_GENERATE, JOB_VOICE, JOB_RENDER, JOB_UPLOAD]
+
+# Próxima etapa após cada tipo de job
+NEXT_STAGE = {
+    JOB_GENERATE: JOB_VOICE,
+    JOB_VOICE: JOB_RENDER,
+    JOB_RENDER: JOB_UPLOAD,
+    JOB_UPLOAD: None
+}
+
+# Estados de um job
+STATUS_PENDING = "pendente"
+STATUS_RUNNING = "executando"
+STATUS_DONE = "concluido"
+STATUS_FAILED = "falhou"
+
+# Cabeçalho com o token compartilhado entre servidor e clientes HTTP
+TOKEN_HEADER = "X-Job-Queue-Token"
+
+
+class JobQueue:
+    """Interface comum dos backends de fila"""
+
+    def enqueue(self, job_type, payload=None, max_attempts=3):
+        """Adiciona job na fila e retorna seu ID"""
+        raise NotImplementedError
+
+    def claim(self, job_types, worker_id, lease_seconds=300):
+        """
+        Reivindica o próximo job disponível
+
+        Um job está disponível se está pendente ou se o lease do worker
+        anterior expirou (worker morreu sem concluir).
+
+        Returns:
+            Dicionário do job ou None se a fila estiver vazia
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=300):
+        """Renova o lease do job. Retorna False se o job foi perdido"""
+        raise NotImplementedError
+
+    def complete(self, job_id, worker_id, result=None, next_job_type=None):
+        """
+        Marca job como concluído e, na mesma operação, enfileira a próxima
+        etapa (next_job_type, com result como payload)
+
+        Só conclui se o worker ainda detém o lease: um worker cujo lease
+        expirou não encadeia a próxima etapa, senão ela seria enfileirada
+        também pelo worker que retomou o job.
+
+        Returns:
+            True se concluído; False se o job foi perdido (nada enfileirado)
+        """
+        raise NotImplementedError
+
+    def fail(self, job_id, worker_id, error):
+        """Registra falha; o job volta para a fila se houver tentativas"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Contagem de jobs por tipo e status"""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Fila em arquivo SQLite
+
+    Usa transações BEGIN IMMEDIATE (lock de escrita do arquivo) para que
+    dois workers nunca reivindiquem o mesmo job. Não usa WAL porque o modo
+    WAL não funciona em sistemas de arquivos de rede.
+    """
+
+    def __init__(self, db_file=None, channels=None):
+        """
+        Args:
+            db_file: Arquivo SQLite da fila
+            channels: Perfis de canal (pesos e limites; padrão: data/channels.json)
+        """
+        self.db_file = Path(db_file or os.getenv("JOB_QUEUE_DB") or DEFAULT_QUEUE_DB)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.channels = channels or load_channels()
+        self._connect = ThreadConnections(self.db_file, row_factory=sqlite3.Row,
+                                          isolation_level=None)
+        self._create_schema()
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                worker_id TEXT,
+                lease_until REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        # Filas criadas antes dos canais: todos os jobs são do canal padrão
+        columns = [row['name'] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if 'channel' not in columns:
+            conn.execute(
+                f"ALTER TABLE jobs ADD COLUMN channel TEXT NOT NULL DEFAULT '{DEFAULT_CHANNEL}'")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (job_type, status, created_at)"
+        )
+        # Tempo virtual de cada canal na fila justa ('' guarda o tempo do sistema)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS channel_clock (
+                channel TEXT PRIMARY KEY,
+                virtual_time REAL NOT NULL
+            )
+        """)
+
+    def _row_to_job(self, row):
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        if job.get('result'):
+            job['result'] = json.loads(job['result'])
+        return job
+
+    def enqueue(self, job_type, payload=None, max_attempts=3):
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Tipo de job desconhecido: {job_type}")
+
+        return self._insert(self._connect(), job_type, payload, max_attempts)
+
+    def _insert(self, conn, job_type, payload, max_attempts=3):
+        payload = payload or {}
+        channel = payload.get('channel') or DEFAULT_CHANNEL
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn.execute(
+            "INSERT INTO jobs (id, job_type, payload, status, max_attempts, channel, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, job_type, json.dumps(payload, ensure_ascii=False),
+             STATUS_PENDING, max_attempts, channel, now, now)
+        )
+        return job_id
+
+    def _pick_channel(self, conn, job_types, now):
+        """
+        Escolhe o canal do próximo job (fila justa ponderada)
+
+        Cada canal acumula tempo virtual 1/peso por job despachado; vence o
+        canal com jobs disponíveis, abaixo do limite de concorrência e com
+        menor tempo virtual. Canais que ficaram ociosos voltam no tempo do
+        sistema, sem acumular crédito enquanto estavam parados.
+        """
+        placeholders = ','.join('?' for _ in job_types)
+        ready = [row['channel'] for row in conn.execute(
+            f"SELECT DISTINCT channel FROM jobs WHERE job_type IN ({placeholders}) AND ("
+            f"  status = ? OR (status = ? AND lease_until < ? AND attempts < max_attempts))",
+            (*job_types, STATUS_PENDING, STATUS_RUNNING, now)
+        )]
+        if not ready:
+            return None
+
+        running = dict(conn.execute(
+            "SELECT channel, COUNT(*) FROM jobs WHERE status = ? AND lease_until >= ? "
+            "GROUP BY channel", (STATUS_RUNNING, now)
+        ).fetchall())
+        clock = dict(conn.execute("SELECT channel, virtual_time FROM channel_clock").fetchall())
+        system_time = clock.get('', 0.0)
+
+        best = None
+        for channel in ready:
+            profile = self.channels.get(channel)
+            limit = profile.max_concurrent if profile else None
+            if limit and running.get(channel, 0) >= limit:
+                continue
+            start = max(clock.get(channel, 0.0), system_time)
+            if best is None or start < best[1]:
+                best = (channel, start)
+
+        if best is None:
+            return None
+
+        channel, start = best
+        profile = self.channels.get(channel)
+        weight = profile.weight if profile and profile.weight > 0 else 1.0
+        conn.execute("INSERT OR REPLACE INTO channel_clock VALUES (?, ?)", ('', start))
+        conn.execute("INSERT OR REPLACE INTO channel_clock VALUES (?, ?)",
+                     (channel, start + 1.0 / weight))
+        return channel
+
+    def claim(self, job_types, worker_id, lease_seconds=300):
+        conn = self._connect()
+        now = time.time()
+        placeholders = ','.join('?' for _ in job_types)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Lease expirado na última tentativa: o worker morreu sem chegar
+            # ao fail() (OOM, SIGKILL); sem isto o job seria retomado sempre
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_until = NULL, "
+                "updated_at = ? WHERE status = ? AND lease_until < ? AND attempts >= max_attempts",
+                (STATUS_FAILED, "Lease expirado na última tentativa (worker encerrado sem concluir)",
+                 now, STATUS_RUNNING, now)
+            )
+            channel = self._pick_channel(conn, job_types, now)
+            if channel is None:
+                conn.execute("COMMIT")
+                return None
+
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE job_type IN ({placeholders}) AND channel = ? AND ("
+                f"  status = ? OR (status = ? AND lease_until < ? AND attempts < max_attempts)"
+                f") ORDER BY created_at LIMIT 1",
+                (*job_types, channel, STATUS_PENDING, STATUS_RUNNING, now)
+            ).fetchone()
+
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STATUS_RUNNING, worker_id, now + lease_seconds, now, row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        job = self._row_to_job(row)
+        job['status'] = STATUS_RUNNING
+        job['worker_id'] = worker_id
+        job['attempts'] += 1
+        return job
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=300):
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (now + lease_seconds, now, job_id, worker_id, STATUS_RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result=None, next_job_type=None):
+        if next_job_type and next_job_type not in JOB_TYPES:
+            raise ValueError(f"Tipo de job desconhecido: {next_job_type}")
+
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND worker_id = ? AND status = ? AND lease_until >= ?",
+                (STATUS_DONE, json.dumps(result or {}, ensure_ascii=False), now,
+                 job_id, worker_id, STATUS_RUNNING, now)
+            )
+            owned = cursor.rowcount == 1
+            if owned and next_job_type:
+                self._insert(conn, next_job_type, result)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return owned
+
+    def fail(self, job_id, worker_id, error):
+        cursor = self._connect().execute(
+            "UPDATE jobs SET "
+            "  status = CASE WHEN attempts < max_attempts THEN ? ELSE ? END, "
+            "  error = ?, worker_id = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (STATUS_PENDING, STATUS_FAILED, str(error), time.time(),
+             job_id, worker_id, STATUS_RUNNING)
+        )
+        return cursor.rowcount == 1
+
+    def stats(self):
+        rows = self._connect().execute(
+            "SELECT channel, job_type, status, COUNT(*) AS total FROM jobs "
+            "GROUP BY channel, job_type, status"
+        ).fetchall()
+        stats = {}
+        for row in rows:
+            by_type = stats.setdefault(row['channel'], {}).setdefault(row['job_type'], {})
+            by_type[row['status']] = row['total']
+        return stats
+
+
+class HTTPJobQueue(JobQueue):
+    """
+    Cliente de fila via HTTP/JSON
+
+    Cada método vira um POST em {base_url}/{método}. Qualquer servidor que
+    implemente o mesmo protocolo pode ser usado; JobQueueServer é a
+    implementação de referência. O token (JOB_QUEUE_TOKEN) vai no
+    cabeçalho X-Job-Queue-Token.
+    """
+
+    def __init__(self, base_url=None, timeout=30, token=None):
+        self.base_url = (base_url or os.getenv("JOB_QUEUE_URL", "http://127.0.0.1:8765")).rstrip('/')
+        self.timeout = timeout
+        self.token = token or os.getenv("JOB_QUEUE_TOKEN")
+
+    def _call(self, method, **params):
+        import urllib.request
+
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+
+        request = urllib.request.Request(
+            f"{self.base_url}/{method}",
+            data=json.dumps(params, ensure_ascii=False).encode('utf-8'),
+            headers=headers,
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read().decode('utf-8'))
+
+        if 'error' in body:
+            raise Exception(f"Erro na fila remota: {body['error']}")
+        return body.get('result')
+
+    def enqueue(self, job_type, payload=None, max_attempts=3):
+        return self._call('enqueue', job_type=job_type, payload=payload,
+                          max_attempts=max_attempts)
+
+    def claim(self, job_types, worker_id, lease_seconds=300):
+        return self._call('claim', job_types=list(job_types), worker_id=worker_id,
+                          lease_seconds=lease_seconds)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=300):
+        return self._call('heartbeat', job_id=job_id, worker_id=worker_id,
+                          lease_seconds=lease_seconds)
+
+    def complete(self, job_id, worker_id, result=None, next_job_type=None):
+        return self._call('complete', job_id=job_id, worker_id=worker_id, result=result,
+                          next_job_type=next_job_type)
+
+    def fail(self, job_id, worker_id, error):
+        return self._call('fail', job_id=job_id, worker_id=worker_id, error=error)
+
+    def stats(self):
+        return self._call('stats')
+
+
+class JobQueueServer:
+    """
+    Servidor HTTP local que expõe uma SQLiteJobQueue para HTTPJobQueue
+
+    Escuta só em 127.0.0.1 por padrão. Para aceitar workers de outras
+    máquinas (--host 0.0.0.0), exige um token compartilhado
+    (JOB_QUEUE_TOKEN), conferido em cada requisição.
+    """
+
+    METHODS = ('enqueue', 'claim', 'heartbeat', 'complete', 'fail', 'stats')
+
+    def __init__(self, queue=None, host="127.0.0.1", port=8765, token=None):
+        self.token = token or os.getenv("JOB_QUEUE_TOKEN")
+        if not self.token and not is_loopback(host):
+            raise ValueError(f"Servidor em {host} exige token (defina JOB_QUEUE_TOKEN)")
+        self.queue = queue or SQLiteJobQueue()
+        self.host = host
+        self.port = port
+
+    def create_server(self):
+        """Servidor HTTP pronto para serve_forever (porta 0 = porta livre)"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        queue = self.queue
+        methods = self.METHODS
+        token = self.token
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.strip('/')
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    if token and not hmac.compare_digest(
+                            self.headers.get(TOKEN_HEADER, '').encode('utf-8'),
+                            token.encode('utf-8')):
+                        body, status = {'error': "Token inválido"}, 401
+                    elif method not in methods:
+                        raise ValueError(f"Método desconhecido: {method}")
+                    else:
+                        params = json.loads(self.rfile.read(length) or b'{}')
+                        body, status = {'result': getattr(queue, method)(**params)}, 200
+                except Exception as e:
+                    body = {'error': str(e)}
+                    status = 400
+
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ThreadingHTTPServer((self.host, self.port), Handler)
+
+    def serve_forever(self):
+        server = self.create_server()
+        print(f"🗄️ Servidor de fila em http://{self.host}:{self.port} ({self.queue.db_file})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nServidor interrompido pelo usuário.")
+        finally:
+            server.server_close()
+
+
+def is_loopback(host):
+    """True se o endereço só aceita conexões da própria máquina"""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def get_queue(backend=None):
+    """
+    Cria backend de fila a partir da configuração
+
+    Usa JOB_QUEUE_URL (rede) se definido, senão JOB_QUEUE_DB (SQLite).
+    """
+    backend = backend or ("http" if os.getenv("JOB_QUEUE_URL") else "sqlite")
+    if backend == "http":
+        return HTTPJobQueue()
+    return SQLiteJobQueue()
+
+
+def run_stage(job_type, payload):
+    """
+    Executa uma etapa do pipeline
+
+    O payload do job inicial (auto_upload, privacy_status, channel) segue
+    por toda a cadeia; cada etapa só acrescenta campos (ex: package_file).
+
+    Returns:
+        Payload para a próxima etapa (ou None para encerrar a cadeia)
+    """
+    if job_type == JOB_GENERATE:
+        from channels import get_channel
+        from content_generator import ContentGenerator
+        channel = get_channel(payload.get('channel'))
+        package_file = ContentGenerator(channel=channel).generate_complete_content()
+        return {**payload, 'package_file': str(package_file)}
+
+    package_file = payload['package_file']
+
+    if job_type == JOB_VOICE:
+        from voice_generator import VoiceGenerator
+        from visual_assets import VisualAssetStage, attach_to_package, images_enabled
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+        # Imagens das cenas em paralelo com a narração (só com IMAGE_BACKEND)
+        visuals = None
+        if images_enabled() and 'visual_assets' not in package:
+            try:
+                visuals = VisualAssetStage().start(package.get('visual_prompts', []))
+            except Exception as e:
+                print(f"⚠️ Imagens das cenas desativadas: {e}")
+        if not package.get('audio_file'):
+            VoiceGenerator().generate_from_content_package(package_file)
+        if visuals:
+            attach_to_package(package_file, visuals.result())
+    elif job_type == JOB_RENDER:
+        from video_compiler import VideoCompiler
+        VideoCompiler().compile_video_from_package(package_file)
+    elif job_type == JOB_UPLOAD:
+        if not payload.get('auto_upload'):
+            return None
+        from upload_manager import UploadManager
+        manager = UploadManager(privacy_status=payload.get('privacy_status', 'private'))
+        result = manager.upload_package(package_file)
+        # Upload adiado por quota não é falha: upload_manager.py reenvia depois
+        if result['status'] == 'erro':
+            raise Exception(f"Upload não realizado: {result['error']}")
+
+    return dict(payload)
+
+
+class JobWorker:
+    """Worker que consome jobs de determinados tipos"""
+
+    def __init__(self, queue, job_types=None, lease_seconds=300,
+                 heartbeat_interval=60, poll_interval=5):
+        """
+        Args:
+            queue: Backend de fila
+            job_types: Tipos de job que este worker executa (padrão: todos)
+            lease_seconds: Duração do lease; renovado pelo heartbeat
+            heartbeat_interval: Intervalo entre renovações do lease
+            poll_interval: Espera quando a fila está vazia
+        """
+        self.queue = queue
+        self.job_types = job_types or JOB_TYPES
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def log(self, message):
+        get_logger("worker").info(f"[{self.worker_id}] {message}")
+
+    def _heartbeat_loop(self, job_id, stop_event):
+        """Renova o lease enquanto o job executa"""
+        while not stop_event.wait(self.heartbeat_interval):
+            try:
+                if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                    self.log(f"⚠️ Lease perdido para job {job_id}")
+                    return
+            except Exception as e:
+                self.log(f"⚠️ Erro no heartbeat: {e}")
+
+    def process_one(self):
+        """
+        Reivindica e executa um job
+
+        Returns:
+            True se um job foi processado, False se a fila estava vazia
+        """
+        job = self.queue.claim(self.job_types, self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+
+        job_id, job_type = job['id'], job['job_type']
+        self.log(f"▶️ Job {job_id} ({job_type}), tentativa {job['attempts']}")
+
+        stop_event = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat_loop, args=(job_id, stop_event), daemon=True)
+        heartbeat.start()
+
+        run_metrics = RunMetrics(run_id=job_id, worker_id=self.worker_id,
+                                 package_file=job['payload'].get('package_file'))
+        run_metrics.activate()
+        run_metrics.start_stage(job_type)
+        package_file = job['payload'].get('package_file')
+        set_log_context(run_id=job_id, stage=job_type,
+                        package_id=Path(package_file).stem if package_file else None)
+
+        try:
+            next_payload = run_stage(job_type, job['payload'])
+            run_metrics.finish()
+        except Exception as e:
+            run_metrics.finish(success=False, error=e)
+            self.queue.fail(job_id, self.worker_id, str(e))
+            self.log(f"❌ Job {job_id} falhou: {e}")
+            return True
+        finally:
+            stop_event.set()
+            heartbeat.join()
+            clear_log_context()
+
+        # Conclui e encadeia a próxima etapa numa transação só, se o lease
+        # ainda é deste worker; se expirou, quem retomou o job encadeia
+        next_stage = NEXT_STAGE.get(job_type) if next_payload is not None else None
+        if not self.queue.complete(job_id, self.worker_id, next_payload, next_job_type=next_stage):
+            self.log(f"⚠️ Lease perdido para job {job_id}: resultado descartado, "
+                     f"próxima etapa não enfileirada")
+            return True
+
+        if next_stage:
+            self.log(f"➡️ Próxima etapa enfileirada: {next_stage}")
+        self.log(f"✅ Job {job_id} concluído")
+        return True
+
+    def run(self, once=False):
+        """Loop principal do worker"""
+        self.log(f"👷 Worker iniciado para: {', '.join(self.job_types)}")
+        try:
+            while True:
+                processed = self.process_one()
+                if once and not processed:
+                    break
+                if not processed:
+                    time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            self.log("Worker interrompido pelo usuário.")
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fila de Jobs Distribuída')
+    parser.add_argument('--backend', choices=['sqlite', 'http'],
+                        help='Backend da fila (padrão: http se JOB_QUEUE_URL definido)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Enfileira novos vídeos')
+    enqueue_parser.add_argument('--count', type=int, default=1, help='Número de vídeos')
+    enqueue_parser.add_argument('--auto-upload', action='store_true',
+                                help='Faz upload ao final da cadeia')
+    enqueue_parser.add_argument('--channel', default=DEFAULT_CHANNEL,
+                                help='Canal dos vídeos (padrão: default)')
+
+    worker_parser = subparsers.add_parser('worker', help='Inicia worker')
+    worker_parser.add_argument('--types', nargs='+', choices=JOB_TYPES, default=JOB_TYPES,
+                               help='Tipos de job a executar (padrão: todos)')
+    worker_parser.add_argument('--lease', type=int, default=300, help='Lease em segundos')
+    worker_parser.add_argument('--once', action='store_true',
+                               help='Sai quando a fila estiver vazia')
+
+    serve_parser = subparsers.add_parser('serve', help='Servidor HTTP da fila')
+    serve_parser.add_argument('--host', default='127.0.0.1',
+                              help='Endereço (fora de 127.0.0.1 exige JOB_QUEUE_TOKEN)')
+    serve_parser.add_argument('--port', type=int, default=8765)
+
+    subparsers.add_parser('stats', help='Mostra estado da fila')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            server = JobQueueServer(host=args.host, port=args.port)
+        except ValueError as e:
+            parser.error(str(e))
+        server.serve_forever()
+        return
+
+    queue = get_queue(args.backend)
+
+    if args.command == 'enqueue':
+        if args.channel not in load_channels():
+            parser.error(f"canal não configurado: {args.channel}")
+        for _ in range(args.count):
+            job_id = queue.enqueue(JOB_GENERATE, {'auto_upload': args.auto_upload,
+                                                  'channel': args.channel})
+            print(f"✅ Job enfileirado: {job_id}")
+    elif args.command == 'worker':
+        JobWorker(queue, job_types=args.types, lease_seconds=args.lease,
+                  heartbeat_interval=max(args.lease // 5, 1)).run(once=args.once)
+    else:
+        print(json.dumps(queue.stats(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Métricas do Pipeline
+Registra, por etapa e por execução, tempo de parede e de CPU, tokens do LLM,
+caracteres da ElevenLabs, velocidade do encode, taxa de upload e bytes
+gravados. Os registros vão para logs/metrics.jsonl e podem ser expostos no
+formato texto do Prometheus por um servidor HTTP local.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import resource
+import threading
+from pathlib import Path
+from datetime import datetime
+
+BASE_DIR = Path(__file__).parent.parent
+LOGS_DIR = BASE_DIR / "logs"
+METRICS_FILE = LOGS_DIR / "metrics.jsonl"
+
+# Métricas derivadas: nome -> (numerador, denominador)
+DERIVED_METRICS = {
+    'encode_speed': ('media_seconds', 'encode_seconds'),
+    'upload_bytes_per_second': ('upload_bytes', 'upload_seconds'),
+}
+
+
+def cpu_seconds():
+    """Tempo de CPU do processo e dos filhos já encerrados (ex: FFmpeg)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    return own.ru_utime + own.ru_stime + children_cpu_seconds()
+
+
+def children_cpu_seconds():
+    """Tempo de CPU dos processos filhos já encerrados (ex: FFmpeg)"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return children.ru_utime + children.ru_stime
+
+
+def thread_cpu_clock():
+    """Relógio de CPU da thread atual (None se a plataforma não tiver)"""
+    try:
+        return time.pthread_getcpuclockid(threading.get_ident())
+    except (AttributeError, OSError):
+        return None
+
+
+class StageCPU:
+    """
+    Tempo de CPU de uma etapa: a thread que a iniciou + processos filhos
+
+    RUSAGE_SELF soma todas as threads do processo, então com workers ou
+    etapas em paralelo cada etapa contava a CPU das outras. Aqui conta só a
+    thread da etapa (pelo relógio de CPU dela, válido mesmo se a etapa for
+    encerrada de outra thread) e os filhos encerrados no período (FFmpeg).
+    Threads auxiliares da etapa (pools de trechos, hedge) ficam de fora; o
+    trabalho pesado delas roda em processos filhos, que entram.
+    Sem relógio por thread, usa o processo inteiro, como antes.
+    """
+
+    def __init__(self):
+        self.clock = thread_cpu_clock()
+        self.children_start = children_cpu_seconds()
+        self.own_start = self._own()
+
+    def _own(self):
+        if self.clock is None:
+            own = resource.getrusage(resource.RUSAGE_SELF)
+            return own.ru_utime + own.ru_stime
+        try:
+            return time.clock_gettime(self.clock)
+        except OSError:
+            # Thread da etapa já encerrada
+            return None
+
+    def seconds(self):
+        own = self._own()
+        own_seconds = own - self.own_start if own is not None else 0.0
+        return own_seconds + children_cpu_seconds() - self.children_start
+
+
+# Execução ativa no processo (as etapas registram nela via record())
+_current = None
+_current_lock = threading.Lock()
+
+
+class RunMetrics:
+    """Coleta métricas de uma execução do pipeline"""
+
+    def __init__(self, run_id=None, metrics_file=None, **context):
+        """
+        Args:
+            run_id: Identificador da execução (gerado se omitido)
+            metrics_file: Arquivo JSONL de saída (padrão: logs/metrics.jsonl)
+            context: Campos adicionados a todos os registros (ex: package_file)
+        """
+        self.run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.metrics_file = Path(metrics_file or os.getenv("METRICS_FILE") or METRICS_FILE)
+        self.context = dict(context)
+        self.stages = []
+        self._stage = None
+        self._lock = threading.Lock()
+
+    def activate(self):
+        """Torna esta a execução ativa para record()"""
+        global _current
+        with _current_lock:
+            _current = self
+        return self
+
+    def set_context(self, **context):
+        """Adiciona campos de contexto (valem para a etapa atual e as seguintes)"""
+        with self._lock:
+            self.context.update(context)
+
+    def start_stage(self, name):
+        """Inicia uma etapa, encerrando a anterior se houver"""
+        self.end_stage()
+        with self._lock:
+            self._stage = {
+                'stage': name,
+                'started_at': time.time(),
+                '_perf_start': time.perf_counter(),
+                '_cpu': StageCPU(),
+                'values': {}
+            }
+
+    def record(self, **values):
+        """Soma valores numéricos na etapa atual"""
+        with self._lock:
+            if self._stage is None:
+                return
+            stage_values = self._stage['values']
+            for key, value in values.items():
+                stage_values[key] = stage_values.get(key, 0) + value
+
+    def end_stage(self, success=True, error=None):
+        """Encerra a etapa atual e grava seu registro"""
+        with self._lock:
+            stage, self._stage = self._stage, None
+            if stage is None:
+                return None
+
+            entry = {
+                'run_id': self.run_id,
+                'timestamp': datetime.fromtimestamp(stage['started_at']).isoformat(),
+                'stage': stage['stage'],
+                'wall_seconds': round(time.perf_counter() - stage['_perf_start'], 4),
+                'cpu_seconds': round(stage['_cpu'].seconds(), 4),
+                'success': success,
+                **self.context,
+                **stage['values']
+            }
+            if error:
+                entry['error'] = str(error)
+
+            for name, (numerator, denominator) in DERIVED_METRICS.items():
+                if entry.get(numerator) and entry.get(denominator):
+                    entry[name] = round(entry[numerator] / entry[denominator], 4)
+
+            self.stages.append(entry)
+            self._write(entry)
+            return entry
+
+    def finish(self, success=True, error=None):
+        """Encerra a execução e desativa o registro global"""
+        global _current
+        self.end_stage(success=success, error=error)
+        with _current_lock:
+            if _current is self:
+                _current = None
+
+    def _write(self, entry):
+        self.metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        # Uma única escrita em modo append: linhas inteiras mesmo com vários processos
+        with open(self.metrics_file, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def record(**values):
+    """
+    Registra valores na etapa atual da execução ativa
+
+    Sem execução ativa (ex: script de etapa executado isoladamente)
+    não faz nada.
+    """
+    run = _current
+    if run is not None:
+        run.record(**values)
+
+
+class PrometheusExporter:
+    """Agrega logs/metrics.jsonl e expõe no formato texto do Prometheus"""
+
+    PREFIX = "dark_pipeline"
+
+    def __init__(self, metrics_file=None):
+        self.metrics_file = Path(metrics_file or os.getenv("METRICS_FILE") or METRICS_FILE)
+        self._offset = 0
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def _update(self):
+        """Lê apenas as linhas novas desde a última coleta"""
+        if not self.metrics_file.exists():
+            return
+
+        with open(self.metrics_file, 'r', encoding='utf-8') as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # Linha ainda sendo escrita
+                self._offset += len(line.encode('utf-8'))
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._add(entry)
+
+    def _add(self, entry):
+        labels = (entry['stage'], 'true' if entry.get('success') else 'false')
+        totals = self._totals.setdefault(labels, {'runs': 0})
+        totals['runs'] += 1
+        for key, value in entry.items():
+            if key in DERIVED_METRICS or isinstance(value, bool):
+                continue
+            if isinstance(value, (int, float)):
+                totals[key] = totals.get(key, 0) + value
+
+    def render(self):
+        """Retorna o texto no formato de exposição do Prometheus"""
+        with self._lock:
+            self._update()
+
+            by_metric = {}
+            for (stage, success), totals in self._totals.items():
+                for key, value in totals.items():
+                    by_metric.setdefault(key, []).append((stage, success, value))
+
+        lines = []
+        for key in sorted(by_metric):
+            name = f"{self.PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', key)}_total"
+            lines.append(f"# TYPE {name} counter")
+            for stage, success, value in sorted(by_metric[key]):
+                lines.append(f'{name}{{stage="{stage}",success="{success}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def serve_forever(self, host="0.0.0.0", port=9108):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                data = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        print(f"📈 Métricas em http://{host}:{port}/metrics ({self.metrics_file})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nServidor interrompido pelo usuário.")
+        finally:
+            server.server_close()
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Exportador de métricas do pipeline')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=9108)
+    parser.add_argument('--print', action='store_true',
+                        help='Imprime as métricas uma vez e sai')
+
+    args = parser.parse_args()
+
+    exporter = PrometheusExporter()
+    if args.print:
+        sys.stdout.write(exporter.render())
+    else:
+        exporter.serve_forever(host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Roteamento de Modelos do OpenRouter
+Escolhe o modelo por tipo de chamada (roteiro, prompts visuais, metadados),
+mantém estatísticas de latência/erro por modelo, faz failover em timeout ou
+erro e, opcionalmente, envia uma requisição "hedge" após o p95 de latência,
+ficando com a primeira resposta que chegar.
+"""
+
+import os
+import json
+import time
+import fcntl
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import metrics
+from pipeline_config import load_with_overrides
+from pipeline_logging import submit_with_context
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+ROUTING_CONFIG = DATA_DIR / "model_routing.json"
+STATS_FILE = DATA_DIR / "model_stats.json"
+
+# Rotas padrão: modelos em ordem de preferência por tipo de chamada.
+# Sobrescreva em data/model_routing.json (mesma estrutura).
+DEFAULT_ROUTES = {
+    'script': {
+        'models': ['openai/gpt-4o-mini', 'google/gemini-2.0-flash-001'],
+        'timeout': 30,
+        'hedge': True
+    },
+    'visual_prompts': {
+        'models': ['openai/gpt-4o-mini', 'google/gemini-2.0-flash-001'],
+        'timeout': 30,
+        'hedge': False
+    },
+    'metadata': {
+        'models': ['openai/gpt-4o-mini', 'google/gemini-2.0-flash-001'],
+        'timeout': 20,
+        'hedge': False
+    },
+}
+
+# Janela de amostras por modelo e mínimo para confiar no p95
+STATS_WINDOW = 50
+MIN_SAMPLES = 5
+
+# Sem histórico suficiente, o hedge sai após este tempo
+DEFAULT_HEDGE_DELAY = 8.0
+
+# Modelo com taxa de erro acima disto vai para o fim da fila
+UNHEALTHY_ERROR_RATE = 0.5
+
+# Threads para requisições hedge (a perdedora termina em background)
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='hedge')
+
+
+def load_routes(config_file=None):
+    """Rotas padrão + sobrescritas do arquivo de configuração"""
+    return load_with_overrides(DEFAULT_ROUTES, ROUTING_CONFIG, "MODEL_ROUTING_CONFIG", config_file)
+
+
+def record_discarded_usage(future):
+    """Tokens da resposta descartada pelo hedge também são cobrados"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    usage = getattr(future.result(), 'usage', None)
+    if usage is None:
+        return
+    metrics.record(
+        llm_calls=1,
+        llm_hedge_discarded=1,
+        prompt_tokens=usage.prompt_tokens or 0,
+        completion_tokens=usage.completion_tokens or 0
+    )
+
+
+class ModelStats:
+    """
+    Latência e erros recentes por modelo, persistidos em data/model_stats.json
+
+    O arquivo é atualizado com lock (fcntl) para que execuções curtas de
+    vários workers acumulem histórico.
+    """
+
+    def __init__(self, stats_file=None):
+        self.stats_file = Path(stats_file or os.getenv("MODEL_STATS_FILE") or STATS_FILE)
+        self.lock_file = self.stats_file.with_suffix('.lock')
+        self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+        self._cache = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        if self.stats_file.exists():
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def snapshot(self):
+        """Estatísticas lidas do disco uma vez por processo"""
+        with self._lock:
+            if self._cache is None:
+                self._cache = self._read()
+            return self._cache
+
+    def observe(self, model, latency, ok):
+        """Registra uma chamada (latência em segundos ou None, sucesso ou erro)"""
+        with self._lock, open(self.lock_file, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                stats = self._read()
+                entry = stats.setdefault(model, {'latencies': [], 'errors': []})
+                if ok and latency is not None:
+                    entry['latencies'] = (entry['latencies'] + [round(latency, 3)])[-STATS_WINDOW:]
+                entry['errors'] = (entry['errors'] + [0 if ok else 1])[-STATS_WINDOW:]
+
+                tmp_file = self.stats_file.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f)
+                tmp_file.replace(self.stats_file)
+                self._cache = stats
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def p95(self, model):
+        """p95 de latência ou None sem amostras suficientes"""
+        latencies = sorted(self.snapshot().get(model, {}).get('latencies', []))
+        if len(latencies) < MIN_SAMPLES:
+            return None
+        return latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+
+    def error_rate(self, model):
+        errors = self.snapshot().get(model, {}).get('errors', [])
+        return sum(errors) / len(errors) if errors else 0.0
+
+
+class ModelRouter:
+    """Executa uma chamada de chat com failover e hedge entre modelos"""
+
+    def __init__(self, routes=None, stats=None, acquire=None):
+        """
+        Args:
+            acquire: Função que devolve o context manager do rate limit
+                     (ex: lambda: get_governor().acquire('openrouter')); a
+                     espera fica fora da latência medida do modelo
+        """
+        self.routes = routes or load_routes()
+        self.stats = stats or ModelStats()
+        self.acquire = acquire
+
+    def candidates(self, call_type):
+        """Modelos da rota, com os não saudáveis por último"""
+        models = self.routes[call_type]['models']
+        healthy = [m for m in models if self.stats.error_rate(m) <= UNHEALTHY_ERROR_RATE]
+        return healthy + [m for m in models if m not in healthy]
+
+    def _attempt(self, send, model, timeout, streaming=False, started=None):
+        """
+        Uma chamada, registrando latência/erro do modelo
+
+        `started` (threading.Event) é sinalizado quando o slot do rate
+        limit é obtido e a requisição sai de fato.
+        """
+        # Em streaming o chamador já segura o slot durante todo o stream
+        with (self.acquire() if self.acquire and not streaming else nullcontext()):
+            if started is not None:
+                started.set()
+            start = time.perf_counter()
+            try:
+                response = send(model, timeout)
+            except Exception:
+                self.stats.observe(model, time.perf_counter() - start, ok=False)
+                raise
+        # Em streaming só o início da resposta foi medido: não entra no p95
+        latency = None if streaming else time.perf_counter() - start
+        self.stats.observe(model, latency, ok=True)
+        return response
+
+    def complete(self, call_type, send, streaming=False):
+        """
+        Executa a chamada pela rota de call_type
+
+        Args:
+            call_type: 'script', 'visual_prompts' ou 'metadata'
+            send: Função (model, timeout) -> resposta
+            streaming: send devolve um stream; failover só cobre erros até
+                       o início da resposta e não há hedge
+
+        Returns:
+            (resposta, modelo que respondeu)
+        """
+        route = self.routes[call_type]
+        timeout = route.get('timeout', 30)
+        models = self.candidates(call_type)
+        errors = []
+        # Modelos já chamados (inclusive como hedge) não são repetidos
+        tried = set()
+
+        for index, model in enumerate(models):
+            if model in tried:
+                continue
+            tried.add(model)
+            alternate = next((m for m in models[index + 1:] if m not in tried), model)
+            try:
+                if route.get('hedge') and not streaming:
+                    return self._hedged(send, model, alternate, timeout, tried)
+                return self._attempt(send, model, timeout, streaming), model
+            except Exception as e:
+                errors.append(f"{model}: {e}")
+                metrics.record(llm_failovers=1)
+                print(f"⚠️ Modelo {model} falhou ({e}), tentando alternativa...")
+
+        raise Exception(f"Todos os modelos falharam para '{call_type}': {'; '.join(errors)}")
+
+    def _hedged(self, send, model, alternate, timeout, tried):
+        """
+        Envia para `model`; se não responder até o p95, envia também para
+        `alternate` (registrado em `tried`) e fica com a primeira resposta
+        bem-sucedida. O p95 conta a partir da saída da requisição: a espera
+        pelo rate limit não dispara o hedge. Os tokens da resposta perdedora
+        vão para as métricas quando ela chegar.
+        """
+        hedge_delay = self.stats.p95(model) or DEFAULT_HEDGE_DELAY
+        started = threading.Event()
+        primary = submit_with_context(_executor, self._attempt, send, model, timeout,
+                                      False, started)
+        futures = {primary: model}
+
+        # Falha ao obter o slot também encerra a espera
+        while not started.wait(0.1) and not primary.done():
+            pass
+
+        done, _ = wait(futures, timeout=hedge_delay)
+        if not done:
+            metrics.record(llm_hedged_requests=1)
+            tried.add(alternate)
+            futures[submit_with_context(_executor, self._attempt, send, alternate, timeout)] = alternate
+
+        pending = set(futures)
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    continue
+                for other in futures:
+                    if other is not future:
+                        other.add_done_callback(record_discarded_usage)
+                return future.result(), futures[future]
+
+        raise last_error
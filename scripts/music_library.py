@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Biblioteca de Músicas de Fundo
+Analisa as faixas de assets/music/ uma única vez e guarda num índice
+(assets/music/index.db), pela hash do arquivo: duração, medições de
+loudness (primeira passada do loudnorm) e uma cópia já decodificada em PCM.
+No render, a faixa é escolhida pela duração da narração e normalizada numa
+passada só, com as medições do índice. O processo reusa a mesma biblioteca
+(get_library) e só reexamina o diretório quando o mtime dele muda (faixa
+adicionada, removida ou renomeada); arquivos editados no lugar entram com
+`scan`.
+
+Uso:
+    python3 scripts/music_library.py scan            # analisa faixas novas/alteradas
+    python3 scripts/music_library.py list
+    python3 scripts/music_library.py pick --duration 58
+"""
+
+import os
+import re
+import sys
+import json
+import random
+import shutil
+import hashlib
+import sqlite3
+import threading
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+from pipeline_db import ThreadConnections
+
+BASE_DIR = Path(__file__).parent.parent
+ASSETS_DIR = BASE_DIR / "assets"
+DEFAULT_MUSIC_DIR = ASSETS_DIR / "music"
+
+AUDIO_SUFFIXES = ('.mp3', '.m4a', '.aac', '.wav', '.flac', '.ogg')
+
+# Loudness alvo da música (LUFS integrado): bem abaixo da narração (~-16)
+MUSIC_TARGET_LUFS = float(os.getenv("MUSIC_TARGET_LUFS", -30))
+MUSIC_TRUE_PEAK = -1.5
+MUSIC_LRA = 11
+
+# Formato da cópia decodificada (o mesmo usado na mixagem)
+PCM_SAMPLE_RATE = 44100
+PCM_CHANNELS = 2
+
+
+def file_hash(path):
+    """SHA-256 do conteúdo do arquivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def measure_loudness(audio_file):
+    """
+    Primeira passada do loudnorm (só medição)
+
+    Returns:
+        Dicionário com input_i, input_tp, input_lra, input_thresh e target_offset
+    """
+    cmd = [
+        'ffmpeg', '-hide_banner', '-nostats',
+        '-i', str(audio_file),
+        '-af', (f"loudnorm=I={MUSIC_TARGET_LUFS}:TP={MUSIC_TRUE_PEAK}:LRA={MUSIC_LRA}"
+                f":print_format=json"),
+        '-f', 'null', '-'
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    # O JSON é o último bloco {...} do stderr
+    match = re.search(r'\{[^{}]*\}\s*$', result.stderr)
+    if not match:
+        raise Exception(f"Medição de loudness não encontrada: {audio_file}")
+    data = json.loads(match.group(0))
+    return {key: float(data[key]) for key in
+            ('input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset')}
+
+
+def audio_duration(audio_file):
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        str(audio_file)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return float(result.stdout.strip())
+
+
+class MusicLibrary:
+    """Índice das faixas de fundo com loudness pré-medido"""
+
+    def __init__(self, music_dir=None):
+        """
+        Args:
+            music_dir: Diretório das faixas (padrão: MUSIC_DIR ou assets/music/)
+        """
+        self.music_dir = Path(music_dir or os.getenv("MUSIC_DIR") or DEFAULT_MUSIC_DIR)
+        self.cache_dir = self.music_dir / ".cache"
+        self.music_dir.mkdir(parents=True, exist_ok=True)
+        self._connect = ThreadConnections(self.music_dir / "index.db", row_factory=sqlite3.Row)
+        self._scanned_mtime = None
+        self._scan_lock = threading.Lock()
+        self._create_schema()
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tracks (
+                sha256 TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                duration REAL NOT NULL,
+                input_i REAL NOT NULL,
+                input_tp REAL NOT NULL,
+                input_lra REAL NOT NULL,
+                input_thresh REAL NOT NULL,
+                target_offset REAL NOT NULL,
+                target_lufs REAL NOT NULL,
+                pcm_file TEXT,
+                analyzed_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_tracks_path ON tracks (path);
+        """)
+        conn.commit()
+
+    def track_files(self):
+        return sorted(path for path in self.music_dir.iterdir()
+                      if path.is_file() and path.suffix.lower() in AUDIO_SUFFIXES)
+
+    def scan(self):
+        """
+        Analisa faixas novas ou alteradas e remove as que sumiram
+
+        Faixas já indexadas (mesmo caminho, tamanho e data) custam só um
+        stat; a análise completa roda uma vez por conteúdo.
+
+        Returns:
+            Quantidade de faixas analisadas agora
+        """
+        conn = self._connect()
+        known = {row['path']: row for row in conn.execute("SELECT * FROM tracks")}
+        present = set()
+        kept = set()
+        analyzed = 0
+
+        for path in self.track_files():
+            present.add(str(path))
+            stat = path.stat()
+            row = known.get(str(path))
+            if (row and row['size'] == stat.st_size and row['mtime'] == stat.st_mtime
+                    and row['target_lufs'] == MUSIC_TARGET_LUFS):
+                kept.add(row['sha256'])
+                continue
+
+            sha256 = file_hash(path)
+            existing = conn.execute("SELECT * FROM tracks WHERE sha256 = ?", (sha256,)).fetchone()
+            if existing and existing['target_lufs'] == MUSIC_TARGET_LUFS:
+                # Mesmo conteúdo (arquivo renomeado/tocado): só atualiza o caminho
+                with conn:
+                    conn.execute("UPDATE tracks SET path = ?, size = ?, mtime = ? WHERE sha256 = ?",
+                                 (str(path), stat.st_size, stat.st_mtime, sha256))
+                kept.add(sha256)
+                continue
+
+            print(f"🎵 Analisando {path.name}...")
+            try:
+                if row and row['sha256'] != sha256:
+                    # Conteúdo do arquivo mudou: a entrada antiga não vale mais
+                    with conn:
+                        conn.execute("DELETE FROM tracks WHERE sha256 = ?", (row['sha256'],))
+                self._analyze(conn, path, sha256, stat)
+                kept.add(sha256)
+                analyzed += 1
+            except Exception as e:
+                print(f"⚠️ Faixa ignorada ({path.name}): {e}")
+
+        removed = [row for path, row in known.items()
+                   if path not in present and row['sha256'] not in kept]
+        if removed:
+            with conn:
+                for row in removed:
+                    conn.execute("DELETE FROM tracks WHERE sha256 = ?", (row['sha256'],))
+                    if row['pcm_file']:
+                        Path(row['pcm_file']).unlink(missing_ok=True)
+
+        return analyzed
+
+    def scan_if_changed(self):
+        """
+        scan() só se o diretório mudou desde a última verificação
+
+        Returns:
+            True se o diretório foi reexaminado
+        """
+        with self._scan_lock:
+            mtime = self.music_dir.stat().st_mtime_ns
+            if mtime == self._scanned_mtime:
+                return False
+            self.scan()
+            self._scanned_mtime = mtime
+            return True
+
+    def _analyze(self, conn, path, sha256, stat):
+        """Duração, loudness e cópia PCM de uma faixa"""
+        duration = audio_duration(path)
+        loudness = measure_loudness(path)
+
+        # Cópia decodificada: o render lê PCM direto, sem decodificar/reamostrar
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        pcm_file = self.cache_dir / f"{sha256}.wav"
+        if not pcm_file.exists():
+            tmp_file = pcm_file.with_suffix('.tmp.wav')
+            cmd = [
+                'ffmpeg', '-i', str(path),
+                '-vn', '-c:a', 'pcm_s16le',
+                '-ar', str(PCM_SAMPLE_RATE), '-ac', str(PCM_CHANNELS),
+                '-y', str(tmp_file)
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+            tmp_file.replace(pcm_file)
+
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha256, str(path), stat.st_size, stat.st_mtime, duration,
+                 loudness['input_i'], loudness['input_tp'], loudness['input_lra'],
+                 loudness['input_thresh'], loudness['target_offset'], MUSIC_TARGET_LUFS,
+                 str(pcm_file), datetime.now().isoformat())
+            )
+
+    def tracks(self):
+        return [dict(row) for row in
+                self._connect().execute("SELECT * FROM tracks ORDER BY duration")]
+
+    def pick(self, duration):
+        """
+        Escolhe uma faixa para uma narração de `duration` segundos
+
+        Sorteia entre as faixas que cobrem a narração inteira; se nenhuma
+        cobrir, usa a mais longa em loop.
+
+        Returns:
+            {'file', 'filter', 'loop', 'name'} ou None se a biblioteca está vazia
+        """
+        if shutil.which('ffmpeg'):
+            self.scan_if_changed()
+        tracks = [t for t in self.tracks()
+                  if Path(t['pcm_file'] or t['path']).exists()]
+        if not tracks:
+            return None
+
+        fitting = [t for t in tracks if t['duration'] >= duration]
+        track = random.choice(fitting) if fitting else tracks[-1]
+        return {
+            'name': Path(track['path']).name,
+            'file': track['pcm_file'] or track['path'],
+            'filter': self.loudnorm_filter(track),
+            'loop': not fitting
+        }
+
+    @staticmethod
+    def loudnorm_filter(track):
+        """loudnorm em passada única (linear) com as medições do índice"""
+        return (
+            f"loudnorm=I={track['target_lufs']}:TP={MUSIC_TRUE_PEAK}:LRA={MUSIC_LRA}"
+            f":measured_I={track['input_i']}:measured_TP={track['input_tp']}"
+            f":measured_LRA={track['input_lra']}:measured_thresh={track['input_thresh']}"
+            f":offset={track['target_offset']}:linear=true,"
+            # loudnorm trabalha internamente a 192 kHz
+            f"aresample={PCM_SAMPLE_RATE}"
+        )
+
+
+_libraries = {}
+_libraries_lock = threading.Lock()
+
+
+def get_library(music_dir=None):
+    """Biblioteca compartilhada pelo processo (uma por diretório)"""
+    music_dir = Path(music_dir or os.getenv("MUSIC_DIR") or DEFAULT_MUSIC_DIR)
+    with _libraries_lock:
+        if music_dir not in _libraries:
+            _libraries[music_dir] = MusicLibrary(music_dir)
+        return _libraries[music_dir]
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Biblioteca de músicas de fundo')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('scan', help='Analisa faixas novas ou alteradas')
+    subparsers.add_parser('list', help='Lista as faixas indexadas')
+    pick_parser = subparsers.add_parser('pick', help='Mostra a faixa escolhida para uma duração')
+    pick_parser.add_argument('--duration', type=float, required=True, help='Duração da narração')
+
+    args = parser.parse_args()
+    library = MusicLibrary()
+
+    if args.command == 'scan':
+        if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
+            print("❌ FFmpeg não está instalado! Instale com: sudo apt install ffmpeg")
+            sys.exit(1)
+        analyzed = library.scan()
+        print(f"✅ {analyzed} faixa(s) analisada(s), {len(library.tracks())} no índice")
+    elif args.command == 'list':
+        for track in library.tracks():
+            print(f"{Path(track['path']).name}: {track['duration']:.0f}s, "
+                  f"{track['input_i']:.1f} LUFS")
+    else:
+        choice = library.pick(args.duration)
+        print(json.dumps(choice, ensure_ascii=False, indent=2) if choice
+              else "⚠️ Biblioteca vazia (adicione faixas em assets/music/)")
+
+
+if __name__ == "__main__":
+    main()
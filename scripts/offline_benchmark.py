@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Benchmark Offline do Pipeline
+Executa ContentGenerator, VoiceGenerator, VideoCompiler e YouTubeUploader
+de ponta a ponta contra servidores locais que imitam as APIs externas:
+- OpenRouter: endpoint de chat compatível com OpenAI
+- ElevenLabs: text-to-speech servindo áudio gerado localmente
+- YouTube: protocolo de upload resumable da Data API
+
+Latência e taxa de erro de cada servidor são configuráveis, e o relatório
+mostra percentis de latência por etapa e vídeos/hora.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+
+STAGES = ['conteudo', 'narracao', 'video', 'upload']
+
+# Roteiro devolvido pelo servidor falso (~150 palavras, como um roteiro real)
+FAKE_SCRIPT = (
+    "Era uma noite fria quando tudo começou. Ninguém imaginava o que estava por vir. "
+    "As ruas estavam vazias, e o silêncio parecia esconder um segredo terrível. "
+    "Durante semanas, a polícia seguiu pistas que levavam a lugar nenhum. "
+    "Testemunhas se contradiziam. Provas desapareciam. E o medo crescia a cada dia. "
+    "Até que uma carta anônima chegou à redação de um jornal local. "
+    "Dentro dela, detalhes que apenas o culpado poderia conhecer. "
+    "Os investigadores correram contra o tempo, mas o rastro esfriou novamente. "
+    "Anos depois, o caso ainda assombra quem o acompanhou de perto. "
+    "Os arquivos continuam abertos, e as perguntas continuam sem resposta. "
+    "Quem estava por trás de tudo? E por que nunca foi encontrado? "
+    "Talvez a verdade esteja mais perto do que imaginamos. "
+    "E você, o que acha que realmente aconteceu naquela noite?"
+)
+
+FAKE_VISUAL_PROMPTS = "\n".join(
+    f"{i}. Cinematic dark atmosphere, film noir, dramatic lighting, scene {i}, photorealistic 8k"
+    for i in range(1, 5)
+)
+
+FAKE_METADATA = (
+    "TÍTULO: O Segredo Que Ninguém Conseguiu Revelar\n"
+    "DESCRIÇÃO: Um caso que até hoje desafia os investigadores.\n"
+    "HASHTAGS: #truecrime #casospoliciais #misterio #crime #investigacao #dark #shorts #historia"
+)
+
+
+class FaultInjector:
+    """Latência e erros configuráveis para um servidor falso"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    def delay(self):
+        latency = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def should_fail(self):
+        return random.random() < self.error_rate
+
+
+class FakeServer:
+    """Servidor HTTP local em thread própria"""
+
+    def __init__(self, handler_class, faults=None):
+        self.faults = faults or FaultInjector()
+        handler_class.faults = self.faults
+        handler_class.state = {}
+        handler_class.state_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Base dos handlers: leitura de corpo, respostas e injeção de falhas"""
+
+    faults = None
+    protocol_version = 'HTTP/1.1'
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def send(self, status, body=b'', content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def inject_faults(self):
+        """Aplica latência; retorna True se respondeu com erro injetado"""
+        self.faults.delay()
+        if self.faults.should_fail():
+            self.send(503, {'error': {'message': 'Erro injetado pelo benchmark'}})
+            return True
+        return False
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOpenRouterHandler(FakeHandler):
+    """POST /chat/completions no formato da API da OpenAI (com ou sem stream)"""
+
+    # Velocidade de geração simulada em palavras por segundo (0 = instantâneo)
+    tokens_per_second = 0
+
+    def do_POST(self):
+        request = json.loads(self.read_body() or b'{}')
+        if self.inject_faults():
+            return
+
+        # As instruções ficam na mensagem system (prefixo estático)
+        prompt = '\n'.join(m['content'] for m in request['messages'])
+        if 'PROMPTS' in prompt:
+            content = FAKE_VISUAL_PROMPTS
+        elif 'metadados' in prompt:
+            content = FAKE_METADATA
+        else:
+            content = FAKE_SCRIPT
+
+        prompt_tokens = sum(len(m['content']) for m in request['messages']) // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+
+        if request.get('stream'):
+            self.send_stream(request, content, usage)
+            return
+
+        if self.tokens_per_second:
+            time.sleep(len(content.split()) / self.tokens_per_second)
+
+        self.send(200, {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage
+        })
+
+    def send_stream(self, request, content, usage):
+        """Resposta em Server-Sent Events, uma palavra por chunk"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def event(choices, usage=None):
+            data = {
+                'id': chunk_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': request.get('model', 'fake'),
+                'choices': choices,
+                'usage': usage
+            }
+            payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(payload):X}\r\n".encode() + payload + b"\r\n")
+            self.wfile.flush()
+
+        words = content.split(' ')
+        for index, word in enumerate(words):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            text = word if index == 0 else ' ' + word
+            event([{'index': 0, 'delta': {'content': text}, 'finish_reason': None}])
+        event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        event([], usage)
+
+        done = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(done):X}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+
+def generate_mp3(duration):
+    """
+    Gera MP3 de `duration` segundos (tom baixo via FFmpeg)
+
+    Sem FFmpeg, monta frames MPEG-1 Layer III de silêncio manualmente.
+    """
+    if shutil.which('ffmpeg'):
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-f', 'lavfi',
+             '-i', f'sine=frequency=110:duration={duration:.2f}',
+             '-c:a', 'libmp3lame', '-b:a', '64k', '-f', 'mp3', '-'],
+            capture_output=True, check=True
+        )
+        return result.stdout
+
+    # 128 kbps, 44.1 kHz, mono: 417 bytes por frame, 1152 amostras por frame
+    frame = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+    frames = int(duration * 44100 / 1152)
+    return frame * frames
+
+
+class FakeElevenLabsHandler(FakeHandler):
+    """POST /text-to-speech/{voice_id}: devolve MP3 com duração proporcional ao texto"""
+
+    # ~2.5 palavras por segundo, como uma narração real
+    WORDS_PER_SECOND = 2.5
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/voices':
+            self.send(200, {'voices': [{'voice_id': 'fake', 'name': 'Fake'}]})
+        else:
+            self.send(404, {'detail': 'not found'})
+
+    def do_POST(self):
+        request = json.loads(self.read_body() or b'{}')
+        if self.inject_faults():
+            return
+
+        duration = max(1.0, len(request.get('text', '').split()) / self.WORDS_PER_SECOND)
+        # Cache por duração (em décimos): gerar MP3 custa tempo do servidor, não do cliente
+        key = round(duration, 1)
+        with self.state_lock:
+            audio = self.state.get(key)
+            if audio is None:
+                audio = self.state[key] = generate_mp3(key)
+
+        self.send(200, audio, content_type='audio/mpeg')
+
+
+class FakeYouTubeHandler(FakeHandler):
+    """
+    Upload resumable da YouTube Data API
+
+    POST /upload/youtube/v3/videos?uploadType=resumable abre a sessão;
+    PUT na URI da sessão envia partes (Content-Range) e responde 308 até
+    o último byte, quando devolve o recurso do vídeo.
+    """
+
+    def do_POST(self):
+        self.read_body()
+        if not self.path.startswith('/upload/youtube/v3/videos'):
+            self.send(404, {'error': {'message': 'not found'}})
+            return
+        if self.inject_faults():
+            return
+
+        session_id = uuid.uuid4().hex
+        with self.state_lock:
+            self.state[session_id] = 0
+
+        host, port = self.server.server_address
+        self.send(200, b'', headers={
+            'Location': f"http://{host}:{port}/upload/session/{session_id}"
+        })
+
+    def do_PUT(self):
+        body = self.read_body()
+        session_id = self.path.rsplit('/', 1)[-1]
+
+        with self.state_lock:
+            received = self.state.get(session_id)
+        if received is None:
+            self.send(404, {'error': {'message': 'session not found'}})
+            return
+
+        # Content-Range: bytes a-b/total ou bytes */total (consulta de status)
+        content_range = self.headers.get('Content-Range', '')
+        range_part, _, total = content_range.replace('bytes ', '').partition('/')
+        total = int(total) if total.isdigit() else None
+
+        if range_part != '*':
+            if self.inject_faults():
+                return
+            start = int(range_part.split('-')[0])
+            if start == received:
+                received += len(body)
+                with self.state_lock:
+                    self.state[session_id] = received
+
+        if total is not None and received >= total:
+            self.send(200, {'id': session_id[:11], 'kind': 'youtube#video'})
+        else:
+            headers = {'Range': f"bytes=0-{received - 1}"} if received else {}
+            self.send(308, b'', headers=headers)
+
+
+def percentile(values, p):
+    """Percentil por interpolação linear"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+class OfflineBenchmark:
+    """Executa o pipeline contra os servidores falsos"""
+
+    def __init__(self, videos=5, workers=1, latency_ms=None, error_rate=0.0,
+                 chunk_size=None, llm_tokens_per_second=0, streaming=False):
+        """
+        Args:
+            videos: Número de vídeos a produzir
+            workers: Vídeos processados em paralelo
+            latency_ms: Latência por serviço ({'openrouter': 800, ...})
+            error_rate: Fração de requisições que respondem 503
+            chunk_size: Tamanho da parte do upload em bytes
+            llm_tokens_per_second: Velocidade de geração do LLM falso (0 = instantâneo)
+            streaming: Narra o roteiro em streaming (pipeline --streaming)
+        """
+        self.videos = videos
+        self.workers = workers
+        self.streaming = streaming
+        FakeOpenRouterHandler.tokens_per_second = llm_tokens_per_second
+        latency_ms = latency_ms or {}
+        self.servers = {
+            'openrouter': FakeServer(FakeOpenRouterHandler, FaultInjector(
+                latency_ms.get('openrouter', 0), latency_ms.get('openrouter', 0) * 0.2, error_rate)),
+            'elevenlabs': FakeServer(FakeElevenLabsHandler, FaultInjector(
+                latency_ms.get('elevenlabs', 0), latency_ms.get('elevenlabs', 0) * 0.2, error_rate)),
+            'youtube': FakeServer(FakeYouTubeHandler, FaultInjector(
+                latency_ms.get('youtube', 0), latency_ms.get('youtube', 0) * 0.2, error_rate)),
+        }
+        self.chunk_size = chunk_size
+        self.timings = {stage: [] for stage in STAGES}
+        self.skipped = set()
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def _configure(self, workdir):
+        """Aponta as etapas para os servidores falsos e para um diretório temporário"""
+        import content_generator
+        import voice_generator
+        import video_compiler
+
+        os.environ['OPENROUTER_BASE_URL'] = self.servers['openrouter'].url
+        os.environ['OPENROUTER_API_KEY'] = 'fake'
+        os.environ['ELEVENLABS_BASE_URL'] = self.servers['elevenlabs'].url
+        os.environ['ELEVENLABS_API_KEY'] = 'fake'
+        os.environ['METRICS_FILE'] = str(workdir / 'metrics.jsonl')
+        os.environ['LOG_FILE'] = str(workdir / 'pipeline.jsonl')
+        os.environ['RATE_LIMIT_DB'] = str(workdir / 'rate_limits.db')
+        os.environ['MODEL_STATS_FILE'] = str(workdir / 'model_stats.json')
+        os.environ['SCRIPT_POOL_DIR'] = str(workdir / 'script_pool')
+        os.environ['DEDUP_INDEX_DB'] = str(workdir / 'dedup_index.db')
+        os.environ['CASES_DB'] = str(workdir / 'data' / 'casos.db')
+        # O LLM falso devolve sempre o mesmo roteiro: não rejeita duplicatas
+        os.environ['DEDUP_THRESHOLD'] = '1.01'
+
+        output_dir = workdir / 'output'
+        data_dir = workdir / 'data'
+        output_dir.mkdir()
+        data_dir.mkdir()
+        shutil.copy(DATA_DIR / 'casos_policiais.json', data_dir)
+
+        # Isola o benchmark dos dados reais (casos usados, pacotes em output/)
+        for module in (content_generator, voice_generator, video_compiler):
+            module.OUTPUT_DIR = output_dir
+        content_generator.DATA_DIR = data_dir
+
+    def _youtube_service(self):
+        """Serviço YouTube apontando para o servidor falso, sem OAuth"""
+        from google.auth.credentials import AnonymousCredentials
+        from googleapiclient.discovery import build
+
+        return build('youtube', 'v3', credentials=AnonymousCredentials(),
+                     static_discovery=True, cache_discovery=False,
+                     client_options={'api_endpoint': self.servers['youtube'].url})
+
+    def _upload(self, uploader, package_file):
+        """Upload com os metadados do pacote (sem a etapa de OAuth)"""
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+
+        return uploader.upload_video(
+            video_file=package['video_file'],
+            title=package['metadata'].get('titulo', package['caso_titulo']),
+            description=package['metadata'].get('descricao', ''),
+            privacy_status='private',
+            package_file=package_file
+        )
+
+    def _timed(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        with self._lock:
+            self.timings[stage].append(time.perf_counter() - start)
+        return result
+
+    def run_one(self, index):
+        """Produz um vídeo completo"""
+        from content_generator import ContentGenerator
+        from voice_generator import VoiceGenerator
+
+        try:
+            if self.streaming:
+                # Conteúdo e narração sobrepostos: o tempo total fica em 'conteudo'
+                package_file = self._timed('conteudo', ContentGenerator().generate_complete_content,
+                                           voice_generator=VoiceGenerator())
+            else:
+                package_file = self._timed('conteudo', ContentGenerator().generate_complete_content)
+                self._timed('narracao', VoiceGenerator().generate_from_content_package, package_file)
+
+            if 'video' in self.skipped:
+                return
+            from video_compiler import VideoCompiler
+            self._timed('video', VideoCompiler().compile_video_from_package, package_file)
+
+            if 'upload' in self.skipped:
+                return
+            from youtube_uploader import YouTubeUploader
+            uploader = YouTubeUploader(chunk_size=self.chunk_size)
+            uploader.youtube = self._youtube_service()
+            self._timed('upload', self._upload, uploader, package_file)
+        except Exception as e:
+            with self._lock:
+                self.errors.append(f"vídeo {index}: {e}")
+
+    def run(self):
+        """Executa o benchmark e retorna o relatório"""
+        if not shutil.which('ffmpeg'):
+            print("⚠️ FFmpeg não encontrado: etapas de vídeo e upload não serão medidas")
+            self.skipped.update({'video', 'upload'})
+        try:
+            import googleapiclient  # noqa: F401
+        except ImportError:
+            print("⚠️ google-api-python-client não instalado: etapa de upload não será medida")
+            self.skipped.add('upload')
+
+        for server in self.servers.values():
+            server.start()
+
+        workdir = Path(tempfile.mkdtemp(prefix='dark_bench_'))
+        try:
+            self._configure(workdir)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                list(executor.map(self.run_one, range(self.videos)))
+            elapsed = time.perf_counter() - start
+        finally:
+            for server in self.servers.values():
+                server.stop()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        completed = self.videos - len(self.errors)
+        return {
+            'videos': self.videos,
+            'workers': self.workers,
+            'completed': completed,
+            'elapsed_seconds': round(elapsed, 3),
+            'videos_per_hour': round(completed / elapsed * 3600, 1) if elapsed else 0.0,
+            'stages': {
+                stage: {
+                    'count': len(values),
+                    'p50': round(percentile(values, 50), 4),
+                    'p95': round(percentile(values, 95), 4),
+                    'p99': round(percentile(values, 99), 4),
+                    'max': round(max(values), 4) if values else 0.0,
+                }
+                for stage, values in self.timings.items() if stage not in self.skipped and values
+            },
+            'errors': self.errors
+        }
+
+
+def print_report(report):
+    print()
+    print(f"{'etapa':<12} {'n':>4} {'p50 (s)':>10} {'p95 (s)':>10} {'p99 (s)':>10} {'max (s)':>10}")
+    print("-" * 60)
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<12} {stats['count']:>4} {stats['p50']:>10.3f} {stats['p95']:>10.3f} "
+              f"{stats['p99']:>10.3f} {stats['max']:>10.3f}")
+    print()
+    print(f"📊 {report['completed']}/{report['videos']} vídeos em {report['elapsed_seconds']:.1f}s "
+          f"com {report['workers']} worker(s): {report['videos_per_hour']:.1f} vídeos/hora")
+    for error in report['errors']:
+        print(f"❌ {error}")
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark offline do pipeline')
+    parser.add_argument('--videos', type=int, default=5, help='Vídeos a produzir')
+    parser.add_argument('--workers', type=int, default=1, help='Vídeos em paralelo')
+    parser.add_argument('--llm-latency', type=float, default=0, help='Latência do OpenRouter (ms)')
+    parser.add_argument('--tts-latency', type=float, default=0, help='Latência da ElevenLabs (ms)')
+    parser.add_argument('--upload-latency', type=float, default=0,
+                        help='Latência do YouTube por requisição (ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fração de requisições com erro 503 (0.0 a 1.0)')
+    parser.add_argument('--llm-tps', type=float, default=0,
+                        help='Velocidade do LLM falso em palavras por segundo (0 = instantâneo)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Narra o roteiro em streaming, como o pipeline --streaming')
+    parser.add_argument('--chunk-mb', type=float, help='Tamanho da parte do upload (MB)')
+    parser.add_argument('--json', help='Salva o relatório neste arquivo')
+
+    args = parser.parse_args()
+
+    benchmark = OfflineBenchmark(
+        videos=args.videos,
+        workers=args.workers,
+        latency_ms={
+            'openrouter': args.llm_latency,
+            'elevenlabs': args.tts_latency,
+            'youtube': args.upload_latency
+        },
+        error_rate=args.error_rate,
+        chunk_size=int(args.chunk_mb * 1024 * 1024) if args.chunk_mb else None,
+        llm_tokens_per_second=args.llm_tps,
+        streaming=args.streaming
+    )
+    report = benchmark.run()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Retenção e Arquivamento de output/
+Mantém em output/ apenas pacotes recentes ou ainda não publicados. Pacotes
+publicados e antigos vão para o arquivo (um .zip por pacote, com JSON e
+perfis comprimidos e mídia armazenada sem recompressão), registrado em um
+índice que permite restaurá-los. O JSON do pacote fica em output/ como
+stub (com "archive_file"), para que o índice de duplicatas e a seleção
+de compilações continuem vendo o histórico completo.
+
+Também remove intermediários órfãos deixados por renders que falharam
+(bg_/title_, diretórios seg_/narr_/compilation_, compilações sem
+manifesto), locks de upload de pacotes que não existem mais e cartelas
+de título (assets/title_cards/) sem uso há mais de TITLE_CARD_DAYS.
+
+Uso:
+    python3 scripts/output_retention.py                 # aplica a política
+    python3 scripts/output_retention.py --dry-run       # só mostra o que faria
+    python3 scripts/output_retention.py restore video_20251203_100000
+"""
+
+import os
+import sys
+import json
+import fcntl
+import shutil
+import sqlite3
+import zipfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from title_cards import DEFAULT_CACHE_DIR as TITLE_CARDS_DIR
+
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "output"
+ARCHIVE_DIR = BASE_DIR / "archive"
+
+# Pacotes publicados ficam em output/ por este tempo
+DEFAULT_HOT_DAYS = 7
+
+# Cota de disco de output/ (0 = sem cota)
+DEFAULT_MAX_GB = 20
+
+# Intermediários mais novos que isto podem ser de um render em andamento
+ORPHAN_MIN_AGE_MINUTES = 60
+
+# Cartelas de título sem uso há mais que isto saem do cache (cada título
+# é usado por um vídeo só; o cache serve aos trechos e a re-renders)
+DEFAULT_TITLE_CARD_DAYS = 30
+
+PUBLISHED_STATUSES = ('publicado_youtube',)
+
+# Arquivos já comprimidos: vão para o zip sem recompressão
+STORED_SUFFIXES = ('.mp3', '.mp4', '.m4a', '.png', '.jpg')
+
+# Diretórios temporários de renders por trechos (video_compiler), narração
+# em streaming (voice_generator) e compilações (compilation_builder)
+ORPHAN_DIR_PATTERNS = ("seg_*", "narr_*", "compilation_*")
+
+# Campos de mídia removidos do stub (os arquivos estão no zip)
+MEDIA_KEYS = ('audio_file', 'video_file')
+
+
+def _size(path):
+    path = Path(path)
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+def _modified(path):
+    """Última modificação do arquivo ou de qualquer coisa dentro do diretório"""
+    path = Path(path)
+    times = [path.stat().st_mtime]
+    if path.is_dir():
+        times.extend(f.stat().st_mtime for f in path.rglob('*'))
+    return datetime.fromtimestamp(max(times))
+
+
+class OutputPackage:
+    """Pacote em output/ e os arquivos que pertencem a ele"""
+
+    def __init__(self, package_file, output_dir=None):
+        self.package_file = Path(package_file)
+        # Pacotes de outros canais ficam em output/<canal>/: o id inclui o canal
+        base = Path(output_dir) if output_dir else self.package_file.parent
+        self.package_id = self.package_file.relative_to(base).with_suffix('').as_posix()
+        with open(self.package_file, 'r', encoding='utf-8') as f:
+            self.data = json.load(f)
+
+    @property
+    def created_at(self):
+        try:
+            return datetime.strptime(self.data['timestamp'][:15], "%Y%m%d_%H%M%S")
+        except (KeyError, ValueError):
+            return datetime.fromtimestamp(self.package_file.stat().st_mtime)
+
+    @property
+    def hot_since(self):
+        """Início do período em que o pacote fica em output/ (restauração reinicia)"""
+        restored_at = self.data.get('restored_at')
+        return datetime.fromisoformat(restored_at) if restored_at else self.created_at
+
+    @property
+    def published(self):
+        return (self.data.get('status') in PUBLISHED_STATUSES
+                or bool(self.data.get('youtube_url')))
+
+    @property
+    def archived(self):
+        """Stub de pacote arquivado (só o JSON ficou em output/)"""
+        return bool(self.data.get('archive_file'))
+
+    def files(self):
+        """JSON, mídia e perfis do pacote que existem em disco"""
+        files = [self.package_file]
+        for key in MEDIA_KEYS:
+            if self.data.get(key):
+                path = self.package_file.parent / Path(self.data[key]).name
+                if path.exists():
+                    files.append(path)
+        profile_dir = self.package_file.parent / f"profile_{self.package_file.stem}"
+        if profile_dir.is_dir():
+            files.append(profile_dir)
+        return files
+
+    def size(self):
+        return sum(_size(f) for f in self.files())
+
+
+class ArchiveIndex:
+    """Índice SQLite dos pacotes arquivados (archive/index.db)"""
+
+    def __init__(self, archive_dir):
+        self.db_file = Path(archive_dir) / "index.db"
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file), timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS packages (
+                package_id TEXT PRIMARY KEY,
+                archive_file TEXT NOT NULL,
+                caso_titulo TEXT,
+                status TEXT,
+                youtube_url TEXT,
+                created_at TEXT,
+                archived_at TEXT NOT NULL,
+                original_bytes INTEGER NOT NULL,
+                archive_bytes INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def add(self, package, archive_file, original_bytes):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (package.package_id, str(archive_file), package.data.get('caso_titulo'),
+                 package.data.get('status'), package.data.get('youtube_url'),
+                 package.created_at.isoformat(), datetime.now().isoformat(),
+                 original_bytes, Path(archive_file).stat().st_size)
+            )
+
+    def get(self, package_id):
+        self.conn.row_factory = sqlite3.Row
+        row = self.conn.execute(
+            "SELECT * FROM packages WHERE package_id = ?", (package_id,)).fetchone()
+        return dict(row) if row else None
+
+    def remove(self, package_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM packages WHERE package_id = ?", (package_id,))
+
+    def stats(self):
+        count, original, archived = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(original_bytes), 0), "
+            "COALESCE(SUM(archive_bytes), 0) FROM packages"
+        ).fetchone()
+        return {'packages': count, 'original_bytes': original, 'archive_bytes': archived}
+
+
+class RetentionManager:
+    """Aplica a política de retenção em output/"""
+
+    def __init__(self, output_dir=None, archive_dir=None, hot_days=None, max_gb=None,
+                 dry_run=False, title_cards_dir=None, title_card_days=None):
+        """
+        Args:
+            output_dir: Diretório de saída do pipeline
+            archive_dir: Camada de arquivo (pode estar em outro disco)
+            hot_days: Dias que pacotes publicados ficam em output/
+            max_gb: Cota de output/ em GB; acima dela, publicados são
+                    arquivados antes do prazo, do mais antigo ao mais novo
+            dry_run: Só mostra o que seria feito
+            title_cards_dir: Cache das cartelas de título
+            title_card_days: Dias sem uso até a cartela sair do cache
+        """
+        self.output_dir = Path(output_dir or OUTPUT_DIR)
+        self.archive_dir = Path(archive_dir or os.getenv("ARCHIVE_DIR") or ARCHIVE_DIR)
+        self.hot_days = hot_days if hot_days is not None else float(
+            os.getenv("OUTPUT_HOT_DAYS", DEFAULT_HOT_DAYS))
+        self.max_gb = max_gb if max_gb is not None else float(
+            os.getenv("OUTPUT_MAX_GB", DEFAULT_MAX_GB))
+        self.dry_run = dry_run
+        self.title_cards_dir = Path(title_cards_dir or os.getenv("TITLE_CARDS_DIR")
+                                    or TITLE_CARDS_DIR)
+        self.title_card_days = title_card_days if title_card_days is not None else float(
+            os.getenv("TITLE_CARD_DAYS", DEFAULT_TITLE_CARD_DAYS))
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = ArchiveIndex(self.archive_dir)
+        return self._index
+
+    def packages(self):
+        """
+        Pacotes em output/ (e nos diretórios dos canais), do mais antigo ao
+        mais novo, sem os stubs de pacotes já arquivados
+        """
+        packages = []
+        for package_file in self._glob("video_*.json"):
+            try:
+                package = OutputPackage(package_file, self.output_dir)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠️ Pacote ilegível ignorado: {package_file.name} ({e})")
+                continue
+            if not package.archived:
+                packages.append(package)
+        return sorted(packages, key=lambda p: p.created_at)
+
+    def _glob(self, pattern):
+        """Arquivos de output/ e de output/<canal>/"""
+        yield from self.output_dir.glob(pattern)
+        yield from self.output_dir.glob(f"*/{pattern}")
+
+    def sweep_orphans(self):
+        """
+        Remove intermediários de renders que não terminaram: vídeos bg_/title_,
+        diretórios temporários (seg_/narr_/compilation_), compilações sem
+        manifesto e locks de upload de pacotes removidos ou arquivados
+
+        Returns:
+            Bytes liberados
+        """
+        cutoff = datetime.now() - timedelta(minutes=ORPHAN_MIN_AGE_MINUTES)
+        orphans = [path for pattern in ("bg_*.mp4", "title_*.mp4")
+                   for path in self._glob(pattern)]
+        orphans += [path for pattern in ORPHAN_DIR_PATTERNS
+                    for path in self._glob(pattern) if path.is_dir()]
+        # Sem manifesto, a compilação não terminou (o JSON é gravado por último)
+        orphans += [path for path in self._glob("compilation_*.mp4")
+                    if not path.with_suffix('.json').exists()]
+
+        freed = 0
+        for path in orphans:
+            if _modified(path) > cutoff:
+                continue
+            freed += _size(path)
+            print(f"🧹 Intermediário órfão: {path.name}")
+            if self.dry_run:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+
+        for lock_file in self._glob("video_*.upload.lock"):
+            if _modified(lock_file) < cutoff and self._stale_upload_lock(lock_file):
+                print(f"🧹 Lock de upload sem pacote: {lock_file.name}")
+                if not self.dry_run:
+                    self._remove_lock(lock_file)
+        return freed
+
+    def _stale_upload_lock(self, lock_file):
+        """True se o pacote do lock foi removido ou arquivado (não terá mais upload)"""
+        package_file = lock_file.with_name(lock_file.name.replace('.upload.lock', '.json'))
+        try:
+            return OutputPackage(package_file, self.output_dir).archived
+        except FileNotFoundError:
+            return True
+        except (OSError, json.JSONDecodeError):
+            return False
+
+    def _remove_lock(self, lock_file):
+        """Remove o lock só se nenhum upload o estiver segurando"""
+        try:
+            with open(lock_file, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                lock_file.unlink(missing_ok=True)
+        except BlockingIOError:
+            pass
+
+    def sweep_title_cards(self):
+        """
+        Remove cartelas de título sem uso recente (o uso atualiza o mtime)
+        e diretórios temporários de rasterizações interrompidas
+
+        Returns:
+            Bytes liberados
+        """
+        if not self.title_cards_dir.exists():
+            return 0
+        card_cutoff = datetime.now() - timedelta(days=self.title_card_days)
+        tmp_cutoff = datetime.now() - timedelta(minutes=ORPHAN_MIN_AGE_MINUTES)
+        freed = 0
+        removed = 0
+        for path in self.title_cards_dir.iterdir():
+            modified = datetime.fromtimestamp(path.stat().st_mtime)
+            if path.is_dir():
+                if path.name.startswith('title_') and modified < tmp_cutoff:
+                    freed += _size(path)
+                    if not self.dry_run:
+                        shutil.rmtree(path, ignore_errors=True)
+                continue
+            if path.suffix == '.png' and modified < card_cutoff:
+                freed += path.stat().st_size
+                removed += 1
+                if not self.dry_run:
+                    path.unlink(missing_ok=True)
+        if removed:
+            print(f"🧹 {removed} cartela(s) de título sem uso há {self.title_card_days:g} dia(s)")
+        return freed
+
+    def archive(self, package):
+        """
+        Move o pacote para o arquivo e registra no índice
+
+        Mídia e perfis saem de output/; o JSON é substituído por um stub
+        (mesmos campos, sem os caminhos de mídia, com "archive_file").
+
+        Returns:
+            Bytes liberados em output/
+        """
+        original_bytes = package.size()
+        month_dir = self.archive_dir / package.created_at.strftime("%Y-%m")
+        archive_file = month_dir / f"{package.package_id}.zip"
+
+        print(f"📦 Arquivando {package.package_id} ({original_bytes / 1024 / 1024:.1f} MB)")
+        if self.dry_run:
+            return original_bytes
+
+        archive_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = archive_file.with_suffix('.zip.tmp')
+        with zipfile.ZipFile(tmp_file, 'w') as archive:
+            for path in package.files():
+                members = sorted(path.rglob('*')) if path.is_dir() else [path]
+                for member in members:
+                    if member.is_dir():
+                        continue
+                    compression = (zipfile.ZIP_STORED if member.suffix.lower() in STORED_SUFFIXES
+                                   else zipfile.ZIP_DEFLATED)
+                    archive.write(member, member.relative_to(self.output_dir),
+                                  compress_type=compression)
+        # Só remove de output/ depois que o zip está completo e indexado
+        tmp_file.replace(archive_file)
+        self.index.add(package, archive_file, original_bytes)
+
+        stub = {key: value for key, value in package.data.items() if key not in MEDIA_KEYS}
+        stub['archive_file'] = str(archive_file)
+        stub['archived_at'] = datetime.now().isoformat()
+        tmp_stub = package.package_file.with_suffix('.json.tmp')
+        with open(tmp_stub, 'w', encoding='utf-8') as f:
+            json.dump(stub, f, ensure_ascii=False, indent=2)
+
+        for path in package.files():
+            if path == package.package_file:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        tmp_stub.replace(package.package_file)
+
+        return original_bytes - _size(package.package_file)
+
+    def run(self):
+        """
+        Aplica a política: órfãos, pacotes publicados antigos, cota de disco
+        e cartelas de título sem uso
+
+        Returns:
+            Dicionário com o resumo da execução
+        """
+        freed = self.sweep_orphans()
+
+        packages = self.packages()
+        cutoff = datetime.now() - timedelta(days=self.hot_days)
+        archived = []
+
+        # 1. Idade: publicados fora do período quente
+        for package in packages:
+            if package.published and package.hot_since < cutoff:
+                freed += self.archive(package)
+                archived.append(package)
+
+        # 2. Cota: publicados ainda quentes, do mais antigo ao mais novo
+        used = _size(self.output_dir) - (freed if self.dry_run else 0)
+        quota = self.max_gb * 1024 ** 3
+        if quota:
+            for package in packages:
+                if used <= quota:
+                    break
+                # Restaurados manualmente ficam até o fim do período quente
+                if package in archived or not package.published or package.data.get('restored_at'):
+                    continue
+                size = self.archive(package)
+                freed += size
+                used -= size
+                archived.append(package)
+
+            if used > quota:
+                print(f"⚠️ output/ continua acima da cota ({used / 1024 ** 3:.1f} GB): "
+                      f"o restante são pacotes não publicados")
+
+        # 3. Cache de cartelas (fora de output/: não conta para a cota)
+        freed += self.sweep_title_cards()
+
+        return {
+            'archived': len(archived),
+            'freed_bytes': freed,
+            'output_bytes': used,
+            'dry_run': self.dry_run
+        }
+
+    def restore(self, package_id):
+        """
+        Restaura um pacote arquivado para output/
+
+        O JSON original substitui o stub e o pacote volta a contar o
+        período quente a partir da restauração.
+
+        Returns:
+            Path do pacote restaurado
+        """
+        entry = self.index.get(package_id)
+        if not entry:
+            raise Exception(f"Pacote não encontrado no arquivo: {package_id}")
+
+        archive_file = Path(entry['archive_file'])
+        with zipfile.ZipFile(archive_file) as archive:
+            archive.extractall(self.output_dir)
+
+        # Caminhos absolutos do pacote apontam para o output/ atual
+        package_file = self.output_dir / f"{package_id}.json"
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+        for key in MEDIA_KEYS:
+            if package.get(key):
+                package[key] = str(package_file.parent / Path(package[key]).name)
+        package['restored_at'] = datetime.now().isoformat()
+        with open(package_file, 'w', encoding='utf-8') as f:
+            json.dump(package, f, ensure_ascii=False, indent=2)
+
+        self.index.remove(package_id)
+        archive_file.unlink()
+        return package_file
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Retenção e arquivamento de output/')
+    parser.add_argument('command', nargs='?', choices=['run', 'restore', 'stats'], default='run')
+    parser.add_argument('package_id', nargs='?',
+                        help='Pacote a restaurar (ex: video_20251203_100000 ou canal/video_...)')
+    parser.add_argument('--hot-days', type=float, help='Dias que publicados ficam em output/')
+    parser.add_argument('--max-gb', type=float, help='Cota de output/ em GB (0 = sem cota)')
+    parser.add_argument('--archive-dir', help='Diretório do arquivo')
+    parser.add_argument('--title-card-days', type=float,
+                        help='Dias sem uso até a cartela de título sair do cache')
+    parser.add_argument('--dry-run', action='store_true', help='Só mostra o que seria feito')
+
+    args = parser.parse_args()
+
+    manager = RetentionManager(archive_dir=args.archive_dir, hot_days=args.hot_days,
+                               max_gb=args.max_gb, dry_run=args.dry_run,
+                               title_card_days=args.title_card_days)
+
+    if args.command == 'stats':
+        print(json.dumps(manager.index.stats(), ensure_ascii=False, indent=2))
+    elif args.command == 'restore':
+        if not args.package_id:
+            parser.error("informe o pacote a restaurar")
+        try:
+            package_file = manager.restore(Path(args.package_id).with_suffix('').as_posix())
+        except Exception as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ Pacote restaurado: {package_file}")
+    else:
+        result = manager.run()
+        prefix = "🔎 (simulação) " if result['dry_run'] else "✅ "
+        print(f"{prefix}{result['archived']} pacote(s) arquivado(s), "
+              f"{result['freed_bytes'] / 1024 / 1024:.1f} MB liberados, "
+              f"output/ com {result['output_bytes'] / 1024 ** 3:.2f} GB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Configuração em data/*.json
+Cada módulo tem padrões no código (DEFAULT_*) e um arquivo opcional em
+data/ que os sobrescreve. O caminho do arquivo vem do argumento, de uma
+variável de ambiente do módulo ou do padrão, nessa ordem.
+
+As sobrescritas são mescladas por chave, em qualquer profundidade: um
+arquivo com {"openrouter": {"rate": 2}} muda só "rate" e mantém os demais
+valores do provedor. Listas e valores simples são substituídos.
+"""
+
+import os
+import copy
+import json
+from pathlib import Path
+
+
+def config_path(default_file, env_var=None, config_file=None):
+    """Arquivo de configuração: argumento, variável de ambiente ou padrão"""
+    return Path(config_file or (env_var and os.getenv(env_var)) or default_file)
+
+
+def read_config(default_file, env_var=None, config_file=None):
+    """Conteúdo do arquivo de configuração ({} se não existir)"""
+    path = config_path(default_file, env_var, config_file)
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def merge_config(base, overrides):
+    """Mescla overrides em base (no lugar), dicionários por chave"""
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            merge_config(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def load_with_overrides(defaults, default_file, env_var=None, config_file=None):
+    """
+    Padrões + sobrescritas do arquivo de configuração
+
+    Args:
+        defaults: Padrões do módulo (não são alterados)
+        default_file: Arquivo padrão (ex: data/rate_limits.json)
+        env_var: Variável de ambiente que aponta para outro arquivo
+        config_file: Arquivo explícito (tem prioridade)
+
+    Returns:
+        Cópia dos padrões com as sobrescritas aplicadas
+    """
+    return merge_config(copy.deepcopy(defaults),
+                        read_config(default_file, env_var, config_file))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Conexões SQLite dos Índices Locais
+Fila de jobs, limites de taxa, casos, dedup, músicas e imagens guardam
+estado em arquivos SQLite usados por várias threads. sqlite3 não compartilha
+uma conexão entre threads, então cada thread abre a sua na primeira vez que
+precisa e a reaproveita depois.
+"""
+
+import sqlite3
+import threading
+
+# Espera pelo lock de escrita de outro processo/thread antes de desistir
+BUSY_TIMEOUT_SECONDS = 30
+
+
+class ThreadConnections:
+    """
+    Conexão por thread com um banco SQLite
+
+    Chamar o objeto devolve a conexão da thread atual:
+        self._connect = ThreadConnections(db_file, row_factory=sqlite3.Row)
+        conn = self._connect()
+    """
+
+    def __init__(self, db_file, row_factory=None, **connect_args):
+        """
+        Args:
+            db_file: Arquivo do banco
+            row_factory: Ex: sqlite3.Row (None = tuplas)
+            connect_args: Argumentos extras de sqlite3.connect
+                          (ex: isolation_level=None para BEGIN explícito)
+        """
+        self.db_file = str(db_file)
+        self.row_factory = row_factory
+        self.connect_args = {'timeout': BUSY_TIMEOUT_SECONDS, **connect_args}
+        self._local = threading.local()
+
+    def __call__(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, **self.connect_args)
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            self._local.conn = conn
+        return conn
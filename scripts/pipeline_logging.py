@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Logging Estruturado do Pipeline
+Um único subsistema de log para todos os scripts:
+- Registros em JSON lines com run_id, package_id e stage
+- Handler com fila (QueueHandler/QueueListener): quem loga não espera disco
+- Escrita em lote com lock de arquivo, segura com vários processos/workers
+- Rotação por tamanho e por dia
+"""
+
+import os
+import sys
+import json
+import fcntl
+import queue
+import atexit
+import socket
+import logging
+import threading
+import contextvars
+from pathlib import Path
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+BASE_DIR = Path(__file__).parent.parent
+LOGS_DIR = BASE_DIR / "logs"
+LOG_FILE = LOGS_DIR / "pipeline.jsonl"
+
+LOGGER_NAME = "dark"
+
+# Campos de contexto anexados a cada registro
+CONTEXT_FIELDS = ('run_id', 'package_id', 'stage')
+_context = contextvars.ContextVar('log_context', default={})
+
+_setup_lock = threading.Lock()
+_listener = None
+
+
+def set_log_context(**fields):
+    """Define campos de contexto (run_id, package_id, stage) para os próximos logs"""
+    context = dict(_context.get())
+    context.update({k: v for k, v in fields.items() if v is not None})
+    _context.set(context)
+
+
+def clear_log_context():
+    """Remove todos os campos de contexto"""
+    _context.set({})
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """
+    executor.submit() levando o contexto de log da thread atual
+
+    Threads de um ThreadPoolExecutor não herdam contextvars; sem isto os
+    logs das tarefas saem sem run_id/package_id.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class ContextFilter(logging.Filter):
+    """Copia o contexto atual para o registro (executado na thread de origem)"""
+
+    def filter(self, record):
+        context = _context.get()
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field))
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Formata registros como uma linha JSON"""
+
+    def __init__(self):
+        super().__init__()
+        self.host = socket.gethostname()
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'host': self.host,
+            'pid': record.process,
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Formato legível para o terminal: [data hora] mensagem"""
+
+    def __init__(self):
+        super().__init__("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+
+
+class LockedRotatingFileHandler(logging.Handler):
+    """
+    Handler de arquivo em lote, seguro entre processos
+
+    Acumula registros em memória e grava o lote de uma vez, com lock
+    exclusivo (fcntl) em um arquivo .lock ao lado do log. A rotação é
+    verificada dentro do mesmo lock, então vários processos podem
+    compartilhar o mesmo arquivo sem linhas misturadas.
+    """
+
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, capacity=100,
+                 flush_interval=2.0):
+        """
+        Args:
+            filename: Arquivo de log
+            max_bytes: Tamanho que dispara rotação
+            capacity: Registros acumulados antes de gravar
+            flush_interval: Segundos máximos que um registro fica em memória
+        """
+        super().__init__()
+        self.filename = Path(filename)
+        self.filename.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_file = self.filename.with_suffix(self.filename.suffix + '.lock')
+        self.max_bytes = max_bytes
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self._stop_flush = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self.lock:
+            self.buffer.append(line)
+            should_flush = len(self.buffer) >= self.capacity or record.levelno >= logging.ERROR
+
+        if should_flush:
+            self.flush()
+
+    def _flush_loop(self):
+        while not self._stop_flush.wait(self.flush_interval):
+            self.flush()
+
+    def _should_rollover(self):
+        try:
+            stat = self.filename.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size == 0:
+            return False
+        if stat.st_size >= self.max_bytes:
+            return True
+        # Rotação diária: o arquivo atual foi escrito em outro dia
+        return datetime.fromtimestamp(stat.st_mtime).date() != datetime.now().date()
+
+    def _rollover(self):
+        mtime = datetime.fromtimestamp(self.filename.stat().st_mtime)
+        stem, suffix = self.filename.stem, self.filename.suffix
+        target = self.filename.with_name(f"{stem}.{mtime.strftime('%Y%m%d-%H%M%S')}{suffix}")
+        counter = 1
+        while target.exists():
+            target = self.filename.with_name(
+                f"{stem}.{mtime.strftime('%Y%m%d-%H%M%S')}.{counter}{suffix}")
+            counter += 1
+        self.filename.rename(target)
+
+    def flush(self):
+        with self.lock:
+            lines, self.buffer = self.buffer, []
+        if not lines:
+            return
+
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        with open(self.lock_file, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self._should_rollover():
+                    self._rollover()
+                fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                finally:
+                    os.close(fd)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def close(self):
+        self._stop_flush.set()
+        self.flush()
+        super().close()
+
+
+def setup_logging(level=None, console=True, log_file=None):
+    """
+    Configura o logger "dark" (idempotente)
+
+    Returns:
+        Logger raiz do pipeline
+    """
+    global _listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+
+    with _setup_lock:
+        if _listener is not None:
+            return logger
+
+        level = level or os.getenv("LOG_LEVEL", "INFO")
+        logger.setLevel(level)
+        logger.propagate = False
+
+        # Terminal síncrono: mantém a ordem com os print() das etapas
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(ConsoleFormatter())
+            logger.addHandler(console_handler)
+
+        file_handler = LockedRotatingFileHandler(
+            log_file or os.getenv("LOG_FILE") or LOG_FILE,
+            max_bytes=int(os.getenv("LOG_MAX_MB", 50)) * 1024 * 1024
+        )
+        file_handler.setFormatter(JSONFormatter())
+
+        # Para o arquivo, o logger só enfileira; a thread do listener formata e grava
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        logger.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, file_handler)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+    return logger
+
+
+def shutdown_logging():
+    """Esvazia a fila e grava os registros pendentes"""
+    global _listener
+
+    with _setup_lock:
+        listener, _listener = _listener, None
+    if listener is None:
+        return
+
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    logging.getLogger(LOGGER_NAME).handlers.clear()
+
+
+def get_logger(name=None):
+    """Retorna logger do pipeline (configurando na primeira chamada)"""
+    setup_logging()
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Profiling do Pipeline (--profile)
+Envolve cada etapa em cProfile e separa o tempo de parede em:
+- CPU do Python (processo atual)
+- Espera por subprocessos (FFmpeg/ffprobe), com a CPU consumida por eles
+- Espera por sockets (HTTP para OpenRouter, ElevenLabs, YouTube)
+
+Gera, por etapa, um arquivo .prof (abre com snakeviz/pstats) e um
+relatório texto, mais uma tabela resumo para a execução.
+"""
+
+import io
+import json
+import time
+import pstats
+import cProfile
+import resource
+from pathlib import Path
+from datetime import datetime
+
+# Funções nativas em que a thread fica bloqueada em rede
+SOCKET_PATTERNS = ('_socket.socket', '_ssl._SSLSocket', 'getaddrinfo')
+
+# Quantas funções listar no relatório texto de cada etapa
+TOP_FUNCTIONS = 30
+
+
+def _child_cpu_seconds():
+    """CPU (user + sys) consumida por subprocessos já finalizados"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def classify_waits(stats):
+    """
+    Soma o tempo bloqueado em sockets e em subprocessos
+
+    Usa apenas funções-folha (tottime) para não contar o mesmo intervalo
+    duas vezes. Para subprocessos, conta waitpid e o select() feito por
+    Popen.communicate (via selectors, chamado a partir de subprocess.py).
+
+    Returns:
+        (segundos em sockets, segundos em subprocessos)
+    """
+    socket_wait = 0.0
+    subprocess_wait = 0.0
+
+    for (filename, _, funcname), (_, _, tottime, _, callers) in stats.stats.items():
+        if filename == '~':
+            # Função nativa: funcname é algo como "<method 'recv_into' of '_socket.socket' objects>"
+            if any(pattern in funcname for pattern in SOCKET_PATTERNS):
+                socket_wait += tottime
+            elif 'waitpid' in funcname:
+                subprocess_wait += tottime
+        elif filename.endswith('selectors.py') and funcname == 'select':
+            # Tempo acumulado só das chamadas vindas de subprocess.py
+            for (caller_file, _, _), (_, _, _, cumtime) in callers.items():
+                if caller_file.endswith('subprocess.py'):
+                    subprocess_wait += cumtime
+
+    return socket_wait, subprocess_wait
+
+
+class StageProfile:
+    """Perfil de uma etapa"""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.profiler = cProfile.Profile()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.child_cpu_start = _child_cpu_seconds()
+        self.profiler.enable()
+        self.summary = None
+
+    def stop(self):
+        self.profiler.disable()
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        child_cpu = _child_cpu_seconds() - self.child_cpu_start
+
+        stats = pstats.Stats(self.profiler)
+        socket_wait, subprocess_wait = classify_waits(stats)
+
+        self.summary = {
+            'stage': self.stage,
+            'wall_seconds': round(wall, 4),
+            'python_cpu_seconds': round(cpu, 4),
+            'subprocess_wait_seconds': round(subprocess_wait, 4),
+            'subprocess_cpu_seconds': round(child_cpu, 4),
+            'socket_wait_seconds': round(socket_wait, 4),
+            # Restante: outros bloqueios (disco, sleep, locks) e overhead do profiler
+            'other_seconds': round(max(wall - cpu - subprocess_wait - socket_wait, 0.0), 4),
+        }
+        return self.summary
+
+    def write(self, output_dir, prefix):
+        """Grava .prof e relatório texto da etapa"""
+        prof_file = output_dir / f"{prefix}_{self.stage}.prof"
+        self.profiler.dump_stats(str(prof_file))
+
+        report = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=report)
+        stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        with open(output_dir / f"{prefix}_{self.stage}.txt", 'w', encoding='utf-8') as f:
+            f.write(report.getvalue())
+
+        return prof_file
+
+
+class ProfileSession:
+    """
+    Perfis de todas as etapas de uma execução
+
+    Os artefatos ficam em memória até finish(), para que o diretório de
+    saída possa ser definido depois que o pacote for criado.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self._current = None
+        self.prefix = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    def start_stage(self, stage):
+        """Inicia perfil da etapa, encerrando a anterior"""
+        if not self.enabled:
+            return
+        self.end_stage()
+        self._current = StageProfile(stage)
+
+    def end_stage(self):
+        if self._current is None:
+            return
+        self._current.stop()
+        self.stages.append(self._current)
+        self._current = None
+
+    def finish(self, output_dir):
+        """
+        Grava os artefatos em output_dir
+
+        Returns:
+            Path do resumo ou None se o profiling está desligado
+        """
+        if not self.enabled:
+            return None
+        self.end_stage()
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for stage in self.stages:
+            stage.write(output_dir, self.prefix)
+
+        summaries = [stage.summary for stage in self.stages]
+        with open(output_dir / f"{self.prefix}_summary.json", 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
+
+        table = format_summary(summaries)
+        summary_file = output_dir / f"{self.prefix}_summary.txt"
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            f.write(table)
+
+        print(table)
+        print(f"🔬 Perfis salvos em: {output_dir}")
+        return summary_file
+
+
+def format_summary(summaries):
+    """Tabela resumo: para onde foi o tempo de cada etapa"""
+    header = (f"{'etapa':<12} {'parede':>9} {'cpu py':>9} {'subproc':>9} "
+              f"{'cpu sub':>9} {'socket':>9} {'outros':>9}")
+    lines = [header, "-" * len(header)]
+    for s in summaries:
+        lines.append(
+            f"{s['stage']:<12} {s['wall_seconds']:>8.2f}s {s['python_cpu_seconds']:>8.2f}s "
+            f"{s['subprocess_wait_seconds']:>8.2f}s {s['subprocess_cpu_seconds']:>8.2f}s "
+            f"{s['socket_wait_seconds']:>8.2f}s {s['other_seconds']:>8.2f}s"
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def profile_dir_for(package_file):
+    """Diretório de perfis ao lado do pacote: output/profile_<pacote>/"""
+    package_file = Path(package_file)
+    return package_file.parent / f"profile_{package_file.stem}"
+
+
+def run_profiled(stage, func, *args, package_file=None, **kwargs):
+    """
+    Executa func com perfil (usado pelo --profile dos scripts de etapa)
+
+    Se package_file não for informado, usa o valor retornado por func
+    (caso da geração de conteúdo, que cria o pacote).
+    """
+    session = ProfileSession()
+    session.start_stage(stage)
+    result = None
+    try:
+        result = func(*args, **kwargs)
+        return result
+    finally:
+        # Grava o perfil mesmo se a etapa falhar (quando o pacote é conhecido)
+        target = package_file or result
+        if target:
+            session.finish(profile_dir_for(target))
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Montagem dos Prompts do LLM
+Separa cada pedido em duas partes:
+- instruções (mensagem system): fixas do tipo de chamada e do canal,
+  nunca cortadas
+- campos variáveis (mensagem user): dados do caso e roteiro, sempre no fim
+
+Os tokens de cada pedido são contados antes do envio e, se passarem do
+orçamento do tipo de chamada, os campos cortáveis (resumo, roteiro) são
+encurtados. A contagem usa tiktoken, se estiver instalado; sem ele, uma
+estimativa pelo número de caracteres.
+
+Sobrescreva os orçamentos em data/prompt_budgets.json:
+    {"script": 800, "metadata": 250}
+
+Uso:
+    python3 scripts/prompt_builder.py    # mostra os orçamentos em vigor
+"""
+
+import json
+import threading
+from pathlib import Path
+
+from pipeline_config import load_with_overrides
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+BUDGETS_CONFIG = DATA_DIR / "prompt_budgets.json"
+
+# Orçamento de tokens do prompt (entrada) por tipo de chamada
+DEFAULT_BUDGETS = {
+    'script': 700,
+    'visual_prompts': 700,
+    # O roteiro só serve de contexto para o título: vai cortado
+    'metadata': 180,
+}
+
+# Tokenizador dos modelos atuais da OpenAI (gpt-4o*); para outros modelos
+# a contagem é uma aproximação próxima
+TIKTOKEN_ENCODING = "o200k_base"
+
+# Sem tiktoken: caracteres por token em português (estimativa conservadora)
+CHARS_PER_TOKEN = 3.5
+
+# Tokens de formatação de cada mensagem no formato de chat
+MESSAGE_OVERHEAD = 4
+
+TRUNCATION_MARK = "…"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Codificação do tiktoken (carregada uma vez) ou False se indisponível"""
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+            except Exception:
+                # Sem o pacote, ou sem rede para baixar o vocabulário
+                _encoding = False
+        return _encoding
+
+
+def count_tokens(text):
+    """Tokens de um texto (tiktoken ou estimativa)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def count_message_tokens(messages):
+    """Tokens de uma lista de mensagens de chat"""
+    return sum(count_tokens(m['content']) + MESSAGE_OVERHEAD for m in messages)
+
+
+def trim_to_tokens(text, max_tokens):
+    """
+    Encurta o texto para caber em max_tokens, cortando no fim de uma palavra
+
+    Returns:
+        Texto original, se já couber, ou cortado com "…"
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    # Primeiro corte proporcional ao excesso; depois reduz 10% por vez
+    limit = int(len(text) * max_tokens / count_tokens(text))
+    while limit > 0:
+        cut = text[:limit]
+        if ' ' in cut:
+            cut = cut.rsplit(' ', 1)[0]
+        candidate = cut.rstrip(' ,.;:\n') + TRUNCATION_MARK
+        if count_tokens(candidate) <= max_tokens:
+            return candidate
+        limit = min(len(cut), int(limit * 0.9))
+    return ""
+
+
+def load_budgets(config_file=None):
+    """Orçamentos padrão + sobrescritas do arquivo de configuração"""
+    return load_with_overrides(DEFAULT_BUDGETS, BUDGETS_CONFIG, "PROMPT_BUDGETS_CONFIG", config_file)
+
+
+class Prompt:
+    """Pedido pronto para envio, com a contagem de tokens"""
+
+    def __init__(self, call_type, messages, tokens, prefix_tokens, budget, trimmed):
+        self.call_type = call_type
+        self.messages = messages
+        self.tokens = tokens
+        self.prefix_tokens = prefix_tokens
+        self.budget = budget
+        self.trimmed = trimmed
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.tokens > self.budget
+
+
+class PromptBuilder:
+    """Monta pedidos com instruções fixas e campos dentro do orçamento"""
+
+    def __init__(self, budgets=None):
+        """
+        Args:
+            budgets: Orçamento por tipo de chamada (padrão: DEFAULT_BUDGETS +
+                     data/prompt_budgets.json)
+        """
+        self.budgets = budgets if budgets is not None else load_budgets()
+
+    @staticmethod
+    def render_fields(fields, suffix):
+        lines = []
+        for label, value, _ in fields:
+            # Valores de várias linhas (roteiro) começam na linha seguinte
+            lines.append(f"{label}:\n{value}" if '\n' in value else f"{label}: {value}")
+        text = '\n'.join(lines)
+        return f"{text}\n\n{suffix}" if suffix else text
+
+    def build(self, call_type, prefix, fields, suffix=""):
+        """
+        Monta o pedido
+
+        Args:
+            call_type: Tipo de chamada (define o orçamento)
+            prefix: Instruções fixas (mensagem system); não entram no corte
+            fields: [(rótulo, valor, mínimo de tokens)] na ordem do prompt;
+                    mínimo None = campo não pode ser cortado
+            suffix: Texto fixo no fim da mensagem user (ex: "ROTEIRO:")
+
+        Returns:
+            Prompt
+        """
+        budget = self.budgets.get(call_type)
+        fields = [(label, str(value), minimum) for label, value, minimum in fields]
+
+        def messages_for(fields):
+            return [
+                {"role": "system", "content": prefix},
+                {"role": "user", "content": self.render_fields(fields, suffix)}
+            ]
+
+        messages = messages_for(fields)
+        tokens = count_message_tokens(messages)
+        trimmed = []
+
+        if budget is not None and tokens > budget:
+            excess = tokens - budget
+            # Corta primeiro os campos maiores, respeitando o mínimo de cada um
+            cuttable = sorted((i for i, field in enumerate(fields) if field[2] is not None),
+                              key=lambda i: -count_tokens(fields[i][1]))
+            for index in cuttable:
+                if excess <= 0:
+                    break
+                label, value, minimum = fields[index]
+                size = count_tokens(value)
+                target = max(minimum, size - excess)
+                if target >= size:
+                    continue
+                value = trim_to_tokens(value, target)
+                fields[index] = (label, value, minimum)
+                excess -= size - count_tokens(value)
+                trimmed.append(label)
+
+            messages = messages_for(fields)
+            tokens = count_message_tokens(messages)
+
+        return Prompt(call_type, messages, tokens,
+                      prefix_tokens=count_tokens(prefix) + MESSAGE_OVERHEAD,
+                      budget=budget, trimmed=trimmed)
+
+
+if __name__ == "__main__":
+    print(json.dumps(load_budgets(), ensure_ascii=False, indent=2))
+    print(f"Contagem: {'tiktoken' if _get_encoding() else 'estimativa'}")
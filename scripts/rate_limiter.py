@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Governador de Rate Limit entre Workers
+Token buckets e semáforos de concorrência por provedor (OpenRouter,
+ElevenLabs, YouTube, geração de imagens), compartilhados entre processos por um arquivo SQLite.
+Toda chamada externa deve passar por acquire() antes de sair.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+import metrics
+from pipeline_config import load_with_overrides
+from pipeline_db import ThreadConnections
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+DEFAULT_LIMITS_DB = DATA_DIR / "rate_limits.db"
+LIMITS_CONFIG = DATA_DIR / "rate_limits.json"
+
+# Limites padrão (conservadores). Sobrescreva em data/rate_limits.json:
+#   rate/burst: requisições por segundo e rajada máxima
+#   units_rate/units_burst: unidades por segundo (ex: caracteres da ElevenLabs)
+#   concurrency: chamadas simultâneas; lease_seconds: validade do slot se o
+#   processo morrer sem liberar
+DEFAULT_LIMITS = {
+    'openrouter': {'rate': 2.0, 'burst': 5, 'concurrency': 8, 'lease_seconds': 300},
+    'elevenlabs': {'rate': 1.0, 'burst': 3, 'concurrency': 2, 'lease_seconds': 300,
+                   'units_rate': None, 'units_burst': None},
+    'youtube': {'rate': 1.0, 'burst': 2, 'concurrency': 3, 'lease_seconds': 7200},
+    'images': {'rate': 1.0, 'burst': 4, 'concurrency': 4, 'lease_seconds': 300},
+}
+
+# Intervalo máximo entre novas tentativas enquanto espera token; slots de
+# concorrência são verificados com mais frequência (liberação é imprevisível)
+MAX_POLL_SECONDS = 1.0
+CONCURRENCY_POLL_SECONDS = 0.25
+
+
+def load_limits(config_file=None):
+    """Limites padrão + sobrescritas do arquivo de configuração"""
+    return load_with_overrides(DEFAULT_LIMITS, LIMITS_CONFIG, "RATE_LIMITS_CONFIG", config_file)
+
+
+class RateGovernor:
+    """Controle de taxa e concorrência compartilhado via SQLite"""
+
+    def __init__(self, db_file=None, limits=None):
+        self.db_file = Path(db_file or os.getenv("RATE_LIMIT_DB") or DEFAULT_LIMITS_DB)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.limits = limits or load_limits()
+        self._connect = ThreadConnections(self.db_file, isolation_level=None)
+        self._create_schema()
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                id TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _refill(self, conn, name, rate, burst, now):
+        """Retorna tokens disponíveis no bucket após reabastecer"""
+        row = conn.execute(
+            "SELECT tokens, updated_at FROM buckets WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return float(burst)
+        tokens, updated_at = row
+        return min(float(burst), tokens + (now - updated_at) * rate)
+
+    def _try_acquire(self, provider, units):
+        """
+        Uma tentativa atômica de obter slot e tokens
+
+        Returns:
+            (lease_id, 0) em caso de sucesso ou (None, segundos sugeridos de espera)
+        """
+        limits = self.limits[provider]
+        buckets = [(provider, limits.get('rate'), limits.get('burst'), 1)]
+        if units and limits.get('units_rate'):
+            buckets.append((f"{provider}:units", limits['units_rate'],
+                            limits.get('units_burst') or limits['units_rate'], units))
+
+        conn = self._connect()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            wait = 0.0
+
+            # Semáforo: libera leases expirados e conta os ativos
+            concurrency = limits.get('concurrency')
+            if concurrency:
+                conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+                active = conn.execute(
+                    "SELECT COUNT(*) FROM leases WHERE provider = ?", (provider,)
+                ).fetchone()[0]
+                if active >= concurrency:
+                    wait = CONCURRENCY_POLL_SECONDS
+
+            levels = []
+            for name, rate, burst, cost in buckets:
+                if not rate:
+                    continue
+                tokens = self._refill(conn, name, rate, burst, now)
+                # Custo maior que a rajada: espera o bucket encher e fica devendo
+                required = min(cost, burst)
+                if tokens < required:
+                    wait = max(wait, (required - tokens) / rate)
+                levels.append((name, tokens, cost))
+
+            if wait > 0:
+                conn.execute("COMMIT")
+                return None, wait
+
+            for name, tokens, cost in levels:
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (name, tokens - cost, now)
+                )
+
+            lease_id = uuid.uuid4().hex
+            if concurrency:
+                conn.execute(
+                    "INSERT INTO leases (id, provider, expires_at) VALUES (?, ?, ?)",
+                    (lease_id, provider, now + limits.get('lease_seconds', 300))
+                )
+            conn.execute("COMMIT")
+            return lease_id, 0.0
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, lease_id):
+        """Libera o slot de concorrência"""
+        self._connect().execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+
+    @contextmanager
+    def acquire(self, provider, units=0, timeout=None):
+        """
+        Espera até poder chamar o provedor
+
+        Args:
+            provider: 'openrouter', 'elevenlabs', 'youtube' ou 'images'
+            units: Unidades extras consumidas (ex: caracteres do texto)
+            timeout: Espera máxima em segundos (None = sem limite)
+
+        Yields:
+            Segundos esperados por token/slot
+        """
+        if provider not in self.limits:
+            yield 0.0
+            return
+
+        start = time.perf_counter()
+        while True:
+            lease_id, wait = self._try_acquire(provider, units)
+            if lease_id:
+                break
+            waited = time.perf_counter() - start
+            if timeout is not None and waited + wait > timeout:
+                raise TimeoutError(f"Rate limit de {provider}: espera excedeu {timeout}s")
+            # Jitter evita que os workers acordem todos juntos
+            time.sleep(min(wait, MAX_POLL_SECONDS) * random.uniform(0.8, 1.2))
+
+        waited = time.perf_counter() - start
+        metrics.record(rate_limit_wait_seconds=waited, rate_limit_acquires=1)
+
+        try:
+            yield waited
+        finally:
+            self.release(lease_id)
+
+    def status(self):
+        """Tokens disponíveis e slots em uso por provedor"""
+        conn = self._connect()
+        now = time.time()
+        status = {}
+        for provider, limits in self.limits.items():
+            active = conn.execute(
+                "SELECT COUNT(*) FROM leases WHERE provider = ? AND expires_at >= ?",
+                (provider, now)
+            ).fetchone()[0]
+            entry = {'active': active, 'concurrency': limits.get('concurrency')}
+            if limits.get('rate'):
+                entry['tokens'] = round(self._refill(conn, provider, limits['rate'],
+                                                     limits['burst'], now), 2)
+            status[provider] = entry
+        return status
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """Governador compartilhado pelo processo"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = RateGovernor()
+        return _governor
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_governor().status(), ensure_ascii=False, indent=2))
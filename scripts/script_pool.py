@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Pool de Roteiros Pré-Gerados
+Mantém K pacotes de roteiro + prompts visuais + metadados prontos para
+casos ainda não usados, gerados em tempo ocioso. O pipeline consome o pool
+primeiro, então o caminho crítico começa na narração/render.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+POOL_DIR = DATA_DIR / "script_pool"
+
+DEFAULT_POOL_SIZE = 3
+DEFAULT_MAX_AGE_HOURS = 72
+
+# Só gera quando a carga por CPU estiver abaixo disto (renders têm prioridade)
+IDLE_LOAD_PER_CPU = 0.5
+
+
+class ScriptPool:
+    """Pool de conteúdo pré-gerado em data/script_pool/"""
+
+    def __init__(self, pool_dir=None, size=None, max_age_hours=None, generator=None,
+                 channel=None):
+        """
+        Args:
+            pool_dir: Diretório do pool
+            size: Número de entradas mantidas (padrão: SCRIPT_POOL_SIZE ou 3)
+            max_age_hours: Idade máxima antes de regenerar (padrão: 72h)
+            generator: ContentGenerator usado no reabastecimento (criado sob demanda)
+            channel: Perfil do canal (cada canal tem seu próprio pool)
+        """
+        from channels import get_channel
+        self.channel = channel or get_channel()
+        if pool_dir is None and self.channel.data_dir:
+            pool_dir = self.channel.data_dir / "script_pool"
+        self.pool_dir = Path(pool_dir or os.getenv("SCRIPT_POOL_DIR") or POOL_DIR)
+        self.size = size or int(os.getenv("SCRIPT_POOL_SIZE", DEFAULT_POOL_SIZE))
+        self.max_age_hours = max_age_hours or float(
+            os.getenv("SCRIPT_POOL_MAX_AGE_HOURS", DEFAULT_MAX_AGE_HOURS))
+        self._generator = generator
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            from content_generator import ContentGenerator
+            self._generator = ContentGenerator(channel=self.channel)
+        return self._generator
+
+    def _entries(self):
+        """Entradas disponíveis, da mais antiga para a mais nova"""
+        if not self.pool_dir.exists():
+            return []
+        return sorted(self.pool_dir.glob("pool_*.json"))
+
+    def _load(self, entry_file):
+        with open(entry_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _is_stale(self, entry):
+        created = datetime.fromisoformat(entry['created_at'])
+        return (datetime.now() - created).total_seconds() > self.max_age_hours * 3600
+
+    def take(self):
+        """
+        Retira a entrada válida mais antiga do pool
+
+        A retirada é um rename atômico, então dois workers nunca
+        consomem a mesma entrada.
+
+        Returns:
+            Dicionário com 'case' e 'content', ou None se o pool estiver vazio
+        """
+        for entry_file in self._entries():
+            claimed = entry_file.with_suffix(f".claimed-{os.getpid()}")
+            try:
+                entry_file.rename(claimed)
+            except FileNotFoundError:
+                continue  # Outro worker pegou primeiro
+
+            entry = self._load(claimed)
+            if self._is_stale(entry):
+                # Volta para o pool para ser regenerada no próximo refill
+                claimed.rename(entry_file)
+                continue
+
+            claimed.unlink()
+            return entry
+
+        return None
+
+    def recover_orphans(self):
+        """
+        Devolve ao pool entradas retiradas por processos que morreram
+
+        take() renomeia a entrada para .claimed-<pid> antes de lê-la; se o
+        processo cai nesse meio tempo, o arquivo fica fora do pool.
+
+        Returns:
+            Número de entradas devolvidas
+        """
+        if not self.pool_dir.exists():
+            return 0
+
+        recovered = 0
+        for claimed in self.pool_dir.glob("pool_*.claimed-*"):
+            pid = claimed.suffix.rsplit('-', 1)[-1]
+            if not pid.isdigit() or pid_alive(int(pid)):
+                continue
+            try:
+                claimed.rename(claimed.with_suffix('.json'))
+            except FileNotFoundError:
+                continue  # Outro processo já devolveu
+            recovered += 1
+
+        if recovered:
+            print(f"♻️ {recovered} entrada(s) de processos encerrados devolvida(s) ao pool")
+        return recovered
+
+    def _save(self, case, content):
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'created_at': datetime.now().isoformat(),
+            'case': case,
+            'content': content
+        }
+        name = f"pool_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.json"
+        tmp_file = self.pool_dir / f".{name}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        # Só aparece no pool depois de completamente escrita
+        tmp_file.rename(self.pool_dir / name)
+
+    def refill(self):
+        """
+        Regenera entradas expiradas e completa o pool até `size`
+
+        Casos de entradas expiradas são reaproveitados (já estão marcados
+        como usados); os novos vêm de select_random_case(). Entradas presas
+        em processos encerrados voltam ao pool antes.
+
+        Returns:
+            Número de entradas geradas
+        """
+        self.recover_orphans()
+        generated = 0
+
+        # Entradas expiradas: regenera para o mesmo caso
+        for entry_file in self._entries():
+            entry = self._load(entry_file)
+            if not self._is_stale(entry):
+                continue
+            try:
+                entry_file.unlink()
+            except FileNotFoundError:
+                continue
+            print(f"♻️ Regenerando entrada expirada: {entry['case']['titulo']}")
+            content = self._generate(entry['case'])
+            if content:
+                self._save(entry['case'], content)
+                generated += 1
+
+        skipped = 0
+        while len(self._entries()) < self.size and skipped <= self.size:
+            case = self.generator.select_random_case()
+            print(f"🧠 Pré-gerando roteiro: {case['titulo']}")
+            content = self._generate(case)
+            if content:
+                self._save(case, content)
+                generated += 1
+            else:
+                skipped += 1
+
+        return generated
+
+    def _generate(self, case):
+        """Conteúdo para o caso, ou None se ele só produz duplicatas"""
+        from dedup_index import DuplicateContentError
+        try:
+            return self.generator.generate_for_case(case)
+        except DuplicateContentError as e:
+            print(f"⏭️ Caso pulado: {e}")
+            return None
+
+    def status(self):
+        entries = [self._load(f) for f in self._entries()]
+        stale = sum(1 for e in entries if self._is_stale(e))
+        return {'size': self.size, 'available': len(entries) - stale, 'stale': stale}
+
+
+def pid_alive(pid):
+    """True se o processo existe nesta máquina"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Existe, mas é de outro usuário
+    return True
+
+
+def is_idle():
+    """True se a carga da máquina permite gerar sem atrasar renders"""
+    try:
+        load = os.getloadavg()[0]
+    except OSError:
+        return True
+    return load / (os.cpu_count() or 1) < IDLE_LOAD_PER_CPU
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pool de roteiros pré-gerados')
+    parser.add_argument('--size', type=int, help='Entradas mantidas no pool')
+    parser.add_argument('--max-age', type=float, help='Idade máxima em horas')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Reabastece continuamente em tempo ocioso')
+    parser.add_argument('--interval', type=int, default=300,
+                        help='Segundos entre verificações no modo daemon')
+    parser.add_argument('--status', action='store_true', help='Mostra estado do pool')
+    parser.add_argument('--channel', help='Canal (padrão: default)')
+
+    args = parser.parse_args()
+
+    from channels import get_channel
+    pool = ScriptPool(size=args.size, max_age_hours=args.max_age,
+                      channel=get_channel(args.channel))
+
+    if args.status:
+        print(json.dumps(pool.status(), ensure_ascii=False, indent=2))
+        return
+
+    if not args.daemon:
+        generated = pool.refill()
+        print(f"✅ Pool reabastecido: {generated} entrada(s) gerada(s)")
+        return
+
+    print(f"🧠 Pool de roteiros em modo daemon (tamanho {pool.size})")
+    try:
+        while True:
+            if is_idle():
+                try:
+                    generated = pool.refill()
+                    if generated:
+                        print(f"[{datetime.now()}] ✅ {generated} entrada(s) gerada(s)")
+                except Exception as e:
+                    print(f"[{datetime.now()}] ❌ Erro ao reabastecer: {e}")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\nPool interrompido pelo usuário.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark de Inicialização dos Scripts
+Mede o tempo de import (python -X importtime) de cada script e verifica
+que dependências pesadas não são carregadas sem necessidade
+"""
+
+import sys
+import subprocess
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+
+# Módulos pesados que só devem ser importados pela etapa que os usa
+HEAVY_MODULES = ['openai', 'requests', 'googleapiclient', 'google_auth_oauthlib', 'httplib2']
+
+# (descrição, argumentos do python, módulos pesados permitidos)
+TARGETS = [
+    ("automation_pipeline --help", ['automation_pipeline.py', '--help'], []),
+    ("import automation_pipeline", ['-c', 'import automation_pipeline'], []),
+    ("import content_generator", ['-c', 'import content_generator'], []),
+    ("import voice_generator", ['-c', 'import voice_generator'], []),
+    ("import video_compiler", ['-c', 'import video_compiler'], []),
+    ("import youtube_uploader", ['-c', 'import youtube_uploader'], []),
+    ("job_queue --help", ['job_queue.py', '--help'], []),
+    ("upload_manager --help", ['upload_manager.py', '--help'], []),
+]
+
+
+def parse_importtime(stderr):
+    """
+    Interpreta a saída de -X importtime
+
+    Returns:
+        (tempo total em ms, conjunto de módulos importados)
+    """
+    total_us = 0
+    modules = set()
+
+    for line in stderr.splitlines():
+        # Formato: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.add(name.strip())
+
+    return total_us / 1000, modules
+
+
+def measure(args, runs=5):
+    """Executa o alvo `runs` vezes e retorna a melhor medição"""
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', *args],
+            cwd=SCRIPTS_DIR, capture_output=True, text=True
+        )
+        total_ms, modules = parse_importtime(result.stderr)
+        if best is None or total_ms < best[0]:
+            best = (total_ms, modules)
+    return best
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização dos scripts')
+    parser.add_argument('--runs', type=int, default=5, help='Execuções por alvo')
+    parser.add_argument('--budget-ms', type=float, default=150,
+                        help='Tempo máximo de import por alvo (padrão: 150ms)')
+
+    args = parser.parse_args()
+
+    print(f"{'alvo':<32} {'import (ms)':>12}  módulos pesados")
+    print("-" * 70)
+
+    failures = []
+    for name, target_args, allowed in TARGETS:
+        total_ms, modules = measure(target_args, runs=args.runs)
+        heavy = sorted(m for m in modules
+                       if m.split('.')[0] in HEAVY_MODULES and m.split('.')[0] not in allowed)
+        heavy_roots = sorted({m.split('.')[0] for m in heavy})
+
+        print(f"{name:<32} {total_ms:>12.1f}  {', '.join(heavy_roots) or '-'}")
+
+        if heavy_roots:
+            failures.append(f"{name}: importa {', '.join(heavy_roots)}")
+        if total_ms > args.budget_ms:
+            failures.append(f"{name}: {total_ms:.1f}ms > {args.budget_ms:.0f}ms")
+
+    print()
+    if failures:
+        print("❌ Regressões de inicialização:")
+        for failure in failures:
+            print(f"   {failure}")
+        sys.exit(1)
+
+    print("✅ Todos os alvos dentro do orçamento")
+
+
+if __name__ == "__main__":
+    main()
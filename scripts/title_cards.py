@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Cartelas de Título
+Rasteriza o título uma única vez num PNG transparente, com quebra de linha
+para títulos longos, e guarda em cache por (texto, fonte, tamanho, estilo).
+O vídeo só compõe a imagem com o filtro overlay, em vez de desenhar o texto
+(drawtext) quadro a quadro em cada render.
+
+A largura do texto é medida com Pillow, se estiver instalado; sem ele, usa
+uma estimativa pela largura média dos caracteres da fonte.
+
+Uso:
+    python3 scripts/title_cards.py "O caso que ninguém conseguiu explicar"
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import subprocess
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+ASSETS_DIR = BASE_DIR / "assets"
+DEFAULT_CACHE_DIR = ASSETS_DIR / "title_cards"
+
+# Fonte padrão (pacote fonts-dejavu); TITLE_FONT aponta para outra
+DEFAULT_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+CARD_WIDTH = 1080
+# Margem lateral: o texto ocupa no máximo esta fração da largura
+TEXT_WIDTH_RATIO = 0.85
+MAX_LINES = 3
+MIN_FONTSIZE = 32
+LINE_SPACING = 1.25
+PADDING = 20
+
+# Largura média de um caractere em fração do tamanho da fonte (DejaVu Sans
+# Bold); usada quando Pillow não está disponível
+AVERAGE_CHAR_WIDTH = 0.62
+
+DEFAULT_STYLE = {
+    'fontcolor': 'white',
+    'bordercolor': 'black',
+    'borderw': 2,
+}
+
+
+def find_font(font=None):
+    """
+    Caminho da fonte: argumento, TITLE_FONT, DejaVu padrão ou fc-match
+
+    Raises:
+        Exception: Se nenhuma fonte for encontrada
+    """
+    for candidate in (font, os.getenv("TITLE_FONT"), DEFAULT_FONT):
+        if candidate and Path(candidate).exists():
+            return str(candidate)
+
+    if shutil.which('fc-match'):
+        result = subprocess.run(['fc-match', '-f', '%{file}', 'DejaVu Sans:bold'],
+                                capture_output=True, text=True)
+        if result.returncode == 0 and Path(result.stdout.strip()).exists():
+            return result.stdout.strip()
+
+    raise Exception("Fonte do título não encontrada! Instale fonts-dejavu ou defina TITLE_FONT")
+
+
+def escape_filter_value(value):
+    """
+    Escapa um valor de opção (ex: caminho de arquivo) para um filtergraph
+
+    Dois níveis: o das opções do filtro (\\ ' :) e o do filtergraph
+    (\\ ' , ; [ ]). Caminhos com esses caracteres quebravam o drawtext.
+    """
+    value = str(value)
+    for char in ('\\', "'", ':'):
+        value = value.replace(char, '\\' + char)
+    for char in ('\\', "'", ',', ';', '[', ']'):
+        value = value.replace(char, '\\' + char)
+    return value
+
+
+class TextMeasurer:
+    """Largura de texto em pixels (Pillow se disponível, senão estimativa)"""
+
+    def __init__(self, font_file, fontsize):
+        self.fontsize = fontsize
+        self._font = None
+        try:
+            from PIL import ImageFont
+            self._font = ImageFont.truetype(font_file, fontsize)
+        except (ImportError, OSError):
+            pass
+
+    def width(self, text):
+        if self._font is not None:
+            return self._font.getlength(text)
+        return len(text) * self.fontsize * AVERAGE_CHAR_WIDTH
+
+
+def wrap_title(text, font_file, fontsize, max_width=CARD_WIDTH * TEXT_WIDTH_RATIO):
+    """
+    Quebra o título em linhas que cabem na largura
+
+    Se passar de MAX_LINES, reduz a fonte (até MIN_FONTSIZE).
+
+    Returns:
+        (linhas, tamanho da fonte)
+    """
+    words = text.split()
+    while True:
+        measurer = TextMeasurer(font_file, fontsize)
+        lines = []
+        for word in words:
+            candidate = f"{lines[-1]} {word}" if lines else word
+            if lines and measurer.width(candidate) <= max_width:
+                lines[-1] = candidate
+            else:
+                lines.append(word)
+        if len(lines) <= MAX_LINES or fontsize <= MIN_FONTSIZE:
+            return lines, fontsize
+        fontsize = max(MIN_FONTSIZE, int(fontsize * 0.85))
+
+
+class TitleCardRenderer:
+    """Gera e guarda em cache as cartelas de título"""
+
+    def __init__(self, cache_dir=None, font=None):
+        """
+        Args:
+            cache_dir: Diretório do cache (padrão: TITLE_CARDS_DIR ou assets/title_cards/)
+            font: Arquivo da fonte (padrão: TITLE_FONT ou DejaVu Sans Bold)
+        """
+        if not shutil.which('ffmpeg'):
+            raise Exception("FFmpeg não está instalado! Instale com: sudo apt install ffmpeg")
+        self.cache_dir = Path(cache_dir or os.getenv("TITLE_CARDS_DIR") or DEFAULT_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.font = find_font(font)
+
+    def cache_key(self, text, fontsize, style):
+        """Hash de (texto, fonte, tamanho, estilo); a fonte entra pelo caminho e tamanho do arquivo"""
+        font_stat = Path(self.font).stat()
+        key = json.dumps({
+            'text': text,
+            'font': [self.font, font_stat.st_size],
+            'fontsize': fontsize,
+            'style': style,
+            'width': CARD_WIDTH
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+    def render(self, text, fontsize=50, style=None):
+        """
+        Cartela do título (do cache, ou rasterizada agora)
+
+        Returns:
+            Path do PNG (CARD_WIDTH de largura, altura justa ao texto)
+        """
+        style = {**DEFAULT_STYLE, **(style or {})}
+        card_file = self.cache_dir / f"{self.cache_key(text, fontsize, style)}.png"
+        if card_file.exists():
+            # Marca o uso: a limpeza do cache (output_retention.py) remove
+            # as cartelas sem uso recente
+            os.utime(card_file)
+            return card_file
+
+        lines, size = wrap_title(text, self.font, fontsize)
+        line_height = int(size * LINE_SPACING)
+        height = len(lines) * line_height + 2 * PADDING
+
+        work_dir = Path(tempfile.mkdtemp(prefix='title_', dir=self.cache_dir))
+        try:
+            # Uma drawtext por linha, cada uma centralizada; o texto vai por
+            # arquivo (sem escapes no texto) e sem expansão de %{...}
+            filters = ['format=rgba']
+            font = escape_filter_value(self.font)
+            for index, line in enumerate(lines):
+                line_file = work_dir / f"line_{index}.txt"
+                line_file.write_text(line, encoding='utf-8')
+                filters.append(
+                    f"drawtext=fontfile={font}:textfile={escape_filter_value(line_file)}:expansion=none:"
+                    f"fontsize={size}:fontcolor={style['fontcolor']}:"
+                    f"bordercolor={style['bordercolor']}:borderw={style['borderw']}:"
+                    f"x=(w-text_w)/2:y={PADDING + index * line_height}"
+                )
+
+            tmp_file = work_dir / "card.png"
+            cmd = [
+                'ffmpeg',
+                '-f', 'lavfi', '-i', f'color=c=black@0.0:s={CARD_WIDTH}x{height}',
+                '-vf', ','.join(filters),
+                '-frames:v', '1',
+                '-y', str(tmp_file)
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+            tmp_file.replace(card_file)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return card_file
+
+
+def overlay_filter(position='center', start=0, end=None):
+    """
+    Filtro overlay da cartela sobre o vídeo
+
+    Args:
+        position: top, center ou bottom (centro da cartela nessa altura)
+        start, end: Intervalo em que a cartela aparece (end=None = até o fim)
+    """
+    positions = {'top': 0.15, 'center': 0.5, 'bottom': 0.85}
+    fraction = positions.get(position, positions['center'])
+    overlay = f"overlay=x=(main_w-overlay_w)/2:y=main_h*{fraction}-overlay_h/2"
+    if end is not None:
+        overlay += f":enable='between(t,{start},{end})'"
+    return overlay
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python title_cards.py \"Título do vídeo\"")
+        sys.exit(1)
+    print(TitleCardRenderer().render(' '.join(sys.argv[1:])))
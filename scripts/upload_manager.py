@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Gerenciador de Uploads com Controle de Quota
+Enfileira pacotes compilados, faz uploads em paralelo e respeita a quota
+diária da YouTube Data API (cada videos.insert custa um valor fixo de unidades)
+"""
+
+import os
+import sys
+import json
+import fcntl
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pipeline_logging import submit_with_context
+
+BASE_DIR = Path(__file__).parent.parent
+DATA_DIR = BASE_DIR / "data"
+OUTPUT_DIR = BASE_DIR / "output"
+QUOTA_FILE = DATA_DIR / "youtube_quota.json"
+
+# Quota padrão de um projeto do Google Cloud e custo de videos.insert
+DEFAULT_DAILY_QUOTA = 10000
+DEFAULT_INSERT_COST = 1600
+
+# A quota do YouTube é zerada à meia-noite do horário do Pacífico
+QUOTA_TIMEZONE = "America/Los_Angeles"
+
+
+@contextmanager
+def package_lock(package_file):
+    """
+    Lock exclusivo do upload de um pacote (arquivo .upload.lock ao lado dele)
+
+    Com entrega no mínimo uma vez (novas tentativas, lease expirado), dois
+    workers podem receber o mesmo upload: o segundo espera o primeiro e
+    encontra o pacote já publicado.
+    """
+    lock_file = Path(package_file).with_suffix('.upload.lock')
+    with open(lock_file, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def quota_day(now=None):
+    """Retorna (dia da quota, início do próximo dia) no fuso do YouTube"""
+    from zoneinfo import ZoneInfo
+
+    tz = ZoneInfo(QUOTA_TIMEZONE)
+    now = (now or datetime.now(tz)).astimezone(tz)
+    next_reset = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return now.strftime("%Y-%m-%d"), next_reset
+
+
+class QuotaTracker:
+    """
+    Contabiliza unidades de quota gastas por dia em arquivo JSON
+
+    O arquivo é protegido por lock (fcntl) para que vários processos
+    na mesma máquina ou volume compartilhado não ultrapassem a quota.
+    """
+
+    def __init__(self, state_file=None, daily_limit=None):
+        self.state_file = Path(state_file or QUOTA_FILE)
+        self.daily_limit = daily_limit or int(os.getenv("YOUTUBE_DAILY_QUOTA", DEFAULT_DAILY_QUOTA))
+        self.lock_file = self.state_file.with_suffix('.lock')
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def _locked_state(self):
+        """Abre o estado com lock exclusivo e salva ao sair"""
+        with open(self.lock_file, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = {}
+                if self.state_file.exists():
+                    with open(self.state_file, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+
+                today, _ = quota_day()
+                if state.get('date') != today:
+                    # Novo dia: guarda o histórico e zera o contador
+                    history = state.get('history', {})
+                    if state.get('date'):
+                        history[state['date']] = state.get('used', 0)
+                    state = {'date': today, 'used': 0, 'history': history}
+
+                yield state
+
+                tmp_file = self.state_file.with_suffix('.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False, indent=2)
+                tmp_file.replace(self.state_file)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def reserve(self, units):
+        """Reserva unidades; retorna False se excederia a quota do dia"""
+        with self._locked_state() as state:
+            if state['used'] + units > self.daily_limit:
+                return False
+            state['used'] += units
+            return True
+
+    def refund(self, units):
+        """Devolve unidades reservadas que não chegaram a ser gastas"""
+        with self._locked_state() as state:
+            state['used'] = max(0, state['used'] - units)
+
+    def remaining(self):
+        """Unidades disponíveis hoje"""
+        with self._locked_state() as state:
+            return self.daily_limit - state['used']
+
+
+class UploadManager:
+    """Fila de uploads com concorrência limitada e quota diária"""
+
+    def __init__(self, max_concurrent=None, privacy_status="private",
+                 quota=None, insert_cost=None):
+        """
+        Args:
+            max_concurrent: Uploads simultâneos (padrão: YOUTUBE_MAX_CONCURRENT ou 2)
+            privacy_status: Status de privacidade dos vídeos
+            quota: QuotaTracker para todos os pacotes (padrão: um por canal,
+                   data/youtube_quota.json no canal padrão)
+            insert_cost: Unidades por videos.insert (padrão: YOUTUBE_INSERT_COST ou 1600)
+        """
+        self.max_concurrent = max_concurrent or int(os.getenv("YOUTUBE_MAX_CONCURRENT", 2))
+        self.privacy_status = privacy_status
+        self.quota = quota or QuotaTracker()
+        self._fixed_quota = quota is not None
+        self._channel_quotas = {}
+        self.insert_cost = insert_cost or int(os.getenv("YOUTUBE_INSERT_COST", DEFAULT_INSERT_COST))
+        self.queue = []
+        self._lock = threading.Lock()
+
+    def quota_for(self, channel):
+        """Quota do canal (cada canal tem suas credenciais e projeto do Google)"""
+        if self._fixed_quota or channel.is_default:
+            return self.quota
+        with self._lock:
+            if channel.name not in self._channel_quotas:
+                self._channel_quotas[channel.name] = QuotaTracker(
+                    channel.data_dir / "youtube_quota.json")
+            return self._channel_quotas[channel.name]
+
+    def quota_report(self):
+        """
+        Quota de cada canal configurado
+
+        Returns:
+            Lista de (nomes dos canais, QuotaTracker); canais que dividem a
+            mesma quota aparecem juntos
+        """
+        from channels import load_channels
+
+        report = {}
+        for channel in load_channels().values():
+            quota = self.quota_for(channel)
+            report.setdefault(id(quota), ([], quota))[0].append(channel.name)
+        return list(report.values())
+
+    def format_quota(self):
+        """Resumo de uma linha: restante/limite por canal"""
+        return ", ".join(f"{'/'.join(names)} {quota.remaining()}/{quota.daily_limit}"
+                         for names, quota in self.quota_report())
+
+    def enqueue(self, package_file):
+        """Adiciona pacote à fila de upload"""
+        with self._lock:
+            if str(package_file) not in self.queue:
+                self.queue.append(str(package_file))
+
+    def enqueue_pending(self):
+        """
+        Enfileira todos os pacotes compilados e ainda não publicados
+
+        Pacotes adiados só entram depois que a quota é renovada.
+
+        Returns:
+            Número de pacotes enfileirados
+        """
+        now = datetime.now().astimezone()
+        count = 0
+
+        # Pacotes do canal padrão e dos canais em output/<canal>/
+        package_files = list(OUTPUT_DIR.glob("video_*.json")) + list(OUTPUT_DIR.glob("*/video_*.json"))
+        for package_file in sorted(package_files, key=lambda p: p.name):
+            with open(package_file, 'r', encoding='utf-8') as f:
+                package = json.load(f)
+
+            if package.get('status') not in ('video_compilado', 'upload_adiado'):
+                continue
+            deferred_until = package.get('upload_deferred_until')
+            if deferred_until and datetime.fromisoformat(deferred_until) > now:
+                continue
+
+            self.enqueue(package_file)
+            count += 1
+
+        return count
+
+    def _defer(self, package_file):
+        """Marca pacote como adiado até a renovação da quota"""
+        _, next_reset = quota_day()
+
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+
+        package['status'] = 'upload_adiado'
+        package['upload_deferred_until'] = next_reset.isoformat()
+
+        with open(package_file, 'w', encoding='utf-8') as f:
+            json.dump(package, f, ensure_ascii=False, indent=2)
+
+        return next_reset
+
+    def upload_package(self, package_file):
+        """
+        Faz upload de um pacote se houver quota
+
+        Pacote já publicado não é enviado de novo (nem cobra quota).
+
+        Returns:
+            Dicionário com status ('enviado', 'adiado' ou 'erro')
+        """
+        with package_lock(package_file):
+            return self._upload_package(package_file)
+
+    def _upload_package(self, package_file):
+        from youtube_uploader import YouTubeUploader, already_published
+        from channels import channel_of
+
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+
+        published = already_published(package)
+        if published:
+            video_id, video_url = published
+            return {'package_file': str(package_file), 'status': 'enviado',
+                    'video_id': video_id, 'youtube_url': video_url}
+
+        channel = channel_of(package_file)
+        quota = self.quota_for(channel)
+
+        # Upload retomado (sessão salva no pacote): o videos.insert já foi
+        # cobrado na tentativa anterior
+        resuming = bool(package.get('youtube_upload_session'))
+
+        if not resuming and not quota.reserve(self.insert_cost):
+            next_reset = self._defer(package_file)
+            print(f"⏸️ Quota do YouTube esgotada, upload adiado para {next_reset:%Y-%m-%d %H:%M %Z}: "
+                  f"{Path(package_file).name}")
+            return {'package_file': str(package_file), 'status': 'adiado',
+                    'deferred_until': next_reset.isoformat()}
+
+        uploader = None
+        try:
+            # Um uploader por thread: o cliente HTTP do Google não é thread-safe
+            uploader = YouTubeUploader(channel=channel)
+            result = uploader.upload_from_package(package_file, privacy_status=self.privacy_status)
+        except Exception as e:
+            # Falha antes do videos.insert (ex: vídeo ausente): nada foi gasto
+            if not resuming and not (uploader and uploader.insert_started):
+                quota.refund(self.insert_cost)
+            return {'package_file': str(package_file), 'status': 'erro', 'error': str(e)}
+
+        if result is None:
+            # Autenticação falhou antes de chamar a API: nada foi gasto
+            if not resuming:
+                quota.refund(self.insert_cost)
+            return {'package_file': str(package_file), 'status': 'erro',
+                    'error': 'Falha na autenticação'}
+
+        video_id, video_url = result
+        return {'package_file': str(package_file), 'status': 'enviado',
+                'video_id': video_id, 'youtube_url': video_url}
+
+    def run(self):
+        """
+        Processa a fila com até max_concurrent uploads simultâneos
+
+        Returns:
+            Lista de resultados, um por pacote
+        """
+        with self._lock:
+            queue, self.queue = self.queue, []
+
+        if not queue:
+            return []
+
+        print(f"📤 {len(queue)} upload(s) na fila, até {self.max_concurrent} simultâneos "
+              f"(quota restante: {self.format_quota()} unidades)")
+
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            futures = [submit_with_context(executor, self.upload_package, p) for p in queue]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result['status'] == 'enviado':
+                    print(f"✅ {Path(result['package_file']).name}: {result['youtube_url']}")
+                elif result['status'] == 'erro':
+                    print(f"❌ {Path(result['package_file']).name}: {result['error']}")
+
+        return results
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gerenciador de Uploads para YouTube')
+    parser.add_argument('packages', nargs='*', help='Pacotes a enviar (padrão: todos pendentes)')
+    parser.add_argument('--concurrency', type=int, help='Uploads simultâneos')
+    parser.add_argument('--privacy', choices=['private', 'unlisted', 'public'],
+                        default='private', help='Status de privacidade')
+    parser.add_argument('--quota', action='store_true', help='Mostra quota restante e sai')
+
+    args = parser.parse_args()
+
+    manager = UploadManager(max_concurrent=args.concurrency, privacy_status=args.privacy)
+
+    if args.quota:
+        today, next_reset = quota_day()
+        for names, quota in manager.quota_report():
+            print(f"📊 Quota {today} ({', '.join(names)}): "
+                  f"{quota.remaining()}/{quota.daily_limit} unidades")
+        print(f"   Renovação: {next_reset:%Y-%m-%d %H:%M %Z}")
+        return
+
+    if args.packages:
+        for package_file in args.packages:
+            manager.enqueue(package_file)
+    else:
+        manager.enqueue_pending()
+
+    results = manager.run()
+    sent = sum(1 for r in results if r['status'] == 'enviado')
+    deferred = sum(1 for r in results if r['status'] == 'adiado')
+    print(f"\n📊 Enviados: {sent} | Adiados: {deferred} | Erros: {len(results) - sent - deferred}")
+
+
+if __name__ == "__main__":
+    main()
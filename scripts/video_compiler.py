@@ -6,46 +6,94 @@ Cria vídeos finais com narração, música e legendas
 
 import os
 import json
+import math
+import time
+import shutil
+import tempfile
 import subprocess
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from encoder_profiles import encode_args, get_profile
+from title_cards import TitleCardRenderer, overlay_filter
+from pipeline_logging import submit_with_context
 
 BASE_DIR = Path(__file__).parent.parent
 OUTPUT_DIR = BASE_DIR / "output"
 ASSETS_DIR = BASE_DIR / "assets"
 
+# Render do fundo (lavfi) e do título
+FPS = 25
+RESOLUTION = "1080x1920"
+TITLE_SECONDS = 3
+
+# Zoom máximo das cenas com imagem (Ken Burns)
+SCENE_ZOOM = 0.15
+
+# Render segmentado: vídeos a partir desta duração são divididos em trechos
+# codificados em paralelo e juntados sem recodificar
+SEGMENTED_MIN_SECONDS = float(os.getenv("SEGMENTED_MIN_SECONDS", 120))
+SEGMENT_SECONDS = float(os.getenv("RENDER_SEGMENT_SECONDS", 10))
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", os.cpu_count() or 1))
+
 class VideoCompiler:
     """Compila vídeo final com todos os elementos"""
     
-    def __init__(self):
+    def __init__(self, segmented=None, profile=None):
+        """
+        Args:
+            segmented: True/False força o modo de render; None decide pela
+                duração (SEGMENTED_MIN_SECONDS)
+            profile: Perfil de encode (encoder_profiles.py); None usa o
+                perfil da rendition ('short' ou 'long')
+        """
+        self.segmented = segmented
+        self.profile = profile
+        self._title_cards = None
         self.check_ffmpeg()
     
+    def video_args(self, rendition='short'):
+        """Argumentos do encoder de vídeo para a rendition"""
+        return encode_args(get_profile(self.profile, rendition))
+    
     def check_ffmpeg(self):
-        """Verifica se FFmpeg está instalado"""
-        try:
-            subprocess.run(['ffmpeg', '-version'], 
-                         capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        """Verifica se FFmpeg está instalado (busca no PATH, sem executar)"""
+        if not shutil.which('ffmpeg') or not shutil.which('ffprobe'):
             raise Exception("FFmpeg não está instalado! Instale com: sudo apt install ffmpeg")
     
-    def create_background_video(self, duration, output_file):
+    def create_background_video(self, duration, output_file, rendition='short', title=None):
         """
         Cria vídeo de fundo dark com movimento
         
         Args:
             duration: Duração em segundos
             output_file: Arquivo de saída
+            rendition: Tipo de vídeo que define o perfil de encode
+            title: Título composto nos primeiros TITLE_SECONDS, no mesmo
+                encode do fundo (None = só o fundo)
         """
         
         # Cria vídeo escuro com gradiente animado
+        source = ['-f', 'lavfi',
+                  '-i', f'color=c=0x0a0a0a:s={RESOLUTION}:r={FPS}:d={duration}']  # Fundo preto vertical
+        noise = 'noise=alls=20:allf=t+u'  # Adiciona ruído sutil
+        if title:
+            card = self.title_card(title, 50)
+            overlay = overlay_filter('center', start=0, end=TITLE_SECONDS)
+            source += ['-i', str(card)]
+            graph = ['-filter_complex', f"[0:v]{noise}[bg];[bg][1:v]{overlay}[v]",
+                     '-map', '[v]']
+        else:
+            graph = ['-vf', noise]
+        
         cmd = [
             'ffmpeg',
-            '-f', 'lavfi',
-            '-i', f'color=c=0x0a0a0a:s=1080x1920:d={duration}',  # Fundo preto vertical
-            '-vf', 'noise=alls=20:allf=t+u',  # Adiciona ruído sutil
-            '-c:v', 'libx264',
+            *source,
+            *graph,
+            *self.video_args(rendition),
             '-t', str(duration),
-            '-pix_fmt', 'yuv420p',
             '-y',
             str(output_file)
         ]
@@ -54,7 +102,8 @@ class VideoCompiler:
         return output_file
     
     def add_audio_to_video(self, video_file, audio_file, output_file, 
-                          background_music=None, music_volume=0.1):
+                          background_music=None, music_volume=0.1,
+                          music_filter=None, music_loop=False):
         """
         Adiciona narração e música de fundo ao vídeo
         
@@ -63,18 +112,23 @@ class VideoCompiler:
             audio_file: Narração
             output_file: Arquivo final
             background_music: Música de fundo (opcional)
-            music_volume: Volume da música (0.0 a 1.0)
+            music_volume: Volume da música (0.0 a 1.0), se não houver music_filter
+            music_filter: Filtro de áudio da música (ex: loudnorm da biblioteca)
+            music_loop: Repete a música se ela for mais curta que a narração
         """
         
         if background_music and Path(background_music).exists():
             # Com música de fundo
+            music_filter = music_filter or f'volume={music_volume}'
+            loop = ['-stream_loop', '-1'] if music_loop else []
             cmd = [
                 'ffmpeg',
                 '-i', str(video_file),
                 '-i', str(audio_file),
+                *loop,
                 '-i', str(background_music),
                 '-filter_complex',
-                f'[2:a]volume={music_volume}[music];[1:a][music]amix=inputs=2:duration=first[audio]',
+                f'[2:a]{music_filter}[music];[1:a][music]amix=inputs=2:duration=first[audio]',
                 '-map', '0:v',
                 '-map', '[audio]',
                 '-c:v', 'copy',
@@ -100,7 +154,7 @@ class VideoCompiler:
         return output_file
     
     def add_text_overlay(self, video_file, text, output_file, 
-                        position='center', fontsize=40, duration=None):
+                        position='center', fontsize=40, duration=None, rendition='short'):
         """
         Adiciona texto/legenda ao vídeo
         
@@ -111,38 +165,19 @@ class VideoCompiler:
             position: Posição (top, center, bottom)
             fontsize: Tamanho da fonte
             duration: Duração do texto (None = todo o vídeo)
+            rendition: Tipo de vídeo que define o perfil de encode
         """
         
-        # Define posição vertical
-        positions = {
-            'top': 'h*0.15',
-            'center': 'h*0.5',
-            'bottom': 'h*0.85'
-        }
-        y_pos = positions.get(position, positions['center'])
-        
-        # Escapa caracteres especiais
-        text = text.replace("'", "'\\\\\\''").replace(":", "\\:")
-        
-        # Filtro de texto
-        text_filter = (
-            f"drawtext=text='{text}':"
-            f"fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:"
-            f"fontsize={fontsize}:"
-            f"fontcolor=white:"
-            f"bordercolor=black:"
-            f"borderw=2:"
-            f"x=(w-text_w)/2:"
-            f"y={y_pos}"
-        )
-        
-        if duration:
-            text_filter += f":enable='between(t,0,{duration})'"
+        card = self.title_card(text, fontsize)
+        overlay = overlay_filter(position, start=0, end=duration if duration else None)
         
         cmd = [
             'ffmpeg',
             '-i', str(video_file),
-            '-vf', text_filter,
+            '-i', str(card),
+            '-filter_complex', f'[0:v][1:v]{overlay}[v]',
+            '-map', '[v]', '-map', '0:a?',
+            *self.video_args(rendition),
             '-c:a', 'copy',
             '-y',
             str(output_file)
@@ -151,6 +186,152 @@ class VideoCompiler:
         subprocess.run(cmd, check=True, capture_output=True)
         return output_file
     
+    def title_card(self, text, fontsize=50):
+        """PNG do título, rasterizado uma vez e reaproveitado (title_cards.py)"""
+        if self._title_cards is None:
+            self._title_cards = TitleCardRenderer()
+        return self._title_cards.render(text, fontsize=fontsize)
+    
+    def render_segment(self, start_frame, frames, title, output_file, threads=None,
+                       image=None, zoom_in=True, rendition='short',
+                       scene_offset=0, scene_frames=None):
+        """
+        Codifica um trecho do fundo (com o título, se o trecho o alcança)
+        
+        Args:
+            start_frame: Primeiro quadro do trecho na linha do tempo
+            frames: Quantidade de quadros
+            title: Título exibido nos primeiros TITLE_SECONDS do vídeo
+            output_file: Arquivo do trecho
+            threads: Threads do encoder (divide os núcleos entre os trechos)
+            image: Imagem 1080x1920 da cena (None = fundo escuro com ruído)
+            zoom_in: Direção do zoom lento sobre a imagem
+            rendition: Tipo de vídeo que define o perfil de encode
+            scene_offset: Quadros da cena antes deste trecho (cena dividida
+                em vários trechos continua o zoom de onde parou)
+            scene_frames: Quadros da cena inteira (padrão: frames)
+        """
+        
+        if image:
+            # Zoom lento centralizado ao longo da cena inteira
+            scene_frames = scene_frames or frames
+            progress = f"(on+{scene_offset})/{scene_frames}"
+            if zoom_in:
+                zoom = f"1+{SCENE_ZOOM}*{progress}"
+            else:
+                zoom = f"{1 + SCENE_ZOOM}-{SCENE_ZOOM}*{progress}"
+            source = ['-i', str(image)]
+            filters = [
+                f"zoompan=z='{zoom}':x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)'"
+                f":d={frames}:s={RESOLUTION}:fps={FPS}",
+                'format=yuv420p'
+            ]
+        else:
+            source = ['-f', 'lavfi', '-i', f'color=c=0x0a0a0a:s={RESOLUTION}:r={FPS}']
+            # Semente por trecho: com a padrão, todos os trechos teriam o
+            # mesmo ruído, repetido a cada SEGMENT_SECONDS
+            filters = [f'noise=alls=20:allf=t+u:all_seed={start_frame + 1}']
+        
+        offset = start_frame / FPS
+        if title and offset < TITLE_SECONDS:
+            # Cartela do título composta sobre o fundo
+            card = self.title_card(title, 50)
+            overlay = overlay_filter('center', start=0, end=TITLE_SECONDS - offset)
+            source += ['-i', str(card)]
+            graph = ['-filter_complex', f"[0:v]{','.join(filters)}[bg];[bg][1:v]{overlay}[v]",
+                     '-map', '[v]']
+        else:
+            graph = ['-vf', ','.join(filters)]
+        
+        cmd = [
+            'ffmpeg',
+            *source,
+            *graph,
+            '-frames:v', str(frames),
+            *self.video_args(rendition),
+        ]
+        if threads:
+            cmd += ['-threads', str(threads)]
+        cmd += ['-y', str(output_file)]
+        
+        subprocess.run(cmd, check=True, capture_output=True)
+        return output_file
+    
+    def render_segmented(self, duration, title, output_file, workers=None, images=None,
+                         rendition='short'):
+        """
+        Renderiza fundo + título em trechos paralelos e junta sem recodificar
+        
+        Cada trecho é um encode independente que começa num keyframe, e os
+        limites caem em quadros inteiros, então a junção com o demuxer
+        concat em cópia de stream é exata. O áudio é adicionado uma vez só,
+        depois, por add_audio_to_video.
+        
+        Args:
+            duration: Duração em segundos
+            title: Título dos primeiros segundos
+            output_file: Vídeo (sem áudio) de saída
+            workers: Encodes simultâneos (padrão: RENDER_WORKERS)
+            images: Imagens das cenas; cada uma vira uma cena de duração
+                igual, dividida em trechos de SEGMENT_SECONDS
+            rendition: Tipo de vídeo que define o perfil de encode
+        """
+        
+        total_frames = math.ceil(duration * FPS)
+        segment_frames = max(int(SEGMENT_SECONDS * FPS), 1)
+        if images:
+            # Uma cena por imagem, alternando zoom de aproximação e afastamento
+            count = min(len(images), total_frames)
+            bounds = [round(total_frames * i / count) for i in range(count + 1)]
+            scenes = [(bounds[i], bounds[i + 1] - bounds[i], images[i], i % 2 == 0)
+                      for i in range(count)]
+        else:
+            scenes = [(0, total_frames, None, True)]
+        
+        # (início, quadros, imagem, zoom_in, deslocamento na cena, quadros da cena)
+        segments = [
+            (start + offset, min(segment_frames, length - offset), image, zoom_in, offset, length)
+            for start, length, image, zoom_in in scenes
+            for offset in range(0, length, segment_frames)
+        ]
+        
+        workers = max(1, min(workers or RENDER_WORKERS, len(segments)))
+        # Núcleos divididos entre os encodes simultâneos
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        
+        output_file = Path(output_file)
+        work_dir = Path(tempfile.mkdtemp(prefix=f"seg_{output_file.stem}_", dir=output_file.parent))
+        try:
+            parts = [work_dir / f"part_{index:04d}.mp4" for index in range(len(segments))]
+            # Cada trecho é um processo ffmpeg; as threads só esperam por eles
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    submit_with_context(executor, self.render_segment, start, frames, title, part,
+                                        threads, image, zoom_in, rendition, offset, length)
+                    for (start, frames, image, zoom_in, offset, length), part in zip(segments, parts)
+                ]
+                for future in futures:
+                    future.result()
+            
+            list_file = work_dir / "concat.txt"
+            with open(list_file, 'w', encoding='utf-8') as f:
+                for part in parts:
+                    f.write(f"file '{part.name}'\n")
+            
+            cmd = [
+                'ffmpeg',
+                '-f', 'concat', '-safe', '0', '-i', str(list_file),
+                '-c', 'copy',
+                '-y',
+                str(output_file)
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        print(f"   {len(segments)} trechos em {workers} encode(s) paralelo(s)")
+        return output_file
+    
     def get_audio_duration(self, audio_file):
         """Obtém duração do arquivo de áudio"""
         cmd = [
@@ -192,33 +373,65 @@ class VideoCompiler:
         print(f"   Duração: {duration:.1f}s")
         
         # 2. Cria vídeo de fundo
-        print("   Criando fundo...")
-        bg_video = OUTPUT_DIR / f"bg_{timestamp}.mp4"
-        self.create_background_video(duration, bg_video)
+        encode_start = time.perf_counter()
+        # Arquivos ficam ao lado do pacote (namespace do canal)
+        output_dir = Path(package_file).resolve().parent
+        title_video = output_dir / f"title_{timestamp}.mp4"
+        final_video = output_dir / f"final_{timestamp}.mp4"
         
-        # 3. Adiciona título no início (3 segundos)
-        print("   Adicionando título...")
-        title_video = OUTPUT_DIR / f"title_{timestamp}.mp4"
         title = package['metadata'].get('titulo', package['caso_titulo'])
-        self.add_text_overlay(bg_video, title, title_video, 
-                            position='center', fontsize=50, duration=3)
+        rendition = 'long' if duration >= SEGMENTED_MIN_SECONDS else 'short'
+        segmented = self.segmented
+        if segmented is None:
+            segmented = rendition == 'long'
         
-        # 4. Adiciona áudio (narração + música de fundo se disponível)
-        print("   Adicionando áudio...")
-        final_video = OUTPUT_DIR / f"final_{timestamp}.mp4"
+        # Imagens das cenas (visual_assets.py); sem elas, fundo escuro com ruído
+        images = [image for image in package.get('visual_assets', []) if Path(image).exists()]
         
-        # Procura música de fundo
-        bg_music = ASSETS_DIR / "background_music.mp3"
-        if not bg_music.exists():
-            bg_music = None
-        
-        self.add_audio_to_video(title_video, audio_file, final_video, 
-                               background_music=bg_music, music_volume=0.08)
+        try:
+            if images:
+                # 2-3. Cenas com pan/zoom e título, uma por trecho, em paralelo
+                print(f"   Renderizando {len(images)} cena(s) com imagem...")
+                self.render_segmented(duration, title, title_video, images=images,
+                                      rendition=rendition)
+            elif segmented:
+                # 2-3. Fundo e título num passe só, em trechos paralelos
+                print("   Renderizando fundo e título em trechos...")
+                self.render_segmented(duration, title, title_video, rendition=rendition)
+            else:
+                # 2-3. Fundo e título (primeiros segundos) num encode só
+                print("   Criando fundo com título...")
+                self.create_background_video(duration, title_video, rendition=rendition,
+                                             title=title)
+            
+            # 4. Adiciona áudio (narração + música de fundo se disponível)
+            print("   Adicionando áudio...")
+            
+            # Música da biblioteca (loudness pré-medido); senão, a faixa fixa legada
+            from music_library import get_library
+            music = get_library().pick(duration)
+            if music:
+                print(f"   Música: {music['name']}")
+                self.add_audio_to_video(title_video, audio_file, final_video,
+                                       background_music=music['file'],
+                                       music_filter=music['filter'], music_loop=music['loop'])
+            else:
+                bg_music = ASSETS_DIR / "background_music.mp3"
+                if not bg_music.exists():
+                    bg_music = None
+                
+                self.add_audio_to_video(title_video, audio_file, final_video, 
+                                       background_music=bg_music, music_volume=0.08)
+        finally:
+            # 5. Limpa arquivos temporários (também se o render falhar)
+            print("   Limpando arquivos temporários...")
+            title_video.unlink(missing_ok=True)
         
-        # 5. Limpa arquivos temporários
-        print("   Limpando arquivos temporários...")
-        bg_video.unlink()
-        title_video.unlink()
+        metrics.record(
+            media_seconds=duration,
+            encode_seconds=time.perf_counter() - encode_start,
+            bytes_written=final_video.stat().st_size
+        )
         
         # 6. Atualiza pacote
         package['video_file'] = str(final_video)
@@ -237,9 +450,18 @@ class VideoCompiler:
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) > 1:
-        package_file = sys.argv[1]
-        compiler = VideoCompiler()
-        compiler.compile_video_from_package(package_file)
+    profile = '--profile' in sys.argv
+    segmented = True if '--segmented' in sys.argv else None
+    args = [a for a in sys.argv[1:] if a not in ('--profile', '--segmented')]
+    
+    if args:
+        package_file = args[0]
+        compiler = VideoCompiler(segmented=segmented)
+        if profile:
+            from profiling import run_profiled
+            run_profiled('video', compiler.compile_video_from_package,
+                         package_file, package_file=package_file)
+        else:
+            compiler.compile_video_from_package(package_file)
     else:
-        print("Uso: python video_compiler.py <arquivo_pacote.json>")
+        print("Uso: python video_compiler.py <arquivo_pacote.json> [--profile] [--segmented]")
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Imagens das Cenas
+Transforma os visual_prompts do pacote em imagens de fundo. As imagens vêm
+de um backend de geração plugável e ficam num acervo endereçado por
+conteúdo (assets/visuals/), já escaladas e recortadas para 1080x1920 uma
+única vez. Prompts repetidos e imagens iguais são reaproveitados entre vídeos.
+
+Backends (IMAGE_BACKEND):
+- placeholder: gradiente local gerado a partir do prompt (padrão, sem custo)
+- openai: API de imagens compatível com OpenAI (IMAGE_API_KEY,
+  IMAGE_API_BASE_URL, IMAGE_MODEL)
+
+Uso:
+    python3 scripts/visual_assets.py output/video_20251203_100000.json
+    python3 scripts/visual_assets.py stats
+"""
+
+import os
+import sys
+import json
+import zlib
+import base64
+import struct
+import shutil
+import hashlib
+import sqlite3
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from dedup_index import normalize
+from rate_limiter import get_governor
+from pipeline_db import ThreadConnections
+from pipeline_logging import submit_with_context
+
+BASE_DIR = Path(__file__).parent.parent
+ASSETS_DIR = BASE_DIR / "assets"
+DEFAULT_STORE_DIR = ASSETS_DIR / "visuals"
+
+# Formato das cenas no vídeo vertical
+WIDTH, HEIGHT = 1080, 1920
+
+# Imagens buscadas ao mesmo tempo (o limite real é o do governador, 'images')
+DEFAULT_WORKERS = 4
+
+
+class ImageBackend:
+    """Interface dos backends de geração de imagem"""
+
+    name = None
+
+    def generate(self, prompt):
+        """
+        Gera uma imagem para o prompt
+
+        Returns:
+            Bytes da imagem (PNG/JPEG, qualquer tamanho)
+        """
+        raise NotImplementedError
+
+
+class PlaceholderBackend(ImageBackend):
+    """
+    Substituto local: gradiente vertical escuro com cores derivadas do prompt
+
+    Determinístico (o mesmo prompt gera a mesma imagem) e sem rede, para
+    testes, benchmark e instalações sem API de imagens.
+    """
+
+    name = 'placeholder'
+
+    # Gerado pequeno; o acervo escala para 1080x1920
+    SIZE = (108, 192)
+
+    def generate(self, prompt):
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        # Tons escuros (0-63) combinam com o estilo dark dos vídeos
+        top = [b % 64 for b in digest[0:3]]
+        bottom = [b % 64 for b in digest[3:6]]
+
+        width, height = self.SIZE
+        rows = []
+        for y in range(height):
+            color = bytes(int(t + (b - t) * y / (height - 1)) for t, b in zip(top, bottom))
+            rows.append(b'\x00' + color * width)
+        return _png(width, height, b''.join(rows))
+
+
+class OpenAIImageBackend(ImageBackend):
+    """API de imagens compatível com OpenAI (/images/generations)"""
+
+    name = 'openai'
+
+    def __init__(self):
+        self.api_key = os.getenv("IMAGE_API_KEY") or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("IMAGE_API_KEY não configurada!")
+        self.base_url = os.getenv("IMAGE_API_BASE_URL", "https://api.openai.com/v1")
+        self.model = os.getenv("IMAGE_MODEL", "dall-e-3")
+
+    def generate(self, prompt):
+        import requests
+        with get_governor().acquire('images'):
+            response = requests.post(
+                f"{self.base_url}/images/generations",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "size": "1024x1792",  # vertical
+                    "n": 1,
+                    "response_format": "b64_json"
+                },
+                timeout=120
+            )
+        if response.status_code != 200:
+            raise Exception(f"Erro ao gerar imagem: {response.status_code} - {response.text}")
+        return base64.b64decode(response.json()['data'][0]['b64_json'])
+
+
+BACKENDS = {
+    PlaceholderBackend.name: PlaceholderBackend,
+    OpenAIImageBackend.name: OpenAIImageBackend,
+}
+
+
+def images_enabled():
+    """
+    Imagens das cenas no pipeline só com IMAGE_BACKEND definido
+
+    O placeholder (padrão do CLI) é só um gradiente: no pipeline, trocaria o
+    fundo com ruído por outro fundo sem conteúdo, com mais encodes.
+    """
+    return bool(os.getenv("IMAGE_BACKEND"))
+
+
+def get_backend(name=None):
+    """Backend configurado (IMAGE_BACKEND; padrão: placeholder)"""
+    name = name or os.getenv("IMAGE_BACKEND") or PlaceholderBackend.name
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de imagem desconhecido: {name} (opções: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def _png(width, height, raw):
+    """PNG RGB de 8 bits a partir das linhas já com o byte de filtro"""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data
+                + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b''))
+
+
+class AssetStore:
+    """
+    Acervo de imagens endereçado por conteúdo
+
+    Cada imagem é guardada pelo SHA-256 dos bytes originais, já no formato
+    final (JPEG 1080x1920). Um índice SQLite liga (backend, prompt) à imagem,
+    para que o mesmo prompt não seja gerado de novo.
+    """
+
+    def __init__(self, store_dir=None):
+        self.store_dir = Path(store_dir or os.getenv("VISUAL_ASSETS_DIR") or DEFAULT_STORE_DIR)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._connect = ThreadConnections(self.store_dir / "index.db", row_factory=sqlite3.Row)
+        self._create_schema()
+
+    def _create_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS prompts (
+                backend TEXT NOT NULL,
+                prompt_norm TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (backend, prompt_norm)
+            )
+        """)
+        conn.commit()
+
+    def path_for(self, sha256):
+        return self.store_dir / sha256[:2] / f"{sha256}.jpg"
+
+    def lookup(self, backend, prompt):
+        """Imagem já gerada para o prompt, se ainda estiver no acervo"""
+        row = self._connect().execute(
+            "SELECT sha256 FROM prompts WHERE backend = ? AND prompt_norm = ?",
+            (backend, normalize(prompt))
+        ).fetchone()
+        if row:
+            path = self.path_for(row['sha256'])
+            if path.exists():
+                return path
+        return None
+
+    def put(self, image, backend=None, prompt=None):
+        """
+        Guarda uma imagem no formato final (escala e recorte uma vez só)
+
+        Returns:
+            Path da imagem no acervo
+        """
+        sha256 = hashlib.sha256(image).hexdigest()
+        path = self.path_for(sha256)
+
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, source = tempfile.mkstemp(dir=path.parent, suffix='.src')
+            tmp_file = path.with_suffix('.tmp.jpg')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(image)
+                cmd = [
+                    'ffmpeg', '-i', source,
+                    '-vf', (f"scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=increase,"
+                            f"crop={WIDTH}:{HEIGHT}"),
+                    '-frames:v', '1', '-q:v', '2',
+                    '-y', str(tmp_file)
+                ]
+                subprocess.run(cmd, check=True, capture_output=True)
+                tmp_file.replace(path)
+                metrics.record(bytes_written=path.stat().st_size)
+            finally:
+                Path(source).unlink(missing_ok=True)
+                tmp_file.unlink(missing_ok=True)
+
+        if backend and prompt:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO prompts VALUES (?, ?, ?, ?)",
+                    (backend, normalize(prompt), sha256, datetime.now().isoformat())
+                )
+        return path
+
+    def stats(self):
+        prompts = self._connect().execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+        files = [f for f in self.store_dir.glob("*/*.jpg")]
+        return {
+            'prompts': prompts,
+            'images': len(files),
+            'bytes': sum(f.stat().st_size for f in files)
+        }
+
+
+class VisualAssetStage:
+    """Busca as imagens dos visual_prompts em paralelo"""
+
+    def __init__(self, backend=None, store=None, workers=DEFAULT_WORKERS):
+        """
+        Args:
+            backend: ImageBackend (padrão: IMAGE_BACKEND)
+            store: AssetStore (padrão: assets/visuals/)
+            workers: Imagens buscadas ao mesmo tempo
+        """
+        if not shutil.which('ffmpeg'):
+            raise Exception("FFmpeg não está instalado! Instale com: sudo apt install ffmpeg")
+        self.backend = backend or get_backend()
+        self.store = store or AssetStore()
+        self.workers = workers
+
+    def fetch_one(self, prompt):
+        """Imagem do prompt: do acervo ou gerada agora"""
+        path = self.store.lookup(self.backend.name, prompt)
+        if path:
+            return path
+        image = self.backend.generate(prompt)
+        return self.store.put(image, backend=self.backend.name, prompt=prompt)
+
+    def fetch(self, prompts):
+        """
+        Busca as imagens de todos os prompts ao mesmo tempo
+
+        Prompts que falham são pulados: o vídeo usa as imagens que vierem
+        (ou o fundo padrão, se nenhuma vier).
+
+        Returns:
+            Lista de caminhos das imagens, na ordem dos prompts
+        """
+        if not prompts:
+            return []
+
+        assets = []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(prompts)),
+                                thread_name_prefix='images') as executor:
+            futures = [submit_with_context(executor, self.fetch_one, prompt) for prompt in prompts]
+            for prompt, future in zip(prompts, futures):
+                try:
+                    assets.append(str(future.result()))
+                except Exception as e:
+                    print(f"⚠️ Imagem não gerada ({prompt[:40]}...): {e}")
+        print(f"🖼️ {len(assets)}/{len(prompts)} imagem(ns) de cena prontas")
+        return assets
+
+    def start(self, prompts):
+        """
+        Busca as imagens em background (em paralelo com a narração)
+
+        Returns:
+            Future com a lista de caminhos
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='visuals')
+        future = submit_with_context(executor, self.fetch, prompts)
+        executor.shutdown(wait=False)
+        return future
+
+    def fetch_for_package(self, package_file):
+        """Busca as imagens de um pacote e grava em package['visual_assets']"""
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+        assets = self.fetch(package.get('visual_prompts', []))
+        attach_to_package(package_file, assets)
+        return assets
+
+
+def attach_to_package(package_file, assets):
+    """Registra as imagens das cenas no pacote"""
+    with open(package_file, 'r', encoding='utf-8') as f:
+        package = json.load(f)
+    package['visual_assets'] = list(assets)
+    with open(package_file, 'w', encoding='utf-8') as f:
+        json.dump(package, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    """Função principal"""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Imagens das cenas a partir dos visual_prompts')
+    parser.add_argument('target', help='Arquivo de pacote ou "stats"')
+    parser.add_argument('--backend', choices=sorted(BACKENDS), help='Backend de imagem')
+
+    args = parser.parse_args()
+
+    if args.target == 'stats':
+        print(json.dumps(AssetStore().stats(), ensure_ascii=False, indent=2))
+        return
+
+    try:
+        stage = VisualAssetStage(backend=get_backend(args.backend))
+        stage.fetch_for_package(args.target)
+    except Exception as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
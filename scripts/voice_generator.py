@@ -5,13 +5,33 @@ Converte roteiro em áudio de narração profissional
 """
 
 import os
+import re
 import json
-import requests
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from rate_limiter import get_governor
+from pipeline_logging import submit_with_context
 
 BASE_DIR = Path(__file__).parent.parent
 OUTPUT_DIR = BASE_DIR / "output"
 
+# Narração em streaming: trechos menores que isto esperam a próxima frase
+# (menos requisições e entonação mais natural)
+STREAM_MIN_CHARS = 120
+
+# Texto já narrado enviado como contexto (previous_text) para manter a entonação
+PREVIOUS_TEXT_CHARS = 300
+
+# Fim de frase seguido de espaço (aspas/parênteses de fechamento incluídos)
+SENTENCE_END = re.compile(r'[.!?…]+["»”)\]]*\s')
+
 class VoiceGenerator:
     """Gera narração usando ElevenLabs API"""
     
@@ -20,7 +40,7 @@ class VoiceGenerator:
         if not self.api_key:
             raise ValueError("ELEVENLABS_API_KEY não configurada!")
         
-        self.base_url = "https://api.elevenlabs.io/v1"
+        self.base_url = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1")
         
         # Vozes recomendadas para conteúdo dark em português
         self.recommended_voices = {
@@ -34,23 +54,24 @@ class VoiceGenerator:
         url = f"{self.base_url}/voices"
         headers = {"xi-api-key": self.api_key}
         
+        import requests
         response = requests.get(url, headers=headers)
         if response.status_code == 200:
             return response.json()['voices']
         else:
             raise Exception(f"Erro ao listar vozes: {response.text}")
     
-    def generate_audio(self, text, voice_id=None, output_filename=None):
+    def synthesize(self, text, voice_id=None, previous_text=None):
         """
-        Gera áudio a partir do texto
+        Sintetiza o texto e retorna o MP3 em memória
         
         Args:
-            text: Texto do roteiro
+            text: Texto a narrar
             voice_id: ID da voz (usa padrão se não especificado)
-            output_filename: Nome do arquivo de saída
+            previous_text: Texto narrado antes deste trecho (continuidade)
         
         Returns:
-            Path do arquivo de áudio gerado
+            Bytes do áudio MP3
         """
         
         # Usa voz padrão se não especificada
@@ -78,26 +99,53 @@ class VoiceGenerator:
                 "use_speaker_boost": True
             }
         }
+        if previous_text:
+            data["previous_text"] = previous_text
         
-        # Faz requisição
-        response = requests.post(url, json=data, headers=headers)
+        # Faz requisição (requests é importado sob demanda), respeitando
+        # concorrência e cota de caracteres compartilhadas entre workers
+        import requests
+        with get_governor().acquire('elevenlabs', units=len(text)):
+            response = requests.post(url, json=data, headers=headers)
         
-        if response.status_code == 200:
-            # Define nome do arquivo
-            if not output_filename:
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                output_filename = f"narration_{timestamp}.mp3"
-            
-            # Salva arquivo
-            output_path = OUTPUT_DIR / output_filename
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
-            
-            print(f"✅ Áudio gerado: {output_path}")
-            return output_path
-        else:
+        if response.status_code != 200:
             raise Exception(f"Erro ao gerar áudio: {response.status_code} - {response.text}")
+        
+        metrics.record(characters=len(text))
+        return response.content
+    
+    def generate_audio(self, text, voice_id=None, output_filename=None):
+        """
+        Gera áudio a partir do texto
+        
+        Args:
+            text: Texto do roteiro
+            voice_id: ID da voz (usa padrão se não especificado)
+            output_filename: Nome do arquivo de saída (relativo a output/)
+        
+        Returns:
+            Path do arquivo de áudio gerado
+        """
+        audio = self.synthesize(text, voice_id=voice_id)
+        
+        # Define nome do arquivo
+        if not output_filename:
+            from datetime import datetime
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            output_filename = f"narration_{timestamp}.mp3"
+        
+        # Salva arquivo
+        output_path = OUTPUT_DIR / output_filename
+        with open(output_path, 'wb') as f:
+            f.write(audio)
+        metrics.record(bytes_written=len(audio))
+        
+        print(f"✅ Áudio gerado: {output_path}")
+        return output_path
+    
+    def start_streaming(self, voice_id=None):
+        """Narração incremental: alimente com texto conforme ele é gerado"""
+        return StreamingNarration(self, voice_id=voice_id)
     
     def generate_from_content_package(self, package_file):
         """Gera áudio a partir de um pacote de conteúdo"""
@@ -109,11 +157,16 @@ class VoiceGenerator:
         script = package['script']
         timestamp = package['timestamp']
         
+        # Voz do canal; o áudio fica ao lado do pacote (namespace do canal)
+        from channels import get_channel
+        voice_id = get_channel(package.get('channel')).voice_id
+        
         # Gera áudio
         print(f"🎙️ Gerando narração para: {package['caso_titulo']}")
         audio_file = self.generate_audio(
             text=script,
-            output_filename=f"narration_{timestamp}.mp3"
+            voice_id=voice_id,
+            output_filename=Path(package_file).resolve().parent / f"narration_{timestamp}.mp3"
         )
         
         # Atualiza pacote
@@ -126,18 +179,136 @@ class VoiceGenerator:
         return audio_file
 
 
+class StreamingNarration:
+    """
+    Narra um texto que ainda está sendo gerado
+    
+    feed() acumula o texto e, a cada frase completa (com pelo menos
+    STREAM_MIN_CHARS), envia o trecho para síntese em background.
+    finish() espera os trechos e grava o MP3 final, concatenando-os na
+    ordem do texto com o demuxer concat do ffmpeg (cópia de stream, sem
+    reencode). Juntar os bytes deixaria os cabeçalhos ID3/Xing de cada
+    trecho no meio do arquivo e a duração lida seria a do primeiro.
+    """
+    
+    def __init__(self, generator, voice_id=None, max_workers=2):
+        self.generator = generator
+        self.voice_id = voice_id
+        self._buffer = ''
+        self._spoken = ''
+        self._futures = []
+        # Concorrência real fica limitada também pelo governador ('elevenlabs')
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts')
+        self._start = time.perf_counter()
+        self._first_audio = None
+        self._lock = threading.Lock()
+    
+    def feed(self, text):
+        """Adiciona texto gerado; envia as frases completas para síntese"""
+        self._buffer += text
+        end = None
+        for match in SENTENCE_END.finditer(self._buffer):
+            end = match.end()
+        if end and end >= STREAM_MIN_CHARS:
+            self._submit(self._buffer[:end])
+            self._buffer = self._buffer[end:]
+    
+    def close(self):
+        """Texto terminou: envia o que restou no buffer"""
+        self._submit(self._buffer)
+        self._buffer = ''
+    
+    def cancel(self):
+        """Descarta a narração (trechos pendentes não são enviados)"""
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+    
+    def finish(self, output_filename):
+        """
+        Espera todos os trechos e grava o áudio completo
+        
+        Returns:
+            Path do arquivo de áudio gerado
+        """
+        self.close()
+        try:
+            segments = [future.result() for future in self._futures]
+        finally:
+            self._executor.shutdown()
+        
+        output_path = OUTPUT_DIR / output_filename
+        if len(segments) == 1:
+            with open(output_path, 'wb') as f:
+                f.write(segments[0])
+        else:
+            self._concat(segments, output_path)
+        metrics.record(bytes_written=output_path.stat().st_size)
+        
+        print(f"✅ Áudio gerado ({len(segments)} trechos): {output_path}")
+        return output_path
+    
+    def _concat(self, segments, output_path):
+        """Junta os trechos MP3 em um arquivo só (cabeçalho Xing refeito pelo ffmpeg)"""
+        work_dir = Path(tempfile.mkdtemp(prefix=f"narr_{output_path.stem}_", dir=output_path.parent))
+        try:
+            list_file = work_dir / "concat.txt"
+            with open(list_file, 'w', encoding='utf-8') as f:
+                for index, audio in enumerate(segments):
+                    part = work_dir / f"part_{index:04d}.mp3"
+                    part.write_bytes(audio)
+                    f.write(f"file '{part.name}'\n")
+            
+            cmd = [
+                'ffmpeg',
+                '-f', 'concat', '-safe', '0', '-i', str(list_file),
+                '-c', 'copy',
+                '-y',
+                str(output_path)
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _submit(self, text):
+        text = text.strip()
+        if not text:
+            return
+        previous = self._spoken[-PREVIOUS_TEXT_CHARS:].strip()
+        self._spoken += ' ' + text
+        self._futures.append(submit_with_context(self._executor, self._synthesize, text, previous))
+    
+    def _synthesize(self, text, previous):
+        audio = self.generator.synthesize(text, voice_id=self.voice_id,
+                                          previous_text=previous or None)
+        with self._lock:
+            if self._first_audio is None:
+                self._first_audio = time.perf_counter() - self._start
+                metrics.record(time_to_first_audio_seconds=self._first_audio)
+                print(f"🔊 Primeiro trecho de áudio em {self._first_audio:.1f}s")
+        return audio
+
+
 # Exemplo de uso standalone
 if __name__ == "__main__":
     import sys
     
+    profile = '--profile' in sys.argv
+    args = [a for a in sys.argv[1:] if a != '--profile']
+    
     # Verifica se foi passado arquivo de pacote
-    if len(sys.argv) > 1:
-        package_file = sys.argv[1]
+    if args:
+        package_file = args[0]
         generator = VoiceGenerator()
-        generator.generate_from_content_package(package_file)
+        if profile:
+            from profiling import run_profiled
+            run_profiled('narracao', generator.generate_from_content_package,
+                         package_file, package_file=package_file)
+        else:
+            generator.generate_from_content_package(package_file)
     else:
         # Teste simples
         print("⚠️ Modo de teste - configure ELEVENLABS_API_KEY primeiro!")
-        print("\nPara usar: python voice_generator.py <arquivo_pacote.json>")
+        print("\nPara usar: python voice_generator.py <arquivo_pacote.json> [--profile]")
         print("\nOu configure a API key:")
         print("export ELEVENLABS_API_KEY='sua_chave_aqui'")
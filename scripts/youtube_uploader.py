@@ -6,8 +6,14 @@ Usa YouTube Data API v3
 
 import os
 import json
+import time
+import random
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+import metrics
+from rate_limiter import get_governor
 
 # Nota: Este script requer autenticação OAuth2 do Google
 # Para uso completo, você precisará configurar credenciais no Google Cloud Console
@@ -15,10 +21,40 @@ from datetime import datetime
 BASE_DIR = Path(__file__).parent.parent
 OUTPUT_DIR = BASE_DIR / "output"
 
+# Upload em partes: o tamanho precisa ser múltiplo de 256 KB
+CHUNK_UNIT = 256 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Erros transitórios que justificam nova tentativa
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+MAX_RETRIES = 8
+
+SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+
+# Renova o token de acesso este tanto antes de expirar
+TOKEN_REFRESH_MARGIN = 300
+# Intervalo mínimo entre renovações (tokens com vida menor que a margem)
+TOKEN_REFRESH_MIN_INTERVAL = 60
+
+# Cache por processo: credenciais compartilhadas entre threads e um
+# serviço por thread (o cliente httplib2 não é thread-safe)
+_auth_lock = threading.Lock()
+_credentials_cache = {}
+_refresh_threads = {}
+_thread_local = threading.local()
+
+def already_published(package):
+    """(video_id, url) se o pacote já foi publicado, senão None"""
+    video_id = package.get('youtube_video_id')
+    if not video_id and package.get('status') != 'publicado_youtube':
+        return None
+    return video_id, package.get('youtube_url')
+
+
 class YouTubeUploader:
     """Faz upload de vídeos para YouTube Shorts"""
     
-    def __init__(self):
+    def __init__(self, chunk_size=None, channel=None):
         """
         Inicializa uploader do YouTube
         
@@ -28,24 +64,62 @@ class YouTubeUploader:
         3. Criar credenciais OAuth 2.0
         4. Baixar client_secrets.json
         5. Instalar: pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client
+        
+        Args:
+            chunk_size: Tamanho de cada parte do upload em bytes
+                        (padrão: YOUTUBE_UPLOAD_CHUNK_MB ou 8 MB)
+            channel: Perfil do canal; cada canal usa credentials/<canal>/
         """
-        self.credentials_file = BASE_DIR / "credentials" / "youtube_client_secrets.json"
-        self.token_file = BASE_DIR / "credentials" / "youtube_token.json"
+        from channels import get_channel
+        credentials_dir = (channel or get_channel()).credentials_dir
+        self.credentials_file = credentials_dir / "youtube_client_secrets.json"
+        self.token_file = credentials_dir / "youtube_token.json"
+        
+        if chunk_size is None:
+            chunk_mb = os.getenv("YOUTUBE_UPLOAD_CHUNK_MB")
+            chunk_size = int(float(chunk_mb) * 1024 * 1024) if chunk_mb else DEFAULT_CHUNK_SIZE
+        # Arredonda para múltiplo de 256 KB (exigência do protocolo resumable)
+        self.chunk_size = max(CHUNK_UNIT, chunk_size // CHUNK_UNIT * CHUNK_UNIT)
+        # True a partir do envio do videos.insert (a quota já foi gasta)
+        self.insert_started = False
         
     def authenticate(self):
-        """Autentica com YouTube API"""
+        """
+        Autentica com YouTube API
+        
+        As credenciais são carregadas uma vez por processo e renovadas em
+        background antes de expirar; o serviço é construído a partir do
+        documento de discovery embutido na biblioteca (sem acesso à rede)
+        e reutilizado nas chamadas seguintes da mesma thread.
+        """
         try:
-            from google.oauth2.credentials import Credentials
-            from google_auth_oauthlib.flow import InstalledAppFlow
-            from google.auth.transport.requests import Request
-            from googleapiclient.discovery import build
-            
-            SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+            creds = self._get_credentials()
+            self.youtube = self._get_service(creds)
+            return True
             
-            creds = None
+        except ImportError:
+            print("❌ Bibliotecas do Google não instaladas!")
+            print("Instale com: pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client")
+            return False
+        except Exception as e:
+            print(f"❌ Erro na autenticação: {e}")
+            return False
+    
+    def _get_credentials(self):
+        """Retorna credenciais do cache do processo, carregando se necessário"""
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+        
+        key = str(self.token_file)
+        
+        with _auth_lock:
+            creds = _credentials_cache.get(key)
+            if creds and creds.valid:
+                return creds
             
             # Carrega token salvo se existir
-            if self.token_file.exists():
+            if creds is None and self.token_file.exists():
                 creds = Credentials.from_authorized_user_file(str(self.token_file), SCOPES)
             
             # Se não há credenciais válidas, faz login
@@ -64,28 +138,77 @@ class YouTubeUploader:
                         str(self.credentials_file), SCOPES)
                     creds = flow.run_local_server(port=0)
                 
-                # Salva token
-                self.token_file.parent.mkdir(exist_ok=True)
-                with open(self.token_file, 'w') as token:
-                    token.write(creds.to_json())
+                # Salva token apenas quando mudou
+                self._save_token(creds)
             
-            # Cria serviço YouTube
-            self.youtube = build('youtube', 'v3', credentials=creds)
-            return True
+            _credentials_cache[key] = creds
+            self._start_refresh_thread(creds)
+            return creds
+    
+    def _save_token(self, creds):
+        """Grava token no disco"""
+        self.token_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.token_file, 'w') as token:
+            token.write(creds.to_json())
+    
+    def _start_refresh_thread(self, creds):
+        """Inicia (uma vez por processo) a renovação do token em background"""
+        key = str(self.token_file)
+        if not creds.refresh_token or key in _refresh_threads:
+            return
+        
+        thread = threading.Thread(target=self._refresh_loop, args=(creds,), daemon=True)
+        _refresh_threads[key] = thread
+        thread.start()
+    
+    def _refresh_loop(self, creds):
+        """Renova o token TOKEN_REFRESH_MARGIN segundos antes da expiração"""
+        from google.auth.transport.requests import Request
+        
+        while True:
+            if creds.expiry:
+                # expiry do google-auth é UTC sem fuso
+                now = datetime.now(timezone.utc).replace(tzinfo=None)
+                seconds_left = (creds.expiry - now).total_seconds()
+                time.sleep(max(seconds_left - TOKEN_REFRESH_MARGIN, TOKEN_REFRESH_MIN_INTERVAL))
+            else:
+                time.sleep(TOKEN_REFRESH_MIN_INTERVAL)
             
-        except ImportError:
-            print("❌ Bibliotecas do Google não instaladas!")
-            print("Instale com: pip install google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client")
-            return False
-        except Exception as e:
-            print(f"❌ Erro na autenticação: {e}")
-            return False
+            try:
+                with _auth_lock:
+                    creds.refresh(Request())
+                    self._save_token(creds)
+            except Exception as e:
+                print(f"⚠️ Erro ao renovar token do YouTube: {e}")
+                time.sleep(60)
+    
+    def _get_service(self, creds):
+        """Serviço YouTube da thread atual, construído uma vez"""
+        from googleapiclient.discovery import build
+        
+        services = _thread_local.__dict__.setdefault('services', {})
+        cached_creds, service = services.get(str(self.token_file), (None, None))
+        if service is None or cached_creds is not creds:
+            # static_discovery usa o documento embutido no pacote
+            # google-api-python-client em vez de baixá-lo a cada execução
+            # YOUTUBE_API_ENDPOINT permite apontar para um servidor local (benchmark)
+            api_endpoint = os.getenv("YOUTUBE_API_ENDPOINT")
+            service = build('youtube', 'v3', credentials=creds,
+                            static_discovery=True, cache_discovery=False,
+                            client_options={'api_endpoint': api_endpoint} if api_endpoint else None)
+            services[str(self.token_file)] = (creds, service)
+        return service
     
     def upload_video(self, video_file, title, description, tags=None, 
-                    category_id="22", privacy_status="public"):
+                    category_id="22", privacy_status="public", package_file=None):
         """
         Faz upload de vídeo para YouTube
         
+        O upload é feito em partes (chunk_size). Se package_file for
+        informado, a URI da sessão resumable é salva no pacote a cada parte
+        enviada, e uma nova execução continua do último byte confirmado
+        pelo YouTube em vez de reenviar o arquivo inteiro.
+        
         Args:
             video_file: Path do arquivo de vídeo
             title: Título do vídeo
@@ -93,6 +216,7 @@ class YouTubeUploader:
             tags: Lista de tags
             category_id: ID da categoria (22 = People & Blogs)
             privacy_status: public, private ou unlisted
+            package_file: Pacote onde a sessão de upload é persistida
         
         Returns:
             ID do vídeo no YouTube
@@ -117,7 +241,7 @@ class YouTubeUploader:
         # Prepara upload
         media = MediaFileUpload(
             str(video_file),
-            chunksize=-1,
+            chunksize=self.chunk_size,
             resumable=True,
             mimetype='video/mp4'
         )
@@ -129,8 +253,25 @@ class YouTubeUploader:
             media_body=media
         )
         
+        # Retoma sessão anterior, se houver
+        session = self._load_upload_session(package_file, video_file)
+        if session:
+            request.resumable_uri = session['uri']
+            # Força o cliente a consultar o último byte confirmado antes
+            # de enviar a próxima parte
+            request._in_error_state = True
+            print(f"🔁 Retomando upload ({session.get('progress', 0) / 1024 / 1024:.1f} MB já enviados)")
+        
         print(f"📤 Fazendo upload para YouTube...")
-        response = request.execute()
+        with get_governor().acquire('youtube'):
+            self.insert_started = True
+            upload_start = time.perf_counter()
+            response, bytes_sent = self._upload_chunks(
+                request, media, package_file, video_file,
+                start_progress=session.get('progress', 0) if session else 0)
+        metrics.record(upload_bytes=bytes_sent, upload_seconds=time.perf_counter() - upload_start)
+        
+        self._clear_upload_session(package_file)
         
         video_id = response['id']
         video_url = f"https://youtube.com/shorts/{video_id}"
@@ -141,6 +282,117 @@ class YouTubeUploader:
         
         return video_id, video_url
     
+    def _upload_chunks(self, request, media, package_file, video_file, start_progress=0):
+        """
+        Envia as partes com next_chunk(), com backoff exponencial em
+        erros transitórios
+        
+        Args:
+            start_progress: Bytes já confirmados por uma sessão anterior
+        
+        Returns:
+            (resposta da API, bytes enviados nesta execução)
+        """
+        import httplib2
+        from googleapiclient.errors import HttpError
+        
+        total_size = media.size()
+        response = None
+        retries = 0
+        
+        while response is None:
+            try:
+                status, response = request.next_chunk()
+                retries = 0
+                
+                if status:
+                    print(f"   {status.progress() * 100:.0f}% "
+                          f"({status.resumable_progress / 1024 / 1024:.1f} MB)")
+                if request.resumable_uri and response is None:
+                    self._save_upload_session(package_file, video_file, request.resumable_uri,
+                                              request.resumable_progress, total_size)
+            
+            except HttpError as e:
+                if e.resp.status in (404, 410) and request.resumable_uri:
+                    # Sessão expirada: recomeça do zero
+                    print("⚠️ Sessão de upload expirada, reiniciando upload")
+                    self._clear_upload_session(package_file)
+                    request.resumable_uri = None
+                    request.resumable_progress = 0
+                    request._in_error_state = False
+                    start_progress = 0
+                    continue
+                if e.resp.status not in RETRIABLE_STATUS_CODES:
+                    raise
+                retries = self._backoff(retries, e)
+            
+            except (OSError, httplib2.HttpLib2Error) as e:
+                # Conexão caída: o cliente consulta o byte confirmado na próxima parte
+                retries = self._backoff(retries, e)
+        
+        return response, max(total_size - start_progress, 0)
+    
+    def _backoff(self, retries, error):
+        """Espera exponencial com jitter; desiste após MAX_RETRIES"""
+        retries += 1
+        if retries > MAX_RETRIES:
+            raise Exception(f"Upload falhou após {MAX_RETRIES} tentativas: {error}")
+        
+        delay = min(2 ** retries, 64) * random.uniform(0.5, 1.0)
+        print(f"⚠️ Erro no upload ({error}), nova tentativa em {delay:.1f}s")
+        time.sleep(delay)
+        return retries
+    
+    def _load_upload_session(self, package_file, video_file):
+        """Lê sessão de upload salva no pacote (se ainda corresponde ao vídeo)"""
+        if not package_file:
+            return None
+        
+        with open(package_file, 'r', encoding='utf-8') as f:
+            session = json.load(f).get('youtube_upload_session')
+        
+        if not session:
+            return None
+        
+        # Descarta sessão se o arquivo de vídeo mudou (ex: recompilado)
+        video_path = Path(video_file)
+        if (session.get('video_file') != str(video_path)
+                or session.get('size') != video_path.stat().st_size):
+            return None
+        
+        return session
+    
+    def _save_upload_session(self, package_file, video_file, uri, progress, size):
+        """Persiste URI da sessão e progresso no pacote"""
+        if not package_file:
+            return
+        
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+        
+        package['youtube_upload_session'] = {
+            'uri': uri,
+            'video_file': str(video_file),
+            'size': size,
+            'progress': progress,
+            'updated_at': datetime.now().isoformat()
+        }
+        
+        with open(package_file, 'w', encoding='utf-8') as f:
+            json.dump(package, f, ensure_ascii=False, indent=2)
+    
+    def _clear_upload_session(self, package_file):
+        """Remove sessão de upload do pacote"""
+        if not package_file:
+            return
+        
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+        
+        if package.pop('youtube_upload_session', None) is not None:
+            with open(package_file, 'w', encoding='utf-8') as f:
+                json.dump(package, f, ensure_ascii=False, indent=2)
+    
     def upload_from_package(self, package_file, privacy_status="private"):
         """
         Faz upload a partir de um pacote de conteúdo
@@ -154,6 +406,12 @@ class YouTubeUploader:
         with open(package_file, 'r', encoding='utf-8') as f:
             package = json.load(f)
         
+        # Já publicado (job repetido, retomado ou duplicado): não envia de novo
+        published = already_published(package)
+        if published:
+            print(f"ℹ️ Pacote já publicado: {published[1]}")
+            return published
+        
         video_file = package.get('video_file')
         if not video_file or not Path(video_file).exists():
             raise Exception("Vídeo não encontrado! Compile o vídeo primeiro.")
@@ -183,9 +441,14 @@ class YouTubeUploader:
             title=title[:100],  # YouTube limita a 100 caracteres
             description=full_description[:5000],  # Limite de 5000 caracteres
             tags=tags[:500],  # Limite de 500 caracteres total
-            privacy_status=privacy_status
+            privacy_status=privacy_status,
+            package_file=package_file
         )
         
+        # Recarrega pacote (a sessão de upload foi gravada durante o envio)
+        with open(package_file, 'r', encoding='utf-8') as f:
+            package = json.load(f)
+        
         # Atualiza pacote
         package['youtube_video_id'] = video_id
         package['youtube_url'] = video_url
@@ -215,11 +478,20 @@ if __name__ == "__main__":
     print("6. Salve como: credentials/youtube_client_secrets.json")
     print()
     
-    if len(sys.argv) > 1:
-        package_file = sys.argv[1]
-        uploader = YouTubeUploader()
+    profile = '--profile' in sys.argv
+    args = [a for a in sys.argv[1:] if a != '--profile']
+    
+    if args:
+        package_file = args[0]
+        from channels import channel_of
+        uploader = YouTubeUploader(channel=channel_of(package_file))
         
         # Upload como privado por padrão (para revisão)
-        uploader.upload_from_package(package_file, privacy_status="private")
+        if profile:
+            from profiling import run_profiled
+            run_profiled('upload', uploader.upload_from_package, package_file,
+                         privacy_status="private", package_file=package_file)
+        else:
+            uploader.upload_from_package(package_file, privacy_status="private")
     else:
-        print("Uso: python youtube_uploader.py <arquivo_pacote.json>")
+        print("Uso: python youtube_uploader.py <arquivo_pacote.json> [--profile]")
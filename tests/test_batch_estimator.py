@@ -0,0 +1,93 @@
+"""Estimativa de lotes: ajuste por etapa e previsão do tempo total"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from batch_estimator import BatchEstimator, DEFAULT_RATES, StageModel, fit_linear, fit_models
+
+STAGE_SECONDS = {'conteudo': 10, 'narracao': 20, 'video': 60, 'upload': 10}
+SIZE_KEYS = {'narracao': 'characters', 'video': 'media_seconds', 'upload': 'upload_bytes'}
+
+
+def history(videos=8, workers=4):
+    """Lote sintético: cada vídeo passa pelas 4 etapas num worker compartilhado"""
+    entries = []
+    start = 1_700_000_000
+    for video in range(videos):
+        for stage, seconds in STAGE_SECONDS.items():
+            entry = {'stage': stage, 'wall_seconds': seconds, 'cpu_seconds': seconds / 2,
+                     'success': True, 'worker_id': f'w{video % workers}',
+                     'start': start, 'end': start + seconds}
+            if stage in SIZE_KEYS:
+                entry[SIZE_KEYS[stage]] = 100
+            entries.append(entry)
+            start += seconds / workers
+    return entries
+
+
+class FitTest(unittest.TestCase):
+
+    def test_exact_line(self):
+        xs = [1, 2, 3, 4]
+        a, b = fit_linear(xs, [2 + 3 * x for x in xs])
+        self.assertAlmostEqual(a, 2)
+        self.assertAlmostEqual(b, 3)
+
+    def test_few_samples_use_mean(self):
+        self.assertEqual(fit_linear([1, 2], [10, 20]), (15, 0.0))
+
+    def test_negative_slope_uses_mean(self):
+        self.assertEqual(fit_linear([1, 2, 3], [30, 20, 10]), (20, 0.0))
+
+    def test_constant_size_uses_mean(self):
+        self.assertEqual(fit_linear([5, 5, 5], [1, 2, 3]), (2, 0.0))
+
+    def test_failures_add_attempts(self):
+        entries = [{'stage': 'video', 'wall_seconds': 60, 'media_seconds': 100, 'success': True}] * 3
+        entries += [{'stage': 'video', 'wall_seconds': 60, 'success': False}]
+        model = StageModel('video', entries)
+        self.assertAlmostEqual(model.failure_rate, 0.25)
+        self.assertAlmostEqual(model.seconds(), 60 / 0.75)
+
+    def test_size_scales_time(self):
+        entries = [{'stage': 'video', 'wall_seconds': 10 + 0.5 * size, 'media_seconds': size,
+                    'success': True} for size in (60, 120, 180, 240)]
+        model = StageModel('video', entries)
+        self.assertAlmostEqual(model.seconds(600), 310)
+
+
+class PlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.estimator = BatchEstimator(fit_models(history()), rates=DEFAULT_RATES, limits={})
+
+    def test_sequential(self):
+        plan = self.estimator.plan(10, sequential=True, quota=False)
+        self.assertEqual(plan['total_seconds'], 10 * sum(STAGE_SECONDS.values()))
+        self.assertEqual(plan['bottleneck'], 'video')
+
+    def test_pipeline_paced_by_slowest_stage(self):
+        plan = self.estimator.plan(10, workers={'video': 2}, quota=False)
+        # Primeiro vídeo atravessa tudo; os demais saem a cada 30 s
+        self.assertAlmostEqual(plan['total_seconds'], sum(STAGE_SECONDS.values()) + 9 * 30)
+
+    def test_shared_workers_bound(self):
+        plan = self.estimator.plan(100, shared_workers=4, quota=False)
+        self.assertAlmostEqual(plan['total_seconds'], 100 * sum(STAGE_SECONDS.values()) / 4)
+        self.assertEqual(plan['bottleneck'], 'workers_compartilhados')
+
+    def test_render_cost_uses_cpu_fit(self):
+        cost = self.estimator.plan(10, sequential=True, quota=False)['cost']
+        self.assertAlmostEqual(cost['render']['cpu_minutes'], 10 * 30 / 60)
+
+    def test_youtube_quota_days(self):
+        plan = self.estimator.plan(13, shared_workers=4)
+        self.assertEqual(plan['youtube_quota_days'], 3)
+        self.assertEqual(plan['bottleneck'], 'quota_youtube')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""Banco de casos: migração do JSON legado e importação"""
+
+import sys
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from case_store import CaseStore
+
+
+def case(case_id, titulo):
+    return {'id': case_id, 'titulo': titulo, 'resumo': 'Resumo', 'data': '1990',
+            'local': 'São Paulo', 'categoria': 'homicídio'}
+
+
+class LegacyMigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        (self.data_dir / name).write_text(json.dumps(content), encoding='utf-8')
+
+    def test_invalid_records_are_skipped(self):
+        self.write("casos_policiais.json", [
+            case(1, 'Caso Um'),
+            {'id': 2, 'titulo': 'Sem resumo'},
+            case(None, 'Sem id'),
+            'não é um objeto',
+            case(5, 'Caso Cinco'),
+        ])
+        self.write("casos_usados.json", [5])
+
+        store = CaseStore(db_file=self.data_dir / "casos.db")
+        stats = store.stats()
+        self.assertEqual((stats['total'], stats['used']), (2, 1))
+        self.assertEqual(store.select_unused()['id'], 1)
+
+    def test_import_updates_by_normalized_title(self):
+        store = CaseStore(db_file=self.data_dir / "casos.db")
+        source = self.data_dir / "casos.jsonl"
+        source.write_text("\n".join([
+            json.dumps(case(None, 'Caso Um')),
+            json.dumps({**case(None, 'CASO UM!'), 'resumo': 'Novo resumo'}),
+            '{inválido',
+        ]), encoding='utf-8')
+
+        totals = store.import_file(source)
+        self.assertEqual(totals, {'inserted': 1, 'updated': 1, 'unchanged': 0, 'invalid': 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
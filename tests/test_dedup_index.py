@@ -0,0 +1,95 @@
+"""MinHash/LSH: estimativa de similaridade e limiar de duplicata"""
+
+import sys
+import random
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from dedup_index import (DedupIndex, KIND_SCRIPT, KIND_TITLE, minhash, shingles,
+                         similarity, SIGNATURE_VERSION)
+
+WORDS = ("noite casa policia corpo rua cidade testemunha carro porta janela faca "
+         "vizinho suspeito delegado bairro chuva telefone carta sangue silencio").split()
+
+
+def script(seed, length=200):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) + str(rng.randint(0, 50)) for _ in range(length))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+class MinHashTest(unittest.TestCase):
+
+    def test_identical_texts(self):
+        grams = shingles(script(1), KIND_SCRIPT)
+        self.assertEqual(similarity(minhash(grams), minhash(set(grams))), 1.0)
+
+    def test_estimate_close_to_jaccard(self):
+        base = script(1).split()
+        for changed in (10, 40, 100):
+            other = list(base)
+            for i in random.Random(changed).sample(range(len(other)), changed):
+                other[i] = 'trocada'
+            a = shingles(' '.join(base), KIND_SCRIPT)
+            b = shingles(' '.join(other), KIND_SCRIPT)
+            # 64 permutações: desvio padrão de ~0.06
+            self.assertAlmostEqual(similarity(minhash(a), minhash(b)), jaccard(a, b), delta=0.2)
+
+    def test_empty_text(self):
+        self.assertEqual(len(minhash(set())), len(minhash(shingles("a b c d", KIND_SCRIPT))))
+
+
+class DedupIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        (tmp / "output").mkdir()
+        self.index = DedupIndex(tmp / "dedup.db", threshold=0.6, output_dir=tmp / "output")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_near_duplicate_script_is_found(self):
+        original = script(1)
+        self.index.add(KIND_SCRIPT, 'video_1', original)
+        self.index.add(KIND_SCRIPT, 'video_2', script(2))
+
+        words = original.split()
+        words[100] = 'trocada'
+        found = self.index.find_similar(KIND_SCRIPT, ' '.join(words))
+        self.assertEqual(found[0], 'video_1')
+        self.assertGreaterEqual(found[1], 0.6)
+
+    def test_unrelated_script_is_not_duplicate(self):
+        self.index.add(KIND_SCRIPT, 'video_1', script(1))
+        self.assertIsNone(self.index.find_similar(KIND_SCRIPT, script(3)))
+
+    def test_below_threshold_is_not_duplicate(self):
+        original = script(1)
+        self.index.add(KIND_SCRIPT, 'video_1', original)
+        # Metade das palavras trocadas: Jaccard dos trigramas bem abaixo de 0.6
+        words = [w if i % 2 else 'trocada' for i, w in enumerate(original.split())]
+        self.assertIsNone(self.index.find_similar(KIND_SCRIPT, ' '.join(words)))
+
+    def test_exclude_and_titles(self):
+        title = "O mistério da casa da rua das flores"
+        self.index.add(KIND_TITLE, 'video_1', title)
+        self.assertEqual(self.index.find_similar(KIND_TITLE, "O Mistério da Casa da Rua das Flores!")[0],
+                         'video_1')
+        self.assertIsNone(self.index.find_similar(KIND_TITLE, title, exclude='video_1'))
+
+    def test_signature_version_is_stored(self):
+        row = self.index._connect().execute(
+            "SELECT value FROM meta WHERE key = 'signature_version'").fetchone()
+        self.assertEqual(int(row[0]), SIGNATURE_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
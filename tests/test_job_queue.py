@@ -0,0 +1,249 @@
+"""Fila de jobs: lease, retomada, novas tentativas e fila justa por canal"""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from channels import Channel, DEFAULT_CHANNEL
+import job_queue
+from job_queue import (SQLiteJobQueue, HTTPJobQueue, JobQueueServer, JobWorker, JOB_RENDER,
+                       JOB_UPLOAD, STATUS_PENDING, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED)
+
+
+def make_queue(tmp_dir, **channels):
+    profiles = {DEFAULT_CHANNEL: Channel(DEFAULT_CHANNEL)}
+    profiles.update({name: Channel(name, **values) for name, values in channels.items()})
+    return SQLiteJobQueue(db_file=Path(tmp_dir) / "jobs.db", channels=profiles)
+
+
+class LeaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = make_queue(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def status(self, channel=DEFAULT_CHANNEL):
+        return self.queue.stats().get(channel, {}).get(JOB_RENDER, {})
+
+    def test_expired_lease_is_reclaimed(self):
+        job_id = self.queue.enqueue(JOB_RENDER)
+        first = self.queue.claim([JOB_RENDER], 'w1', lease_seconds=-1)
+        second = self.queue.claim([JOB_RENDER], 'w2')
+
+        self.assertEqual(first['id'], job_id)
+        self.assertEqual(second['id'], job_id)
+        self.assertEqual(second['attempts'], 2)
+        # O worker antigo perdeu o job: não renova nem conclui
+        self.assertFalse(self.queue.heartbeat(job_id, 'w1'))
+        self.assertFalse(self.queue.complete(job_id, 'w1'))
+        self.assertTrue(self.queue.complete(job_id, 'w2'))
+
+    def test_active_lease_is_not_reclaimed(self):
+        self.queue.enqueue(JOB_RENDER)
+        self.queue.claim([JOB_RENDER], 'w1', lease_seconds=300)
+        self.assertIsNone(self.queue.claim([JOB_RENDER], 'w2'))
+        self.assertEqual(self.status(), {STATUS_RUNNING: 1})
+
+    def test_fail_retries_until_max_attempts(self):
+        job_id = self.queue.enqueue(JOB_RENDER, max_attempts=2)
+
+        self.queue.claim([JOB_RENDER], 'w1')
+        self.queue.fail(job_id, 'w1', "erro 1")
+        self.assertEqual(self.status(), {STATUS_PENDING: 1})
+
+        self.queue.claim([JOB_RENDER], 'w1')
+        self.queue.fail(job_id, 'w1', "erro 2")
+        self.assertEqual(self.status(), {STATUS_FAILED: 1})
+        self.assertIsNone(self.queue.claim([JOB_RENDER], 'w1'))
+
+    def test_expired_lease_on_last_attempt_fails(self):
+        self.queue.enqueue(JOB_RENDER, max_attempts=1)
+        self.queue.claim([JOB_RENDER], 'w1', lease_seconds=-1)
+
+        self.assertIsNone(self.queue.claim([JOB_RENDER], 'w2'))
+        self.assertEqual(self.status(), {STATUS_FAILED: 1})
+
+    def test_complete_enqueues_next_stage(self):
+        job_id = self.queue.enqueue(JOB_RENDER, {'package_file': 'p.json'})
+        self.queue.claim([JOB_RENDER], 'w1')
+        self.assertTrue(self.queue.complete(job_id, 'w1', {'package_file': 'p.json'},
+                                            next_job_type=JOB_UPLOAD))
+
+        upload = self.queue.claim([JOB_UPLOAD], 'w1')
+        self.assertEqual(upload['payload'], {'package_file': 'p.json'})
+        self.assertEqual(self.status(), {STATUS_DONE: 1})
+
+    def test_lost_lease_does_not_chain(self):
+        job_id = self.queue.enqueue(JOB_RENDER)
+        self.queue.claim([JOB_RENDER], 'w1', lease_seconds=-1)
+
+        # Lease expirado (ainda sem outro worker): não conclui nem encadeia
+        self.assertFalse(self.queue.complete(job_id, 'w1', {}, next_job_type=JOB_UPLOAD))
+        self.queue.claim([JOB_RENDER], 'w2')
+        self.assertFalse(self.queue.complete(job_id, 'w1', {}, next_job_type=JOB_UPLOAD))
+        self.assertEqual(self.queue.stats()[DEFAULT_CHANNEL].get(JOB_UPLOAD), None)
+
+        self.assertTrue(self.queue.complete(job_id, 'w2', {}, next_job_type=JOB_UPLOAD))
+        self.assertEqual(self.queue.stats()[DEFAULT_CHANNEL][JOB_UPLOAD], {STATUS_PENDING: 1})
+
+
+class WorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = make_queue(self.tmp.name)
+        self.run_stage = job_queue.run_stage
+        self.environ = dict(os.environ)
+        os.environ['METRICS_FILE'] = str(Path(self.tmp.name) / "metrics.jsonl")
+
+    def tearDown(self):
+        job_queue.run_stage = self.run_stage
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.tmp.cleanup()
+
+    def worker(self, **options):
+        worker = JobWorker(self.queue, job_types=[JOB_RENDER], **options)
+        worker.log = lambda message: None
+        return worker
+
+    def test_worker_that_lost_the_lease_does_not_chain(self):
+        self.queue.enqueue(JOB_RENDER, {'package_file': 'p.json', 'auto_upload': True})
+        worker = self.worker(lease_seconds=-1, heartbeat_interval=60)
+
+        def stage(job_type, payload):
+            # Outro worker retoma o job enquanto esta etapa roda
+            self.queue.claim([JOB_RENDER], 'outro')
+            return dict(payload)
+
+        job_queue.run_stage = stage
+        self.assertTrue(worker.process_one())
+        self.assertIsNone(self.queue.stats()[DEFAULT_CHANNEL].get(JOB_UPLOAD))
+
+    def test_worker_chains_next_stage(self):
+        self.queue.enqueue(JOB_RENDER, {'package_file': 'p.json', 'auto_upload': True})
+        job_queue.run_stage = lambda job_type, payload: dict(payload)
+        self.worker().process_one()
+
+        upload = self.queue.claim([JOB_UPLOAD], 'w1')
+        self.assertEqual(upload['payload'], {'package_file': 'p.json', 'auto_upload': True})
+
+    def test_generate_passes_payload_through(self):
+        package_file = Path(self.tmp.name) / "video_1.json"
+
+        class FakeGenerator:
+            def __init__(self, channel=None):
+                pass
+
+            def generate_complete_content(self):
+                return package_file
+
+        module = type(sys)('content_generator')
+        module.ContentGenerator = FakeGenerator
+        original = sys.modules.get('content_generator')
+        sys.modules['content_generator'] = module
+        try:
+            payload = self.run_stage(job_queue.JOB_GENERATE,
+                                     {'auto_upload': True, 'privacy_status': 'unlisted'})
+        finally:
+            if original is None:
+                sys.modules.pop('content_generator')
+            else:
+                sys.modules['content_generator'] = original
+
+        # Sem auto_upload/privacy_status aqui, a cadeia nunca faria o upload
+        self.assertEqual(payload, {'auto_upload': True, 'privacy_status': 'unlisted',
+                                   'package_file': str(package_file)})
+
+
+class FairQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_channels_share_by_weight(self):
+        queue = make_queue(self.tmp.name, a={'weight': 2}, b={'weight': 1})
+        for _ in range(30):
+            queue.enqueue(JOB_RENDER, {'channel': 'a'})
+            queue.enqueue(JOB_RENDER, {'channel': 'b'})
+
+        claimed = []
+        for _ in range(30):
+            job = queue.claim([JOB_RENDER], 'w1')
+            claimed.append(job['channel'])
+            queue.complete(job['id'], 'w1')
+
+        self.assertIn(claimed.count('a'), (19, 20, 21))
+
+    def test_max_concurrent_per_channel(self):
+        queue = make_queue(self.tmp.name, a={'max_concurrent': 1}, b={})
+        for _ in range(3):
+            queue.enqueue(JOB_RENDER, {'channel': 'a'})
+            queue.enqueue(JOB_RENDER, {'channel': 'b'})
+
+        running = [queue.claim([JOB_RENDER], f'w{i}') for i in range(4)]
+        channels = [job['channel'] for job in running]
+        self.assertEqual(channels.count('a'), 1)
+        self.assertEqual(channels.count('b'), 3)
+        self.assertIsNone(queue.claim([JOB_RENDER], 'w4'))
+
+        # Com o job do canal a concluído, o canal volta a ser atendido
+        job_a = next(job for job in running if job['channel'] == 'a')
+        queue.complete(job_a['id'], job_a['worker_id'])
+        self.assertEqual(queue.claim([JOB_RENDER], 'w5')['channel'], 'a')
+
+
+class ServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.queue = make_queue(self.tmp.name)
+        self.environ = dict(os.environ)
+        os.environ.pop('JOB_QUEUE_TOKEN', None)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.tmp.cleanup()
+
+    def serve(self, token=None):
+        server = JobQueueServer(self.queue, port=0, token=token).create_server()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    def test_public_interface_requires_token(self):
+        with self.assertRaises(ValueError):
+            JobQueueServer(self.queue, host='0.0.0.0')
+        self.assertEqual(JobQueueServer(self.queue).host, '127.0.0.1')
+        JobQueueServer(self.queue, host='0.0.0.0', token='segredo')
+
+    def test_requests_without_token_are_rejected(self):
+        import urllib.error
+
+        url = self.serve(token='segredo')
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            HTTPJobQueue(url).stats()
+        self.assertEqual(error.exception.code, 401)
+        with self.assertRaises(urllib.error.HTTPError):
+            HTTPJobQueue(url, token='errado').stats()
+
+        client = HTTPJobQueue(url, token='segredo')
+        client.enqueue(JOB_RENDER)
+        self.assertEqual(client.stats()[DEFAULT_CHANNEL][JOB_RENDER], {STATUS_PENDING: 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
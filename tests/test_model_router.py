@@ -0,0 +1,128 @@
+"""Roteamento de modelos: failover, ordem por saúde e hedge"""
+
+import sys
+import time
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from contextlib import contextmanager
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import metrics
+import model_router
+from model_router import ModelRouter, ModelStats
+
+
+class RouterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.stats = ModelStats(Path(self.tmp.name) / "model_stats.json")
+        self.recorded = []
+        patcher = mock.patch.object(metrics, 'record',
+                                    lambda **values: self.recorded.append(values))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def router(self, hedge=False, acquire=None):
+        routes = {'script': {'models': ['a', 'b'], 'timeout': 5, 'hedge': hedge}}
+        return ModelRouter(routes=routes, stats=self.stats, acquire=acquire)
+
+    def total(self, key):
+        return sum(values.get(key, 0) for values in self.recorded)
+
+
+class FailoverTest(RouterTestCase):
+
+    def test_failover_to_next_model(self):
+        def send(model, timeout):
+            if model == 'a':
+                raise TimeoutError("lento")
+            return f"resposta de {model}"
+
+        self.assertEqual(self.router().complete('script', send), ("resposta de b", 'b'))
+        self.assertEqual(self.total('llm_failovers'), 1)
+        self.assertEqual(self.stats.error_rate('a'), 1.0)
+
+    def test_all_models_failing(self):
+        def send(model, timeout):
+            raise ValueError(f"erro {model}")
+
+        with self.assertRaises(Exception) as error:
+            self.router().complete('script', send)
+        self.assertIn("erro a", str(error.exception))
+        self.assertIn("erro b", str(error.exception))
+
+    def test_unhealthy_model_goes_last(self):
+        for _ in range(3):
+            self.stats.observe('a', None, ok=False)
+        self.assertEqual(self.router().candidates('script'), ['b', 'a'])
+
+
+class HedgeTest(RouterTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # p95 de 0.05s para o modelo principal
+        for _ in range(model_router.MIN_SAMPLES):
+            self.stats.observe('a', 0.05, ok=True)
+
+    def test_slow_primary_is_hedged(self):
+        release = threading.Event()
+
+        def send(model, timeout):
+            if model == 'a':
+                release.wait(5)
+                return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=100,
+                                                             completion_tokens=20))
+            return SimpleNamespace(usage=None)
+
+        response, model = self.router(hedge=True).complete('script', send)
+        self.assertEqual(model, 'b')
+        self.assertEqual(self.total('llm_hedged_requests'), 1)
+
+        # A resposta perdedora chega depois e ainda é contabilizada
+        release.set()
+        deadline = time.time() + 5
+        while not self.total('llm_hedge_discarded') and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.total('prompt_tokens'), 100)
+        self.assertEqual(self.total('completion_tokens'), 20)
+
+    def test_rate_limit_wait_does_not_trigger_hedge(self):
+        @contextmanager
+        def acquire():
+            # Fila do rate limit bem maior que o p95
+            time.sleep(0.3)
+            yield 0.3
+
+        calls = []
+
+        def send(model, timeout):
+            calls.append(model)
+            return "ok"
+
+        self.assertEqual(self.router(hedge=True, acquire=acquire).complete('script', send),
+                         ("ok", 'a'))
+        self.assertEqual(calls, ['a'])
+        self.assertEqual(self.total('llm_hedged_requests'), 0)
+
+    def test_failed_acquire_does_not_hang(self):
+        @contextmanager
+        def acquire():
+            raise TimeoutError("rate limit")
+            yield
+
+        with self.assertRaises(Exception):
+            self.router(hedge=True, acquire=acquire).complete('script', lambda m, t: "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
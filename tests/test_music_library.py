@@ -0,0 +1,43 @@
+"""Biblioteca de músicas: instância compartilhada e reexame do diretório"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import music_library
+from music_library import MusicLibrary, get_library
+
+
+class ScanIfChangedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.music_dir = Path(self.tmp.name)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_rescans_only_when_directory_changes(self):
+        library = MusicLibrary(self.music_dir)
+        with mock.patch.object(library, 'scan') as scan:
+            self.assertTrue(library.scan_if_changed())
+            self.assertFalse(library.scan_if_changed())
+            self.assertEqual(scan.call_count, 1)
+
+            (self.music_dir / "faixa.mp3").write_bytes(b'ID3')
+            # Garante mtime diferente mesmo em sistemas de arquivos com resolução baixa
+            stamp = self.music_dir.stat().st_mtime + 5
+            os.utime(self.music_dir, (stamp, stamp))
+            self.assertTrue(library.scan_if_changed())
+            self.assertEqual(scan.call_count, 2)
+
+    def test_library_is_shared_per_directory(self):
+        with mock.patch.dict(music_library._libraries, clear=True):
+            self.assertIs(get_library(self.music_dir), get_library(self.music_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
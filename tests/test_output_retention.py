@@ -0,0 +1,148 @@
+"""Retenção de output/: arquivamento, restauração e intermediários órfãos"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from output_retention import RetentionManager
+
+
+class ArchiveRestoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        self.output_dir = tmp / "output"
+        self.output_dir.mkdir()
+        self.manager = RetentionManager(output_dir=self.output_dir, archive_dir=tmp / "archive",
+                                        hot_days=7, max_gb=0, title_cards_dir=tmp / "cards")
+
+        self.package_id = "video_20200101_100000"
+        self.audio = self.output_dir / "narracao_20200101_100000.mp3"
+        self.video = self.output_dir / "final_20200101_100000.mp4"
+        self.profile = self.output_dir / f"profile_{self.package_id}" / "conteudo.json"
+        self.audio.write_bytes(b'ID3' + bytes(range(256)) * 40)
+        self.video.write_bytes(b'\x00\x00\x00\x18ftyp' + bytes(range(256)) * 80)
+        self.profile.parent.mkdir()
+        self.profile.write_text('{"stage": "conteudo"}', encoding='utf-8')
+        self.package_file = self.output_dir / f"{self.package_id}.json"
+        self.write_package(status='publicado_youtube')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_package(self, status):
+        package = {
+            'timestamp': '20200101_100000',
+            'caso_titulo': 'Caso de teste',
+            'status': status,
+            'audio_file': f"/outra/maquina/output/{self.audio.name}",
+            'video_file': str(self.video),
+        }
+        self.package_file.write_text(json.dumps(package), encoding='utf-8')
+
+    def test_round_trip(self):
+        originals = {path: path.read_bytes()
+                     for path in (self.audio, self.video, self.profile)}
+
+        result = self.manager.run()
+        self.assertEqual(result['archived'], 1)
+        self.assertFalse(any(path.exists() for path in originals))
+        self.assertIsNotNone(self.manager.index.get(self.package_id))
+
+        # O JSON fica como stub: histórico visível, sem caminhos de mídia
+        stub = json.loads(self.package_file.read_text(encoding='utf-8'))
+        self.assertEqual(stub['caso_titulo'], 'Caso de teste')
+        self.assertNotIn('video_file', stub)
+        self.assertEqual(stub['archive_file'], self.manager.index.get(self.package_id)['archive_file'])
+        self.assertEqual(self.manager.packages(), [])
+        self.assertEqual(self.manager.run()['archived'], 0)
+
+        package_file = self.manager.restore(self.package_id)
+        for path, data in originals.items():
+            self.assertEqual(path.read_bytes(), data)
+        package = json.loads(package_file.read_text(encoding='utf-8'))
+        # Caminhos apontam para o output/ atual; o período quente recomeça
+        self.assertEqual(package['audio_file'], str(self.audio))
+        self.assertIn('restored_at', package)
+        self.assertNotIn('archive_file', package)
+        self.assertIsNone(self.manager.index.get(self.package_id))
+
+        # Recém-restaurado não volta para o arquivo na execução seguinte
+        self.assertEqual(self.manager.run()['archived'], 0)
+
+    def test_unpublished_stays(self):
+        self.write_package(status='video_compilado')
+        self.assertEqual(self.manager.run()['archived'], 0)
+        self.assertTrue(self.package_file.exists())
+
+    def test_dry_run_keeps_files(self):
+        self.manager.dry_run = True
+        self.assertEqual(self.manager.run()['archived'], 1)
+        self.assertTrue(self.package_file.exists())
+        self.assertTrue(self.video.exists())
+
+
+class SweepOrphansTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.tmp.name) / "output"
+        self.output_dir.mkdir()
+        self.manager = RetentionManager(output_dir=self.output_dir,
+                                        archive_dir=Path(self.tmp.name) / "archive")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, name, old=True, content=b'x'):
+        path = self.output_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        if old:
+            stamp = time.time() - 2 * 3600
+            os.utime(path, (stamp, stamp))
+            os.utime(path.parent, (stamp, stamp))
+        return path
+
+    def test_temporary_dirs_and_unfinished_compilations(self):
+        orphans = [
+            self.make("bg_1.mp4"),
+            self.make("seg_final_1_abc/part_0000.mp4"),
+            self.make("narr_narracao_1_abc/part_0000.mp3"),
+            self.make("compilation_abc/concat.txt"),
+            self.make("canal/seg_final_2_abc/part_0000.mp4"),
+            self.make("compilation_20200101_100000.mp4"),
+        ]
+        kept = [
+            self.make("seg_final_3_abc/part_0000.mp4", old=False),
+            self.make("compilation_20200102_100000.mp4"),
+            self.make("compilation_20200102_100000.json", content=b'{}'),
+        ]
+
+        self.manager.sweep_orphans()
+        self.assertFalse(any(path.exists() for path in orphans))
+        self.assertFalse((self.output_dir / "seg_final_1_abc").exists())
+        self.assertTrue(all(path.exists() for path in kept))
+
+    def test_upload_locks_of_missing_or_archived_packages(self):
+        missing = self.make("video_1.upload.lock")
+        archived = self.make("video_2.upload.lock")
+        self.make("video_2.json", content=json.dumps({'archive_file': 'a.zip'}).encode())
+        pending = self.make("video_3.upload.lock")
+        self.make("video_3.json", content=json.dumps({'status': 'video_compilado'}).encode())
+
+        self.manager.sweep_orphans()
+        self.assertFalse(missing.exists())
+        self.assertFalse(archived.exists())
+        self.assertTrue(pending.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
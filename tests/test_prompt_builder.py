@@ -0,0 +1,66 @@
+"""Montagem dos prompts: contagem de tokens e corte dentro do orçamento"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from prompt_builder import PromptBuilder, count_tokens, trim_to_tokens, TRUNCATION_MARK
+
+PREFIX = "Você é um roteirista. Escreva um roteiro curto e cinematográfico."
+SUMMARY = ("Na madrugada de 12 de março, a polícia encontrou a casa aberta e vazia, "
+           "com a mesa posta para três pessoas e o rádio ainda ligado. ") * 20
+
+
+class TrimTest(unittest.TestCase):
+
+    def test_short_text_is_unchanged(self):
+        self.assertEqual(trim_to_tokens("caso curto", 50), "caso curto")
+
+    def test_trimmed_text_fits_and_ends_on_word(self):
+        trimmed = trim_to_tokens(SUMMARY, 40)
+        self.assertLessEqual(count_tokens(trimmed), 40)
+        self.assertTrue(trimmed.endswith(TRUNCATION_MARK))
+        self.assertTrue(SUMMARY.startswith(trimmed[:-len(TRUNCATION_MARK)]))
+        self.assertIn(trimmed[-len(TRUNCATION_MARK) - 1], 'abcdefghijklmnopqrstuvwxyzáéíóúãõç0123456789')
+
+    def test_zero_budget(self):
+        self.assertEqual(trim_to_tokens(SUMMARY, 0), "")
+
+
+class BuildTest(unittest.TestCase):
+
+    def fields(self):
+        return [('CASO', 'O caso da casa vazia', None), ('RESUMO', SUMMARY, 20)]
+
+    def test_within_budget_is_not_trimmed(self):
+        prompt = PromptBuilder(budgets={'script': 10000}).build('script', PREFIX, self.fields())
+        self.assertEqual(prompt.trimmed, [])
+        self.assertIn(SUMMARY.strip(), prompt.messages[1]['content'])
+
+    def test_trims_cuttable_fields_to_budget(self):
+        prompt = PromptBuilder(budgets={'script': 150}).build('script', PREFIX, self.fields(),
+                                                             suffix="ROTEIRO:")
+        self.assertEqual(prompt.trimmed, ['RESUMO'])
+        self.assertLessEqual(prompt.tokens, 150)
+        self.assertFalse(prompt.over_budget)
+        user = prompt.messages[1]['content']
+        self.assertTrue(user.startswith("CASO: O caso da casa vazia"))
+        self.assertTrue(user.endswith("ROTEIRO:"))
+        # O prefixo estático não muda com o corte
+        self.assertEqual(prompt.messages[0]['content'], PREFIX)
+
+    def test_minimum_is_respected(self):
+        prompt = PromptBuilder(budgets={'script': 1}).build('script', PREFIX, self.fields())
+        summary = prompt.messages[1]['content'].split('RESUMO: ', 1)[1]
+        self.assertGreaterEqual(count_tokens(summary), 15)
+        self.assertTrue(prompt.over_budget)
+
+    def test_instructions_are_never_trimmed(self):
+        prompt = PromptBuilder(budgets={'script': 10}).build('script', PREFIX, self.fields())
+        self.assertEqual(prompt.messages[0], {"role": "system", "content": PREFIX})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Governador de rate limit: tokens, slots de concorrência e configuração"""
+
+import sys
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from rate_limiter import RateGovernor, load_limits, DEFAULT_LIMITS, CONCURRENCY_POLL_SECONDS
+
+
+class TryAcquireTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def governor(self, **limits):
+        return RateGovernor(db_file=Path(self.tmp.name) / "rate_limits.db",
+                            limits={'api': limits})
+
+    def test_burst_then_wait_for_refill(self):
+        governor = self.governor(rate=0.5, burst=2)
+        self.assertIsNotNone(governor._try_acquire('api', 0)[0])
+        self.assertIsNotNone(governor._try_acquire('api', 0)[0])
+
+        lease_id, wait = governor._try_acquire('api', 0)
+        self.assertIsNone(lease_id)
+        # Falta 1 token a 0.5/s: cerca de 2 segundos
+        self.assertAlmostEqual(wait, 2.0, delta=0.1)
+
+    def test_concurrency_slots(self):
+        governor = self.governor(concurrency=1)
+        lease_id, _ = governor._try_acquire('api', 0)
+        self.assertEqual(governor._try_acquire('api', 0),
+                         (None, CONCURRENCY_POLL_SECONDS))
+
+        governor.release(lease_id)
+        self.assertIsNotNone(governor._try_acquire('api', 0)[0])
+
+    def test_expired_lease_frees_slot(self):
+        governor = self.governor(concurrency=1, lease_seconds=-1)
+        governor._try_acquire('api', 0)
+        # Processo que morreu sem liberar: o slot volta após o lease
+        self.assertIsNotNone(governor._try_acquire('api', 0)[0])
+
+    def test_units_bucket(self):
+        governor = self.governor(rate=100, burst=100, units_rate=10, units_burst=100)
+        self.assertIsNotNone(governor._try_acquire('api', 80)[0])
+
+        lease_id, wait = governor._try_acquire('api', 50)
+        self.assertIsNone(lease_id)
+        self.assertAlmostEqual(wait, 3.0, delta=0.1)
+
+    def test_cost_above_burst_waits_for_full_bucket(self):
+        governor = self.governor(rate=100, burst=100, units_rate=10, units_burst=100)
+        # Texto maior que a rajada: passa com o bucket cheio e fica devendo
+        self.assertIsNotNone(governor._try_acquire('api', 150)[0])
+        lease_id, wait = governor._try_acquire('api', 10)
+        self.assertIsNone(lease_id)
+        self.assertAlmostEqual(wait, 6.0, delta=0.1)
+
+    def test_acquire_timeout(self):
+        governor = self.governor(rate=0.01, burst=1)
+        governor._try_acquire('api', 0)
+        with self.assertRaises(TimeoutError):
+            with governor.acquire('api', timeout=1):
+                pass
+
+
+class LoadLimitsTest(unittest.TestCase):
+
+    def test_overrides_merge_per_provider(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config_file = Path(tmp) / "rate_limits.json"
+            config_file.write_text(json.dumps({'openrouter': {'rate': 10},
+                                               'novo': {'rate': 1, 'burst': 1}}),
+                                   encoding='utf-8')
+            limits = load_limits(config_file)
+
+        self.assertEqual(limits['openrouter']['rate'], 10)
+        self.assertEqual(limits['openrouter']['concurrency'], 8)
+        self.assertEqual(limits['novo'], {'rate': 1, 'burst': 1})
+        # Os padrões do módulo não são alterados
+        self.assertEqual(DEFAULT_LIMITS['openrouter']['rate'], 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
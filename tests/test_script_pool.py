@@ -0,0 +1,63 @@
+"""Pool de roteiros: retirada atômica e entradas de processos encerrados"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+from script_pool import ScriptPool
+
+
+def dead_pid():
+    """PID de um processo que já terminou"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+class OrphanClaimTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.pool_dir = Path(self.tmp.name)
+        self.pool = ScriptPool(pool_dir=self.pool_dir, size=1, generator=object())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def claimed_entry(self, pid):
+        claimed = self.pool_dir / f"pool_20200101_100000_abc123.claimed-{pid}"
+        claimed.write_text(json.dumps({'created_at': datetime.now().isoformat(),
+                                       'case': {'titulo': 'Caso'}, 'content': {}}),
+                           encoding='utf-8')
+        return claimed
+
+    def test_claim_of_dead_process_returns_to_pool(self):
+        self.claimed_entry(dead_pid())
+
+        self.assertEqual(self.pool.recover_orphans(), 1)
+        self.assertEqual(self.pool.take()['case'], {'titulo': 'Caso'})
+        self.assertEqual(list(self.pool_dir.iterdir()), [])
+
+    def test_claim_of_live_process_is_kept(self):
+        claimed = self.claimed_entry(os.getpid())
+
+        self.assertEqual(self.pool.recover_orphans(), 0)
+        self.assertTrue(claimed.exists())
+        self.assertIsNone(self.pool.take())
+
+    def test_refill_recovers_before_generating(self):
+        self.claimed_entry(dead_pid())
+        # Pool já cheio após a devolução: o gerador nem é usado
+        self.assertEqual(self.pool.refill(), 0)
+        self.assertEqual(self.pool.status()['available'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
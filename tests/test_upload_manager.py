@@ -0,0 +1,137 @@
+"""Gerenciador de uploads: pacotes já publicados e quota diária por canal"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import channels
+import upload_manager
+from upload_manager import UploadManager, QuotaTracker
+
+
+class PackageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        self.quota = QuotaTracker(tmp / "quota.json", daily_limit=3200)
+        self.manager = UploadManager(quota=self.quota, insert_cost=1600)
+        self.package_file = tmp / "video_20200101_100000.json"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_package(self, **fields):
+        self.package_file.write_text(json.dumps({'caso_titulo': 'Caso', **fields}),
+                                     encoding='utf-8')
+
+
+class PublishedPackageTest(PackageTestCase):
+
+    def test_published_package_is_not_uploaded_again(self):
+        self.write_package(status='publicado_youtube', youtube_video_id='abc',
+                           youtube_url='https://youtube.com/shorts/abc')
+
+        result = self.manager.upload_package(self.package_file)
+        self.assertEqual(result['status'], 'enviado')
+        self.assertEqual(result['video_id'], 'abc')
+        # Nenhuma unidade reservada
+        self.assertEqual(self.quota.remaining(), 3200)
+
+    def test_video_id_alone_counts_as_published(self):
+        self.write_package(status='video_compilado', youtube_video_id='abc')
+        self.assertEqual(self.manager.upload_package(self.package_file)['status'], 'enviado')
+        self.assertEqual(self.quota.remaining(), 3200)
+
+
+class QuotaTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state_file = Path(self.tmp.name) / "quota.json"
+        self.quota = QuotaTracker(self.state_file, daily_limit=3200)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reserve_stops_at_daily_limit(self):
+        self.assertTrue(self.quota.reserve(1600))
+        self.assertTrue(self.quota.reserve(1600))
+        self.assertFalse(self.quota.reserve(1))
+        self.assertEqual(self.quota.remaining(), 0)
+
+    def test_refund_returns_units(self):
+        self.quota.reserve(1600)
+        self.quota.refund(1600)
+        self.assertEqual(self.quota.remaining(), 3200)
+        # Nunca fica negativo
+        self.quota.refund(1600)
+        self.assertEqual(self.quota.remaining(), 3200)
+
+    def test_new_day_resets_usage(self):
+        self.state_file.write_text(json.dumps({'date': '2020-01-01', 'used': 3200}),
+                                   encoding='utf-8')
+        self.assertEqual(self.quota.remaining(), 3200)
+        state = json.loads(self.state_file.read_text(encoding='utf-8'))
+        self.assertEqual(state['history'], {'2020-01-01': 3200})
+
+
+class QuotaReservationTest(PackageTestCase):
+
+    def test_exhausted_quota_defers_upload(self):
+        self.write_package(status='video_compilado')
+        self.quota.reserve(3200)
+
+        result = self.manager.upload_package(self.package_file)
+        self.assertEqual(result['status'], 'adiado')
+        package = json.loads(self.package_file.read_text(encoding='utf-8'))
+        self.assertEqual(package['status'], 'upload_adiado')
+        self.assertEqual(package['upload_deferred_until'], result['deferred_until'])
+
+    def test_missing_video_refunds_reservation(self):
+        self.write_package(status='video_compilado',
+                           video_file=str(Path(self.tmp.name) / "ausente.mp4"))
+
+        result = self.manager.upload_package(self.package_file)
+        self.assertEqual(result['status'], 'erro')
+        # Falhou antes do videos.insert: a reserva volta para a quota
+        self.assertEqual(self.quota.remaining(), 3200)
+
+
+class ChannelQuotaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        tmp = Path(self.tmp.name)
+        config_file = tmp / "channels.json"
+        config_file.write_text(json.dumps({'crimes_br': {}}), encoding='utf-8')
+        for patcher in (mock.patch.dict(os.environ, {'CHANNELS_CONFIG': str(config_file),
+                                                     'YOUTUBE_DAILY_QUOTA': '10000'}),
+                        mock.patch.object(channels, 'DATA_DIR', tmp),
+                        mock.patch.object(upload_manager, 'QUOTA_FILE', tmp / "youtube_quota.json")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_report_lists_every_channel(self):
+        manager = UploadManager(insert_cost=1600)
+        manager.quota_for(channels.get_channel('crimes_br')).reserve(1600)
+
+        report = {tuple(names): quota.remaining() for names, quota in manager.quota_report()}
+        self.assertEqual(report, {('default',): 10000, ('crimes_br',): 8400})
+        self.assertEqual(manager.format_quota(), "default 10000/10000, crimes_br 8400/10000")
+
+    def test_shared_quota_is_reported_once(self):
+        quota = QuotaTracker(Path(self.tmp.name) / "quota.json", daily_limit=3200)
+        manager = UploadManager(quota=quota)
+        self.assertEqual(manager.format_quota(), "default/crimes_br 3200/3200")
+
+
+if __name__ == "__main__":
+    unittest.main()
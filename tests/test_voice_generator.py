@@ -0,0 +1,65 @@
+"""Narração em streaming: junção dos trechos MP3"""
+
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import voice_generator
+from voice_generator import StreamingNarration
+
+
+class FakeGenerator:
+
+    def synthesize(self, text, voice_id=None, previous_text=None):
+        return f"<{text}>".encode('utf-8')
+
+
+class FinishTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(voice_generator, 'OUTPUT_DIR', Path(self.tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_segments_are_joined_with_ffmpeg_concat(self):
+        calls = []
+
+        def run(cmd, **kwargs):
+            list_file = Path(cmd[cmd.index('-i') + 1])
+            parts = [line.split("'")[1] for line in list_file.read_text().splitlines()]
+            calls.append((cmd, [(list_file.parent / p).read_bytes() for p in parts]))
+            Path(cmd[-1]).write_bytes(b'mp3')
+
+        narration = StreamingNarration(FakeGenerator())
+        narration.feed("Primeira frase do roteiro, longa o bastante para virar um trecho "
+                       "sozinha, com mais de cento e vinte caracteres no total. ")
+        narration.feed("Segunda frase")
+        with mock.patch.object(voice_generator.subprocess, 'run', run):
+            output = narration.finish("narracao.mp3")
+
+        cmd, parts = calls[0]
+        self.assertEqual(cmd[cmd.index('-c') + 1], 'copy')
+        self.assertEqual(len(parts), 2)
+        self.assertEqual(parts[1], b'<Segunda frase>')
+        self.assertEqual(output.read_bytes(), b'mp3')
+        # Só o áudio final fica no diretório de saída
+        self.assertEqual([p.name for p in Path(self.tmp.name).iterdir()], ["narracao.mp3"])
+
+    def test_single_segment_is_written_directly(self):
+        narration = StreamingNarration(FakeGenerator())
+        narration.feed("Frase curta.")
+        with mock.patch.object(voice_generator.subprocess, 'run') as run:
+            output = narration.finish("narracao.mp3")
+
+        run.assert_not_called()
+        self.assertEqual(output.read_bytes(), b'<Frase curta.>')
+
+
+if __name__ == "__main__":
+    unittest.main()